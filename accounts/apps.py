@@ -5,4 +5,7 @@ class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
     verbose_name = '使用者管理'
-
+    
+    def ready(self):
+        from . import signals
+        signals.connect()
@@ -0,0 +1,17 @@
+"""
+使用者異動時讓使用者相關的儀表板快取失效
+"""
+
+from django.db.models.signals import post_delete, post_save
+
+from onecoco import cache
+from .models import User
+
+
+def invalidate_users(sender, **kwargs):
+    cache.bump_version(cache.USERS_SCOPE)
+
+
+def connect():
+    post_save.connect(invalidate_users, sender=User, dispatch_uid='users_cache_post_save')
+    post_delete.connect(invalidate_users, sender=User, dispatch_uid='users_cache_post_delete')
@@ -1,33 +1,47 @@
 from django.db import migrations, models
-from django.utils import timezone
 from datetime import datetime, time
 
+from onecoco.data_migrations import migrate_in_chunks
+
+
+def to_noon(obj):
+    """將日期轉換為當天中午12點的 datetime；已經是 datetime 的不需要轉換"""
+    if obj.date and not isinstance(obj.date, datetime):
+        obj.date = datetime.combine(obj.date, time(12, 0))
+        return True
+    return False
+
+
+def to_date(obj):
+    """將 datetime 轉換回日期"""
+    if obj.date and isinstance(obj.date, datetime):
+        obj.date = obj.date.date()
+        return True
+    return False
+
+
 def convert_date_to_datetime(apps, schema_editor):
-    """將現有的日期資料轉換為日期時間"""
+    """
+    將現有的日期資料轉換為日期時間（分批 bulk_update，不逐筆 save）
+
+    這個遷移刻意維持單一交易：資料轉換與後面的 AlterField 必須一起成功或一起回復，
+    否則欄位型別與資料會不一致。分批只減少記憶體與 UPDATE 次數，不會每批提交；
+    已經部署過的資料庫也不能再把資料轉換拆成另一個遷移。需要每批提交的大量轉換見 0004。
+    """
     Cost = apps.get_model('costs', 'Cost')
     
     # 更新所有現有的成本記錄，將日期設為當天的中午12點
-    for cost in Cost.objects.all():
-        if hasattr(cost, 'date') and cost.date:
-            # 如果 date 是 DateField，轉換為 DateTimeField
-            if isinstance(cost.date, datetime):
-                # 已經是 datetime，不需要轉換
-                continue
-            else:
-                # 將日期轉換為當天中午12點的 datetime
-                cost.date = datetime.combine(cost.date, time(12, 0))
-                cost.save()
+    migrate_in_chunks(
+        Cost.objects.using(schema_editor.connection.alias), to_noon, ['date'], only=['date']
+    )
 
 def reverse_convert_date_to_datetime(apps, schema_editor):
     """反向轉換：將日期時間轉換回日期"""
     Cost = apps.get_model('costs', 'Cost')
     
-    for cost in Cost.objects.all():
-        if hasattr(cost, 'date') and cost.date:
-            # 將 datetime 轉換為 date
-            if isinstance(cost.date, datetime):
-                cost.date = cost.date.date()
-                cost.save()
+    migrate_in_chunks(
+        Cost.objects.using(schema_editor.connection.alias), to_date, ['date'], only=['date']
+    )
 
 class Migration(migrations.Migration):
 
@@ -0,0 +1,14 @@
+from onecoco.api import LedgerSerializer
+from .models import Cost
+
+
+class CostSerializer(LedgerSerializer):
+    """成本序列化器"""
+
+    class Meta(LedgerSerializer.Meta):
+        model = Cost
+        fields = [
+            'id', 'date', 'amount', 'selling_price', 'description', 'category',
+            'supplier', 'invoice_number', 'notes',
+            'store_id', 'recorded_by', 'recorded_by_name', 'created_at', 'updated_at'
+        ]
@@ -4,9 +4,7 @@ from . import views
 app_name = 'costs'
 
 urlpatterns = [
-    # 暫時為空，稍後會加入成本相關的 URL
+    # 成本 API
+    path('', views.CostListCreateView.as_view(), name='cost_list_create'),
+    path('<int:pk>/', views.CostDetailView.as_view(), name='cost_detail'),
 ]
-
-
-
-
@@ -1,9 +1,19 @@
-from django.shortcuts import render
 from rest_framework import generics
+
+from onecoco.api import LedgerAPIMixin
 from .models import Cost
+from .serializers import CostSerializer
+
 
-# 暫時為空，稍後會加入成本相關的視圖
+class CostListCreateView(LedgerAPIMixin, generics.ListCreateAPIView):
+    """成本列表和建立"""
 
+    model = Cost
+    serializer_class = CostSerializer
 
 
+class CostDetailView(LedgerAPIMixin, generics.RetrieveAPIView):
+    """成本詳細資料"""
 
+    model = Cost
+    serializer_class = CostSerializer
@@ -4,22 +4,30 @@ from .models import Expense
 
 @admin.register(Expense)
 class ExpenseAdmin(admin.ModelAdmin):
-    list_display = ['date', 'item_name', 'category', 'amount', 'recorded_by', 'created_at']
-    list_filter = ['category', 'date', 'recorded_by']
+    list_display = ['date', 'store_id', 'item_name', 'category', 'amount', 'recorded_by', 'created_at']
+    list_filter = ['category', 'date', 'store_id', 'recorded_by']
     search_fields = ['item_name', 'notes']
     date_hierarchy = 'date'
     ordering = ['-date', '-created_at']
+    actions = ['export_as_csv']
     
     fieldsets = (
         ('基本資訊', {
             'fields': ('date', 'item_name', 'amount', 'category')
         }),
         ('詳細資訊', {
-            'fields': ('notes', 'recorded_by')
+            'fields': ('store_id', 'notes', 'recorded_by')
         }),
     )
     
     def save_model(self, request, obj, form, change):
         if not change:  # 如果是新增
             obj.recorded_by = request.user
+            obj.store_id = request.user.store_id
         super().save_model(request, obj, form, change)
+    
+    @admin.action(description='匯出選取的支出為 CSV')
+    def export_as_csv(self, request, queryset):
+        """以串流方式匯出選取的資料"""
+        from onecoco import exporter
+        return exporter.export_response(queryset, 'expenses', 'expenses.csv')
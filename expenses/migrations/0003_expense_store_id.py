@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+
+def backfill_store_id(apps, schema_editor):
+    """以記錄人員的店面ID回填既有支出"""
+    Expense = apps.get_model('expenses', 'Expense')
+    User = apps.get_model('accounts', 'User')
+    
+    Expense.objects.update(
+        store_id=models.Subquery(
+            User.objects.filter(pk=models.OuterRef('recorded_by_id')).values('store_id')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_auto_20250901_0123'),
+        ('expenses', '0002_rename_expenses_ex_date_123456_idx_expenses_ex_date_17a2b2_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='store_id',
+            field=models.CharField(default='main_store', help_text='未來擴展多店管理用', max_length=50, verbose_name='店面ID'),
+        ),
+        migrations.RunPython(backfill_store_id, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['store_id', 'date'], name='expenses_ex_store_i_f7f71d_idx'),
+        ),
+    ]
@@ -48,6 +48,13 @@ class Expense(models.Model):
         help_text='支出說明或備註'
     )
     
+    store_id = models.CharField(
+        max_length=50,
+        default='main_store',
+        verbose_name='店面ID',
+        help_text='未來擴展多店管理用'
+    )
+    
     recorded_by = models.ForeignKey(
         'accounts.User',
         on_delete=models.CASCADE,
@@ -71,6 +78,7 @@ class Expense(models.Model):
         ordering = ['-date', '-created_at']
         indexes = [
             models.Index(fields=['date']),
+            models.Index(fields=['store_id', 'date']),
             models.Index(fields=['category']),
             models.Index(fields=['recorded_by']),
         ]
@@ -87,3 +95,9 @@ class Expense(models.Model):
     def category_display(self):
         """取得類別顯示名稱"""
         return self.get_category_display()
+    
+    def save(self, *args, **kwargs):
+        """儲存時自動設定店面ID"""
+        if not self.store_id:
+            self.store_id = self.recorded_by.store_id
+        super().save(*args, **kwargs)
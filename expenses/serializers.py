@@ -0,0 +1,13 @@
+from onecoco.api import LedgerSerializer
+from .models import Expense
+
+
+class ExpenseSerializer(LedgerSerializer):
+    """支出序列化器"""
+
+    class Meta(LedgerSerializer.Meta):
+        model = Expense
+        fields = [
+            'id', 'date', 'amount', 'item_name', 'category', 'notes',
+            'store_id', 'recorded_by', 'recorded_by_name', 'created_at', 'updated_at'
+        ]
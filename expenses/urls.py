@@ -4,5 +4,7 @@ from . import views
 app_name = 'expenses'
 
 urlpatterns = [
-    # 這裡可以添加支出相關的 URL
+    # 支出 API
+    path('', views.ExpenseListCreateView.as_view(), name='expense_list_create'),
+    path('<int:pk>/', views.ExpenseDetailView.as_view(), name='expense_detail'),
 ]
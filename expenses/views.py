@@ -0,0 +1,19 @@
+from rest_framework import generics
+
+from onecoco.api import LedgerAPIMixin
+from .models import Expense
+from .serializers import ExpenseSerializer
+
+
+class ExpenseListCreateView(LedgerAPIMixin, generics.ListCreateAPIView):
+    """支出列表和建立"""
+
+    model = Expense
+    serializer_class = ExpenseSerializer
+
+
+class ExpenseDetailView(LedgerAPIMixin, generics.RetrieveAPIView):
+    """支出詳細資料"""
+
+    model = Expense
+    serializer_class = ExpenseSerializer
@@ -0,0 +1,82 @@
+"""
+gunicorn 正式環境設定（gunicorn -c gunicorn.conf.py）
+
+所有設定都可用環境變數調整：
+
+- WEB_CONCURRENCY：worker 數（預設 CPU 數 × 2 + 1，最多 8）。快取為 locmem 時預設只有 1 個 worker，
+  因為各 worker 的快取版本號不會同步（onecoco/settings.py 也會拒絕 locmem 搭配多個 worker）
+- GUNICORN_WORKER_CLASS：sync（預設）、gthread 或 uvicorn。
+  uvicorn 會改用 onecoco/asgi.py（需另外 pip install uvicorn），可搭配 ASYNC_DASHBOARD=True
+- GUNICORN_THREADS：gthread 每個 worker 的執行緒數（預設 4）
+- GUNICORN_PRELOAD：預設 True，主行程先載入 Django 再 fork，worker 共用記憶體分頁
+- GUNICORN_MAX_REQUESTS／GUNICORN_MAX_REQUESTS_JITTER：處理指定請求數後重啟 worker，
+  避免記憶體逐漸增加；加上隨機量避免所有 worker 同時重啟
+- GUNICORN_TIMEOUT：請求逾時秒數（預設 30）
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+
+# 與 onecoco/settings.py 相同：DEBUG=False 時預設使用 file 快取
+_cache_backend = os.environ.get('CACHE_BACKEND', 'locmem' if os.environ.get('DEBUG', 'True') == 'True' else 'file')
+if _cache_backend == 'locmem':
+    workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+else:
+    workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+
+_worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+if _worker_class == 'uvicorn':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    wsgi_app = 'onecoco.asgi:application'
+else:
+    worker_class = _worker_class
+    wsgi_app = 'onecoco.wsgi:application'
+    if worker_class == 'gthread':
+        threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = 30
+keepalive = 5
+
+# 心跳檔放在記憶體中，避免 Docker 的 overlay 檔案系統造成 worker 卡住
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    """預先載入時，在 fork 前先完成會產生大量物件的初始化，讓 worker 共用"""
+    if not preload_app:
+        return
+    from django.db import connections
+    from django.template.loader import get_template
+    from django.urls import get_resolver
+
+    from onecoco.db import pool
+
+    get_resolver().url_patterns
+    for name in (
+        'dashboard/index_unified.html',
+        'dashboard/sales_management_unified.html',
+        'dashboard/cost_management_unified.html',
+        'dashboard/profit_analysis_unified.html',
+        'dashboard/user_management_unified.html',
+    ):
+        get_template(name)
+    # 主行程不保留資料庫連線（包含連線池中的閒置連線），避免 worker 共用同一個 socket
+    connections.close_all()
+    pool.close_all()
+    # 將目前的物件移到永久世代，worker 的垃圾回收不會寫入這些分頁（copy-on-write）
+    gc.collect()
+    gc.freeze()
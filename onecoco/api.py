@@ -0,0 +1,210 @@
+"""
+REST API 的共用元件
+
+- StoreScopedMixin：依使用者限制店面，超級使用者可用 ?store= 切換
+- KeysetPagination：沿用 onecoco.pagination 的 (date, created_at, id) 游標分頁，不需 COUNT(*)
+- SparseFieldsMixin：?fields=id,date,amount 只回傳指定欄位
+- VersionETagMixin：以 onecoco.cache 的版本號產生 ETag，If-None-Match 相符時
+  直接回傳 304，不查詢資料庫
+- JSONLinesParser：每行一個 JSON 物件的請求內容
+"""
+
+import hashlib
+import json
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import serializers, status
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.parsers import BaseParser
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from onecoco import cache, exporter, pagination
+
+
+class StoreScopedMixin:
+    """依店面限制查詢範圍"""
+
+    def get_store_id(self):
+        """超級使用者可用 ?store= 指定店面，留空代表所有店面；其他使用者固定為自己的店面"""
+        user = self.request.user
+        if user.is_superuser:
+            return self.request.query_params.get('store', '').strip()
+        return user.store_id
+
+    def scope_queryset(self, queryset):
+        store_id = self.get_store_id()
+        if store_id:
+            queryset = queryset.filter(store_id=store_id)
+        return queryset
+
+    def get_create_store_id(self, serializer):
+        """新增資料的店面：超級使用者可在內容中指定，其他使用者固定為自己的店面"""
+        user = self.request.user
+        if user.is_superuser:
+            return serializer.validated_data.get('store_id') or self.get_store_id() or user.store_id
+        return user.store_id
+
+
+class KeysetPagination(BasePagination):
+    """帳本資料的游標分頁；回傳 next 連結與 next_cursor"""
+
+    page_size = pagination.DEFAULT_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        token = request.query_params.get('cursor')
+        cursor = pagination.decode_cursor(token)
+        if token and cursor is None:
+            raise NotFound('無效的游標')
+        self.request = request
+        self.page = pagination.keyset_page(
+            queryset,
+            cursor,
+            pagination.parse_page_size(request.query_params.get('page_size'), self.page_size),
+            archived=view.get_archive() if hasattr(view, 'get_archive') else None,
+        )
+        return list(self.page)
+
+    def get_next_link(self):
+        if not self.page.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), 'cursor', self.page.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'next_cursor': self.page.next_cursor,
+            'results': data,
+        })
+
+
+class ReportCursorPagination(CursorPagination):
+    """報表的游標分頁，依建立時間由新到舊"""
+
+    ordering = '-created_at'
+    page_size = pagination.DEFAULT_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = pagination.MAX_PAGE_SIZE
+
+
+def requested_fields(request):
+    """?fields= 指定的欄位；未指定時回傳 None"""
+    requested = request.query_params.get('fields')
+    if not requested:
+        return None
+    return {name.strip() for name in requested.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """讀取時依 ?fields= 只保留指定的欄位"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        wanted = requested_fields(request)
+        if wanted is None:
+            return
+        for name in set(self.fields) - wanted:
+            self.fields.pop(name)
+
+
+class VersionETagMixin:
+    """GET 回應帶上由快取版本號計算的 ETag，並處理 If-None-Match"""
+
+    def get_etag_scopes(self):
+        return [cache.store_scope(self.get_store_id()), cache.USERS_SCOPE]
+
+    def get_etag(self, request):
+        versions = [f'{scope}={cache.get_version(scope)}' for scope in self.get_etag_scopes()]
+        raw = '|'.join(versions + [str(request.user.pk), request.get_full_path()])
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+        return response
+
+
+class LedgerAPIMixin(StoreScopedMixin, VersionETagMixin):
+    """銷售、成本、支出 API 的共用行為：店面範圍、?start=&end= 日期區間與 ETag"""
+
+    model = None
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        queryset = self.scope_queryset(self.model.objects.all())
+        fields = requested_fields(self.request)
+        if fields is None or 'recorded_by_name' in fields:
+            queryset = queryset.select_related('recorded_by')
+        return queryset
+
+    def get_archive(self):
+        """與列表條件相同的歸檔資料（reports.archive），由 KeysetPagination 合併"""
+        from reports.archive import ArchiveQuery
+
+        archived = self.scope_queryset(ArchiveQuery(self.model)).select_related('recorded_by')
+        return self.filter_queryset(archived)
+
+    def filter_queryset(self, queryset):
+        dates = {}
+        for name in ('start', 'end'):
+            value = self.request.query_params.get(name)
+            try:
+                dates[name] = date.fromisoformat(value) if value else None
+            except ValueError:
+                raise serializers.ValidationError({name: '日期格式必須為 YYYY-MM-DD'})
+        return exporter.filter_ledger(queryset, start_date=dates['start'], end_date=dates['end'])
+
+    def perform_create(self, serializer):
+        try:
+            with transaction.atomic():
+                serializer.save(
+                    recorded_by=self.request.user,
+                    store_id=self.get_create_store_id(serializer),
+                )
+        except IntegrityError:
+            raise serializers.ValidationError({'date': '同店面同一時間已有記錄'})
+
+
+class LedgerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """帳本資料序列化器的共用欄位"""
+
+    recorded_by_name = serializers.CharField(source='recorded_by.username', read_only=True)
+    # 頁面允許自由輸入類別（例如銷售地點），API 與頁面一致，不限定 choices
+    category = serializers.CharField(max_length=20, required=False, allow_blank=True)
+
+    class Meta:
+        read_only_fields = ['id', 'recorded_by', 'created_at', 'updated_at']
+        extra_kwargs = {'store_id': {'required': False}}
+
+
+class JSONLinesParser(BaseParser):
+    """解析 JSON Lines（每行一個 JSON 物件），回傳物件列表；空白行會略過"""
+
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        items = []
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                raise ParseError(f'第 {number} 行不是有效的 JSON：{e}')
+        return items
+
+
+class JSONLParser(JSONLinesParser):
+    media_type = 'application/jsonl'
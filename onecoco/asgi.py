@@ -0,0 +1,18 @@
+"""
+ASGI config for onecoco project.
+"""
+
+import os
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'onecoco.settings')
+
+application = get_asgi_application()
+
+# 與 wsgi.py 相同，正式環境直接送出 collectstatic 的輸出
+if settings.STATIC_SERVING:
+    from onecoco.static_serving import ASGIStaticFilesApp
+
+    application = ASGIStaticFilesApp(application)
@@ -0,0 +1,71 @@
+"""
+銷售管理與利潤分析的非同步版本
+
+頁面需要的查詢彼此獨立，同步版本依序執行，延遲是各次往返時間的總和。
+這裡把每個查詢交給執行緒池同時執行再一起等待，延遲約為最慢的一次查詢；
+資料庫在遠端（例如 Render 的 Postgres）時差異最明顯。
+
+以 ASGI（onecoco/asgi.py）執行並設定 ASYNC_DASHBOARD=1 時，網址會改用這些頁面。
+"""
+
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.db import close_old_connections
+
+from . import views
+from .conditional import conditional_page
+from .db.routers import use_replica
+
+
+def async_login_required(view):
+    """login_required 的非同步版本；使用者在執行緒中載入，不會阻塞事件迴圈"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+        if not is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def _in_worker(name, loader):
+    def run():
+        try:
+            return views.load_or_default(name, loader)
+        finally:
+            # 每個執行緒有自己的資料庫連線，依 CONN_MAX_AGE 決定是否關閉
+            close_old_connections()
+    return run
+
+
+async def gather_loaders(loaders):
+    """同時執行多個獨立查詢，回傳 {名稱: 結果}"""
+    names = list(loaders)
+    results = await asyncio.gather(*(
+        sync_to_async(_in_worker(name, loaders[name]), thread_sensitive=False)()
+        for name in names
+    ))
+    return dict(zip(names, results))
+
+
+@async_login_required
+@conditional_page(views.sales_management_scope)
+@use_replica(views.sales_management_scope)
+async def sales_management(request):
+    """銷售管理頁面（非同步）"""
+    params = await sync_to_async(views.sales_management_params)(request)
+    data = await gather_loaders(views.sales_management_loaders(request, params))
+    return await sync_to_async(views.sales_management_response)(request, params, data)
+
+
+@async_login_required
+@conditional_page(views.profit_analysis_scope)
+@use_replica(views.profit_analysis_scope)
+async def profit_analysis(request):
+    """利潤分析頁面（非同步）"""
+    params = views.profit_analysis_params()
+    data = await gather_loaders(views.profit_analysis_loaders(params))
+    return await sync_to_async(views.profit_analysis_response)(request, params, data)
@@ -0,0 +1,93 @@
+"""
+共用快取層：依店面與期間命名、以版本號失效的快取鍵
+
+每個範圍（某店面、所有店面、使用者、報表）各有一個版本號，快取鍵都帶著目前的
+版本號。該範圍的資料異動時只需把版本號加一，舊的快取鍵就不再被讀到，
+等待過期即可，不必逐一刪除。後端由 settings.CACHES 決定（本機記憶體、
+檔案或 Redis）。
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+ALL_STORES = '*'
+USERS_SCOPE = 'users'
+REPORTS_SCOPE = 'reports'
+
+
+def is_shared():
+    """快取是否由所有 worker 共用；locmem 只存在單一行程中，其他 worker 看不到版本號的變動"""
+    return settings.CACHES['default']['BACKEND'] != 'django.core.cache.backends.locmem.LocMemCache'
+
+
+def store_scope(store_id):
+    """店面的快取範圍；store_id 為空代表所有店面"""
+    return f'store:{store_id or ALL_STORES}'
+
+
+def _version_key(scope):
+    return f'version:{scope}'
+
+
+def _initial_version():
+    # 以毫秒時間戳作為起始值，版本號被淘汰後重新建立也不會與舊鍵重複
+    return int(time.time() * 1000)
+
+
+def get_version(scope):
+    """取得範圍目前的版本號"""
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def _written_key(scope):
+    return f'written:{scope}'
+
+
+def bump_version(scope):
+    """將範圍的版本號加一，使該範圍所有快取失效"""
+    key = _version_key(scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), None)
+    # 設定唯讀副本時，記下範圍剛有異動，這段時間內改讀主資料庫（見 onecoco.db.routers）
+    if settings.DB_REPLICA_STICKY_SECONDS:
+        cache.set(_written_key(scope), True, settings.DB_REPLICA_STICKY_SECONDS)
+
+
+def recently_written(*scopes):
+    """任一範圍是否在 DB_REPLICA_STICKY_SECONDS 秒內有資料異動"""
+    keys = [_written_key(scope) for scope in scopes if scope]
+    return bool(keys) and bool(cache.get_many(keys))
+
+
+def invalidate_stores(store_ids):
+    """帳本資料異動後，在交易提交時讓相關店面與「所有店面」的快取失效"""
+    scopes = {store_scope(store_id) for store_id in store_ids}
+    scopes.add(store_scope(None))
+
+    def bump():
+        for scope in scopes:
+            bump_version(scope)
+
+    transaction.on_commit(bump)
+
+
+def cached(scope, name, compute, timeout=None):
+    """
+    讀取版本化快取，未命中時呼叫 compute() 計算並寫入
+
+    name 應包含期間等參數，例如 'sales-totals:2025-09-01:2025-09-30'。
+    """
+    key = f'{scope}:{name}:v{get_version(scope)}'
+    if timeout is None:
+        timeout = settings.DASHBOARD_CACHE_TIMEOUT
+    return cache.get_or_set(key, compute, timeout)
@@ -0,0 +1,109 @@
+"""
+儀表板頁面的條件式 GET
+
+頁面的 ETag 由 onecoco.cache 的店面資料版本計算：任何新增、修改、刪除都會
+讓版本號加一，因此 If-None-Match 相符時代表資料沒有變動，直接回傳 304，
+不執行任何彙總查詢，也不渲染模板。計算 ETag 只需讀取快取中的版本號。
+
+ETag 另外包含：
+- 使用者、完整網址（年月、店面等篩選）與當天日期（頁面有「今日」數字）
+- CSRF cookie：重新登入後表單中的 token 會改變，舊頁面不能沿用
+- 部署版本（模板與靜態檔案 manifest 的修改時間）：更新程式後不會沿用舊的 HTML
+
+有待顯示的訊息（例如新增失敗）時不做條件式回應，讓訊息能顯示出來。
+版本號必須在各 worker 間一致，因此只有共用的快取後端（CACHE_BACKEND=file 或 redis）
+才會回應 ETag；locmem 時頁面照常執行，不做條件式回應。
+"""
+
+import hashlib
+import os
+from functools import lru_cache, wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.http import HttpResponseNotModified
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+
+from onecoco import cache
+
+
+@lru_cache(maxsize=None)
+def release_token():
+    """部署版本：模板與 staticfiles manifest 最新的修改時間"""
+    latest = 0
+    for template in settings.TEMPLATES:
+        for directory in template.get('DIRS', []):
+            for root, _, filenames in os.walk(directory):
+                for filename in filenames:
+                    latest = max(latest, os.stat(os.path.join(root, filename)).st_mtime_ns)
+    manifest = os.path.join(settings.STATIC_ROOT, 'staticfiles.json')
+    if os.path.exists(manifest):
+        latest = max(latest, os.stat(manifest).st_mtime_ns)
+    return str(latest)
+
+
+def page_etag(request, scope):
+    """頁面的 ETag；快取不共用或有待顯示的訊息時回傳 None（不做條件式回應）"""
+    if not cache.is_shared() or len(get_messages(request)):
+        return None
+    parts = [
+        f'{scope}={cache.get_version(scope)}',
+        f'{cache.USERS_SCOPE}={cache.get_version(cache.USERS_SCOPE)}',
+        str(request.user.pk),
+        request.get_full_path(),
+        timezone.localdate().isoformat(),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        release_token(),
+    ]
+    return quote_etag(hashlib.md5('|'.join(parts).encode()).hexdigest())
+
+
+def _not_modified(request, etag):
+    if etag is None or request.method not in ('GET', 'HEAD'):
+        return None
+    if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in if_none_match or '*' in if_none_match:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    return None
+
+
+def _with_etag(response, etag):
+    if etag is not None and response.status_code == 200:
+        response['ETag'] = etag
+        # 每次使用前都要向伺服器確認，且只能存在使用者自己的瀏覽器
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_page(get_scope):
+    """
+    以店面資料版本處理 If-None-Match 的頁面裝飾器（同步與非同步頁面皆可）
+
+    get_scope(request) 回傳頁面資料所屬的快取範圍，例如 cache.store_scope(店面ID)。
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                etag = await sync_to_async(lambda: page_etag(request, get_scope(request)))()
+                not_modified = _not_modified(request, etag)
+                if not_modified is not None:
+                    return not_modified
+                return _with_etag(await view(request, *args, **kwargs), etag)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            etag = page_etag(request, get_scope(request))
+            not_modified = _not_modified(request, etag)
+            if not_modified is not None:
+                return not_modified
+            return _with_etag(view(request, *args, **kwargs), etag)
+        return wrapper
+    return decorator
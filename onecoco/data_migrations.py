@@ -0,0 +1,77 @@
+"""
+大型資料表的分批資料轉換
+
+供 RunPython 資料遷移與管理指令使用：依主鍵範圍每次讀取 chunk_size 筆，
+在 Python 中轉換後以 bulk_update 寫回，每批一個交易並回報進度。
+記憶體只與批次大小有關，每批只需一次 SELECT 與一次 UPDATE，
+不會像逐筆 save() 那樣每列一次 UPDATE。
+
+遷移中使用時，Migration 需設定 atomic = False，每批才會各自提交（例如 sales／costs 的 0004）；
+否則整個遷移仍在同一個交易中（但仍是分批讀寫）。sales／costs 的 0002 與欄位型別變更
+在同一個遷移中，刻意維持單一交易。
+"""
+
+import sys
+
+from django.db import connections, models, transaction
+from django.db.models.functions import Cast, Length
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def print_progress(label, processed, total, updated):
+    """預設的進度輸出，格式與 migrate 指令的輸出一致"""
+    sys.stdout.write(f'\n    {label}：{processed}/{total} 筆，已更新 {updated} 筆')
+    sys.stdout.flush()
+
+
+def migrate_in_chunks(queryset, transform, fields, chunk_size=DEFAULT_CHUNK_SIZE,
+                      only=None, progress=print_progress):
+    """
+    依主鍵分批轉換資料
+
+    queryset 為要處理的資料（可先篩選）；transform(obj) 直接修改 obj，
+    回傳 True 表示需要寫回 fields 欄位。only 可限制讀取的欄位以節省記憶體。
+    progress(label, processed, total, updated) 為 None 時不輸出進度。
+    回傳更新的筆數。
+    """
+    model = queryset.model
+    using = queryset.db
+    queryset = queryset.order_by('pk')
+    if only:
+        queryset = queryset.only(*only)
+    label = model._meta.label
+    total = queryset.count()
+
+    processed = updated = 0
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        with transaction.atomic(using=using):
+            rows = list(chunk[:chunk_size])
+            if not rows:
+                break
+            changed = [row for row in rows if transform(row)]
+            if changed:
+                model._base_manager.using(using).bulk_update(changed, fields)
+        last_pk = rows[-1].pk
+        processed += len(rows)
+        updated += len(changed)
+        if progress:
+            progress(label, processed, total, updated)
+    return updated
+
+
+def date_only_rows(queryset, field='date'):
+    """
+    SQLite 中只存了 YYYY-MM-DD 的日期時間欄位
+
+    早期的日期轉日期時間遷移在欄位仍為 DateField 時寫回，SQLite 的舊資料
+    因此只有日期。Django 讀取時視為 UTC 午夜，但 SQLite 的時區函式無法處理；
+    其他資料庫的欄位轉換已產生完整的時間戳，回傳空的 queryset。
+    """
+    if connections[queryset.db].vendor != 'sqlite':
+        return queryset.none()
+    return queryset.annotate(
+        raw_length=Length(Cast(field, output_field=models.TextField()))
+    ).filter(raw_length=10)
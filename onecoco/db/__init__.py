@@ -0,0 +1 @@
+"""自訂的資料庫後端（settings.DATABASES 的 ENGINE）"""
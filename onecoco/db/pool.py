@@ -0,0 +1,216 @@
+"""
+執行緒共用、有上限的資料庫連線池
+
+每個 gunicorn worker（行程）各有一個連線池，同一個 worker 內的執行緒共用：
+請求第一次查詢時借出連線，請求結束時（CONN_MAX_AGE=0）歸還，
+因此同時開啟的連線數最多為 worker 數 × max_size，與執行緒數無關。
+連線都被借出時依先後順序排隊，最多等待 timeout 秒，逾時則拋出 PoolTimeout。
+
+連線池依行程 ID 區分：gunicorn 預先載入後 fork 出的 worker 不會沿用主行程的連線。
+"""
+
+import collections
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger('onecoco.db')
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    """等待可用連線逾時"""
+
+
+class _Entry:
+    __slots__ = ('connection', 'created', 'last_used')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created = self.last_used = time.monotonic()
+
+
+class _Waiter:
+    """排隊等待連線的執行緒：歸還的連線或空出的名額依先後順序直接交給等待者"""
+    __slots__ = ('condition', 'entry', 'slot')
+
+    def __init__(self, lock):
+        self.condition = threading.Condition(lock)
+        self.entry = None
+        self.slot = False
+
+
+class ConnectionPool:
+    """
+    有上限的連線池
+
+    close(connection) 關閉連線；check(connection) 回傳連線是否仍可用，
+    閒置超過 check_after 秒的連線借出前會先檢查。
+    """
+
+    def __init__(self, name, close, check, max_size=4, timeout=10, max_lifetime=1800, max_idle=300, check_after=30):
+        self.name = name
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.check_after = check_after
+        self._close = close
+        self._check = check
+        self._lock = threading.Lock()
+        self._idle = []
+        self._waiters = collections.deque()
+        self._checked_out = {}
+        self._size = 0
+        self._counters = dict.fromkeys(
+            ('requests', 'waits', 'timeouts', 'opened', 'closed', 'peak_in_use'), 0
+        )
+        self._wait_time = 0.0
+
+    def getconn(self, connect):
+        """借出一條連線；沒有閒置連線且未達上限時以 connect() 開啟新連線"""
+        with self._lock:
+            self._counters['requests'] += 1
+            entry = self._take_idle()
+            if entry is None:
+                if self._size < self.max_size:
+                    # 先保留名額，在鎖外開啟連線
+                    self._size += 1
+                else:
+                    entry = self._wait()
+
+        if entry is not None and time.monotonic() - entry.last_used > self.check_after and not self._check(entry.connection):
+            # 名額保留給下面新開的連線
+            self._close(entry.connection)
+            entry = None
+            with self._lock:
+                self._counters['closed'] += 1
+        if entry is None:
+            try:
+                entry = _Entry(connect())
+            except Exception:
+                self._release_slot()
+                raise
+            with self._lock:
+                self._counters['opened'] += 1
+
+        with self._lock:
+            self._checked_out[id(entry.connection)] = entry
+            self._counters['peak_in_use'] = max(self._counters['peak_in_use'], len(self._checked_out))
+        return entry.connection
+
+    def _wait(self):
+        """排隊等待歸還的連線（回傳 _Entry）或空出的名額（回傳 None）；呼叫時需持有鎖"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waiter = _Waiter(self._lock)
+        self._waiters.append(waiter)
+        self._counters['waits'] += 1
+        try:
+            while waiter.entry is None and not waiter.slot:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiters.remove(waiter)
+                    self._counters['timeouts'] += 1
+                    logger.warning('連線池 %s 等待 %s 秒仍沒有可用連線（上限 %d）', self.name, self.timeout, self.max_size)
+                    raise PoolTimeout(f'連線池 {self.name} 的 {self.max_size} 條連線都在使用中')
+                waiter.condition.wait(remaining)
+        finally:
+            self._wait_time += time.monotonic() - started
+        return waiter.entry
+
+    def putconn(self, connection, reusable=True):
+        """歸還連線；無法再使用或已超過 max_lifetime 的連線直接關閉"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._checked_out.pop(id(connection), None)
+            if entry is None:
+                return
+            if reusable and now - entry.created < self.max_lifetime:
+                entry.last_used = now
+                if self._waiters:
+                    waiter = self._waiters.popleft()
+                    waiter.entry = entry
+                    waiter.condition.notify()
+                else:
+                    self._idle.append(entry)
+                return
+            self._counters['closed'] += 1
+        try:
+            self._close(connection)
+        finally:
+            self._release_slot()
+
+    def _release_slot(self):
+        """連線關閉或開啟失敗後空出名額，有人排隊時直接交給第一位"""
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.slot = True
+                waiter.condition.notify()
+            else:
+                self._size -= 1
+
+    def _take_idle(self):
+        """取出最近使用過的閒置連線，順便關閉閒置過久的連線（呼叫時需持有鎖）"""
+        now = time.monotonic()
+        expired = [
+            entry for entry in self._idle
+            if now - entry.last_used > self.max_idle or now - entry.created > self.max_lifetime
+        ]
+        for entry in expired:
+            self._idle.remove(entry)
+            self._size -= 1
+            self._counters['closed'] += 1
+            self._close(entry.connection)
+        return self._idle.pop() if self._idle else None
+
+    def close_all(self):
+        """關閉所有閒置連線"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._counters['closed'] += len(idle)
+        for entry in idle:
+            self._close(entry.connection)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': len(self._checked_out),
+                **self._counters,
+                'wait_ms': round(self._wait_time * 1000, 2),
+            }
+
+
+def get_pool(key, factory):
+    """取得目前行程中 key 對應的連線池，不存在時以 factory() 建立"""
+    key = (os.getpid(), key)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = factory()
+        return pool
+
+
+def _current_pools():
+    pid = os.getpid()
+    with _pools_lock:
+        return [pool for (owner, _), pool in _pools.items() if owner == pid]
+
+
+def stats():
+    """目前行程中所有連線池的統計"""
+    return {pool.name: pool.stats() for pool in _current_pools()}
+
+
+def close_all():
+    """關閉目前行程中所有連線池的閒置連線"""
+    for pool in _current_pools():
+        pool.close_all()
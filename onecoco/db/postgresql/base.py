@@ -0,0 +1,95 @@
+"""
+PostgreSQL 連線池後端（ENGINE = 'onecoco.db.postgresql'）
+
+Django 4.2 內建的 PostgreSQL 後端每個執行緒各自開啟連線，gunicorn 的 worker 與
+執行緒一多，很快就會用完雲端資料庫方案的連線上限。此後端改向 onecoco.db.pool
+借用連線：Django 關閉連線時歸還給連線池，由同一個 worker 的執行緒共用。
+
+OPTIONS['pool'] 為連線池設定（max_size、timeout、max_lifetime、max_idle、
+check_after，見 ConnectionPool），其餘 OPTIONS 與內建後端相同。
+需搭配 CONN_MAX_AGE=0，每個請求結束時歸還連線。
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+
+from onecoco.db import pool
+
+# connection.info.transaction_status 的值（psycopg2 與 psycopg 3 相同）
+TRANSACTION_STATUS_IDLE = 0
+TRANSACTION_STATUS_UNKNOWN = 4
+
+
+def _close_connection(connection):
+    try:
+        connection.close()
+    except base.Database.Error:
+        pass
+
+
+def _check_connection(connection):
+    if connection.closed:
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except base.Database.Error:
+        return False
+    return True
+
+
+def _reset_connection(connection):
+    """歸還前回復未結束的交易；回傳連線是否還能給下一個請求使用"""
+    if connection.closed:
+        return False
+    status = connection.info.transaction_status
+    if status == TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if status != TRANSACTION_STATUS_IDLE:
+        try:
+            connection.rollback()
+        except base.Database.Error:
+            return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, settings_dict, *args, **kwargs):
+        super().__init__(settings_dict, *args, **kwargs)
+        if settings_dict.get('CONN_MAX_AGE'):
+            raise ImproperlyConfigured('使用連線池時 CONN_MAX_AGE 必須為 0，請求結束時才會歸還連線')
+        self.pool_options = settings_dict.get('OPTIONS', {}).get('pool') or {}
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    @property
+    def pool(self):
+        conn_params = self.get_connection_params()
+        key = (self.alias, tuple(sorted((name, repr(value)) for name, value in conn_params.items())))
+        return pool.get_pool(key, lambda: pool.ConnectionPool(
+            f"{self.alias}:{conn_params.get('dbname') or conn_params.get('service', '')}",
+            close=_close_connection,
+            check=_check_connection,
+            **self.pool_options,
+        ))
+
+    def get_new_connection(self, conn_params):
+        try:
+            connection = self.pool.getconn(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        except pool.PoolTimeout as e:
+            raise self.Database.OperationalError(str(e)) from e
+        # 沿用的連線沒有經過內建後端的 get_new_connection，這裡補上相同的設定值
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        self.isolation_level = (
+            base.IsolationLevel.READ_COMMITTED if isolation_level is None
+            else base.IsolationLevel(isolation_level)
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            self.pool.putconn(self.connection, reusable=_reset_connection(self.connection))
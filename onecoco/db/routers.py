@@ -0,0 +1,115 @@
+"""
+唯讀副本的資料庫路由（settings.DATABASE_ROUTERS）
+
+只有明確標示的讀取才會使用副本：儀表板頁面（use_replica）、CSV 匯出與報表計算
+（replica_reads），且只限帳本與報表的模型；登入工作階段、使用者等其他讀取與
+所有寫入一律使用主資料庫。
+
+副本的資料會稍微落後，以下情況改讀主資料庫：
+- 同一個請求（或 replica_reads 區塊）中已經寫入過資料
+- 範圍（店面）在 DB_REPLICA_STICKY_SECONDS 秒內有資料異動（onecoco.cache.recently_written），
+  例如新增營業額後重新導向回銷售管理頁面。這也避免儀表板快取存入副本上的舊資料。
+- 快取不由各 worker 共用（locmem）時，其他 worker 的寫入無從得知，一律讀主資料庫
+  （settings 也會拒絕 DB_REPLICA_HOST 搭配 CACHE_BACKEND=locmem）
+"""
+
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from onecoco import cache
+
+REPLICA_DB_ALIAS = 'replica'
+
+# 可以從副本讀取的 app（帳本與報表）
+REPLICA_APPS = {'sales', 'costs', 'expenses', 'reports'}
+
+_state = contextvars.ContextVar('replica_state', default=None)
+
+
+class ReplicaState:
+    """目前區塊是否可讀副本；寫入後改讀主資料庫直到區塊結束"""
+
+    def __init__(self, allowed):
+        self.allowed = allowed
+        self.wrote = False
+
+
+def _replica_allowed(scopes):
+    return (
+        REPLICA_DB_ALIAS in settings.DATABASES
+        and cache.is_shared()
+        and not cache.recently_written(*scopes)
+    )
+
+
+@contextmanager
+def _activate(allowed):
+    token = _state.set(ReplicaState(allowed))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+def replica_reads(*scopes):
+    """區塊中的帳本與報表讀取改用副本；任一範圍最近有異動時仍讀主資料庫"""
+    return _activate(_replica_allowed(scopes))
+
+
+def use_replica(get_scope):
+    """
+    頁面的唯讀查詢改用副本的裝飾器（同步與非同步頁面皆可）
+
+    get_scope(request) 回傳頁面資料所屬的快取範圍，與 conditional_page 相同。
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                allowed = await sync_to_async(lambda: _replica_allowed([get_scope(request)]))()
+                with _activate(allowed):
+                    return await view(request, *args, **kwargs)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            with replica_reads(get_scope(request)):
+                return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ReplicaRouter:
+    """replica_reads 區塊中的帳本與報表讀取使用副本，其餘使用主資料庫"""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.allowed or state.wrote:
+            return None
+        if model._meta.app_label not in REPLICA_APPS:
+            return None
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        # 從副本讀出的物件儲存時也要寫回主資料庫
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # 副本的結構由主資料庫複寫而來
+        if db == REPLICA_DB_ALIAS:
+            return False
+        return None
@@ -0,0 +1,102 @@
+"""
+SQLite 正式模式的資料庫後端（ENGINE = 'onecoco.db.sqlite3'）
+
+多個 gunicorn worker 同時寫入同一個 db.sqlite3 時，Django 內建後端容易出現
+「database is locked」：
+
+- 交易以 BEGIN（DEFERRED）開始，先讀後寫的交易要升級成寫入鎖時若有其他寫入者，
+  SQLite 會直接回傳 SQLITE_BUSY，不會等待 busy_timeout
+- 預設的日誌模式下，寫入時讀取者也會被擋住
+
+此後端在每個新連線執行 OPTIONS['init_command'] 中的 PRAGMA（WAL、synchronous、
+mmap_size、cache_size、busy_timeout 等），交易改以 OPTIONS['transaction_mode']
+（例如 IMMEDIATE）開始，一開始就取得寫入鎖並在 busy_timeout 內排隊等待。
+等待逾時時，尚未進入交易的語句（包含 BEGIN IMMEDIATE 本身）會以遞增的間隔
+重試 OPTIONS['lock_retries'] 次；交易中的語句不重試，錯誤照常拋出並回復交易。
+
+OPTIONS 的名稱與 Django 5.1 起內建 SQLite 後端的 init_command、transaction_mode 相同。
+"""
+
+import logging
+import random
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+logger = logging.getLogger('onecoco.db')
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+# 重試間隔：第 n 次等待 RETRY_DELAY × 2^(n-1) 秒（最多 MAX_RETRY_DELAY），再乘上 0.5～1.5 的隨機量
+RETRY_DELAY = 0.05
+MAX_RETRY_DELAY = 1.0
+
+
+def is_locked_error(error):
+    return 'database is locked' in str(error) or 'database table is locked' in str(error)
+
+
+class RetryingCursorWrapper(base.SQLiteCursorWrapper):
+    """資料庫被鎖定時，重試交易外的語句"""
+
+    lock_retries = 0
+
+    def execute(self, query, params=None):
+        return self._retry(super().execute, query, params)
+
+    def executemany(self, query, param_list):
+        # param_list 可能是產生器，重試前先轉成串列
+        return self._retry(super().executemany, query, list(param_list))
+
+    def _retry(self, method, *args):
+        attempt = 0
+        while True:
+            try:
+                return method(*args)
+            except base.Database.OperationalError as e:
+                # 交易中的語句失敗後需由呼叫端回復整個交易，不能只重送這一句
+                if self.connection.in_transaction or not is_locked_error(e) or attempt >= self.lock_retries:
+                    raise
+            attempt += 1
+            delay = min(RETRY_DELAY * 2 ** (attempt - 1), MAX_RETRY_DELAY) * random.uniform(0.5, 1.5)
+            logger.info('SQLite 資料庫被鎖定，%.0f 毫秒後重試（第 %d 次）', delay * 1000, attempt)
+            time.sleep(delay)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, settings_dict, *args, **kwargs):
+        super().__init__(settings_dict, *args, **kwargs)
+        options = settings_dict.get('OPTIONS', {})
+        self.init_command = options.get('init_command')
+        self.transaction_mode = (options.get('transaction_mode') or 'DEFERRED').upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"transaction_mode 必須是 {', '.join(TRANSACTION_MODES)} 之一，目前為 {self.transaction_mode}"
+            )
+        self.lock_retries = int(options.get('lock_retries', 0))
+        self.cursor_class = type(
+            'RetryingCursorWrapper', (RetryingCursorWrapper,), {'lock_retries': self.lock_retries}
+        )
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        # 以下選項由此後端處理，不能傳給 sqlite3.connect()
+        for name in ('init_command', 'transaction_mode', 'lock_retries'):
+            kwargs.pop(name, None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        if self.init_command:
+            for statement in self.init_command.split(';'):
+                if statement.strip():
+                    conn.execute(statement)
+        return conn
+
+    def create_cursor(self, name=None):
+        return self.connection.cursor(factory=self.cursor_class)
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
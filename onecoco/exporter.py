@@ -0,0 +1,107 @@
+"""
+銷售、成本、支出的 CSV 串流匯出
+
+以 values_list().iterator() 分批讀取資料並逐列產生 CSV，交給
+StreamingHttpResponse 直接送出，不論匯出多少筆，記憶體用量都固定。
+欄位名稱與 onecoco.importer 相同，匯出的檔案可直接再匯入。
+已歸檔的月份（reports.archive）依日期合併在帳本資料之間。
+"""
+
+import csv
+import heapq
+from datetime import datetime, time, timedelta
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from onecoco.importer import LEDGERS, ledger_model
+
+# 匯入欄位之外，另附上店面與記錄人員
+EXTRA_COLUMNS = ['store_id', 'recorded_by__username']
+
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """只把寫入的內容原樣回傳的虛擬檔案，讓 csv.writer 逐列產生字串"""
+
+    def write(self, value):
+        return value
+
+
+def export_columns(ledger):
+    return LEDGERS[ledger]['fields'] + EXTRA_COLUMNS
+
+
+def filter_ledger(queryset, store_id=None, start_date=None, end_date=None):
+    """依店面與當地日期區間（含起訖日）篩選帳本資料"""
+    if store_id:
+        queryset = queryset.filter(store_id=store_id)
+    if start_date:
+        queryset = queryset.filter(
+            date__gte=timezone.make_aware(datetime.combine(start_date, time.min))
+        )
+    if end_date:
+        queryset = queryset.filter(
+            date__lt=timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+        )
+    return queryset
+
+
+def _format(value):
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if value is None:
+        return ''
+    return value
+
+
+def iter_csv(queryset, ledger, chunk_size=CHUNK_SIZE, archived=None):
+    """
+    逐列產生 CSV 內容（含 UTF-8 BOM，方便以 Excel 開啟）
+
+    archived 為條件相同的 reports.archive.ArchiveQuery 時，依日期合併已歸檔的資料。
+    """
+    columns = export_columns(ledger)
+    writer = csv.writer(Echo())
+    yield '\ufeff' + writer.writerow(columns)
+    # 最後附上 id，與歸檔資料合併時依 (date, id) 排序
+    rows = queryset.order_by('date', 'id').values_list(*columns, 'id').iterator(chunk_size=chunk_size)
+    if archived is not None:
+        date_index = columns.index('date')
+        rows = heapq.merge(rows, archived.iter_values(*columns, 'id'), key=lambda row: (row[date_index], row[-1]))
+    for row in rows:
+        yield writer.writerow([_format(value) for value in row[:-1]])
+
+
+def export_response(queryset, ledger, filename, archived=None):
+    """以 StreamingHttpResponse 匯出 CSV"""
+    response = StreamingHttpResponse(
+        iter_csv(queryset, ledger, archived=archived), content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_filename(ledger, store_id=None, start_date=None, end_date=None):
+    parts = [ledger, store_id or 'all']
+    if start_date or end_date:
+        parts.append(f"{start_date or ''}_{end_date or ''}")
+    return '-'.join(parts) + '.csv'
+
+
+def export_ledger(ledger, store_id=None, start_date=None, end_date=None):
+    """匯出指定帳本、店面與日期區間的資料（包含已歸檔的月份）"""
+    from reports.archive import ArchiveQuery
+
+    model = ledger_model(ledger)
+    queryset = filter_ledger(model.objects.all(), store_id, start_date, end_date)
+    archived = filter_ledger(ArchiveQuery(model), store_id, start_date, end_date)
+    # 串流時頁面已經返回，先依目前的資料庫路由（例如唯讀副本）固定讀取的資料庫
+    queryset = queryset.using(queryset.db)
+    archived = archived.using(archived.periods().db)
+    return export_response(
+        queryset, ledger, export_filename(ledger, store_id, start_date, end_date), archived=archived,
+    )
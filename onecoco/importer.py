@@ -0,0 +1,191 @@
+"""
+銷售、成本、支出的 CSV 批次匯入
+
+以串流方式逐列讀取 CSV，記憶體用量只與批次大小有關：每累積 chunk_size 筆
+有效資料就在一個交易內 bulk_create 並同步更新每日彙總。記錄人員與店面在
+每個檔案只解析一次；無效的資料列不會中斷匯入，而是記錄在逐列錯誤報告中。
+"""
+
+import csv
+
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from reports import rollup
+
+# 各帳本可匯入的欄位；store_id 與 recorded_by 由整個檔案共用
+LEDGERS = {
+    'sales': {
+        'model': 'sales.Sale',
+        'fields': ['date', 'amount', 'category', 'description', 'notes'],
+        'defaults': {'description': '營業收入'},
+    },
+    'costs': {
+        'model': 'costs.Cost',
+        'fields': [
+            'date', 'amount', 'description', 'category', 'supplier',
+            'invoice_number', 'selling_price', 'notes',
+        ],
+        'defaults': {},
+    },
+    'expenses': {
+        'model': 'expenses.Expense',
+        'fields': ['date', 'amount', 'item_name', 'category', 'notes'],
+        'defaults': {},
+    },
+}
+
+DEFAULT_CHUNK_SIZE = 1000
+# 每批的資料都在記憶體中並以一次 bulk_create 寫入，批次不能無限大
+MAX_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportResult:
+    """匯入結果與逐列錯誤報告"""
+
+    def __init__(self, on_error=None, max_errors=MAX_REPORTED_ERRORS):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.on_error = on_error
+        self.max_errors = max_errors
+
+    def add_error(self, line, messages):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'errors': messages})
+        if self.on_error:
+            self.on_error(line, messages)
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def ledger_model(ledger):
+    return apps.get_model(LEDGERS[ledger]['model'])
+
+
+def _parse_row(model, spec, row):
+    """將一列 CSV 轉為模型欄位值；回傳 (values, errors)"""
+    values, errors = {}, {}
+    for name in spec['fields']:
+        field = model._meta.get_field(name)
+        raw = (row.get(name) or '').strip()
+        if not raw:
+            if name in spec['defaults']:
+                values[name] = spec['defaults'][name]
+            elif field.null:
+                values[name] = None
+            elif field.blank:
+                values[name] = field.get_default()
+            elif field.has_default():
+                values[name] = field.get_default()
+            else:
+                errors[name] = '此欄位為必填'
+            continue
+        try:
+            # clean() 依序執行 to_python、validate（含 choices）與 run_validators
+            value = field.clean(raw, None)
+        except ValidationError as e:
+            errors[name] = '；'.join(e.messages)
+            continue
+        if name == 'date':
+            # 只有日期時以當天中午記錄，與舊資料轉換規則一致
+            if len(raw) == 10:
+                value = value.replace(hour=12)
+            if timezone.is_naive(value):
+                value = timezone.make_aware(value)
+        values[name] = value
+    return values, errors
+
+
+def _existing_sale_keys(model, store_id, instances):
+    """Sale 有 (date, store_id) 唯一限制，一次查出本批與資料庫衝突的時間"""
+    dates = [instance.date for instance in instances]
+    return set(
+        model.objects.filter(store_id=store_id, date__in=dates).values_list('date', flat=True)
+    )
+
+
+def _flush(model, store_id, chunk, result):
+    """寫入一批資料；發生衝突時改為逐筆寫入以找出問題列"""
+    if not chunk:
+        return
+    if model._meta.label == 'sales.Sale':
+        existing = _existing_sale_keys(model, store_id, [instance for _, instance in chunk])
+        seen = set()
+        remaining = []
+        for line, instance in chunk:
+            if instance.date in existing or instance.date in seen:
+                result.add_error(line, {'date': '同店面同一時間已有銷售記錄'})
+            else:
+                seen.add(instance.date)
+                remaining.append((line, instance))
+        chunk = remaining
+
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create([instance for _, instance in chunk])
+            rollup.record_rows(model, [instance for _, instance in chunk])
+        result.created += len(chunk)
+    except IntegrityError:
+        for line, instance in chunk:
+            try:
+                with transaction.atomic():
+                    instance.pk = None
+                    instance.save()
+                result.created += 1
+            except IntegrityError as e:
+                result.add_error(line, {'__all__': str(e)})
+
+
+def parse_chunk_size(value, default=DEFAULT_CHUNK_SIZE):
+    """解析每批筆數，限制在 1 到 MAX_CHUNK_SIZE 之間"""
+    try:
+        return max(1, min(int(value), MAX_CHUNK_SIZE))
+    except (TypeError, ValueError):
+        return default
+
+
+def import_csv(stream, ledger, recorded_by, store_id=None,
+               chunk_size=DEFAULT_CHUNK_SIZE, on_error=None):
+    """
+    匯入 CSV 文字串流
+
+    stream 為文字模式的檔案物件（第一列為欄位名稱）；store_id 預設為記錄人員的店面。
+    on_error(line, errors) 會在每個錯誤發生時呼叫，可用來即時輸出完整錯誤報告，
+    不受 ImportResult.errors 的筆數上限影響。
+    """
+    spec = LEDGERS[ledger]
+    model = ledger_model(ledger)
+    store_id = store_id or recorded_by.store_id
+    result = ImportResult(on_error)
+
+    reader = csv.DictReader(stream)
+    missing = {'date', 'amount'} - set(reader.fieldnames or [])
+    if missing:
+        result.add_error(1, {'__all__': f"缺少必要欄位：{', '.join(sorted(missing))}"})
+        return result
+
+    chunk = []
+    for row in reader:
+        line = reader.line_num
+        values, errors = _parse_row(model, spec, row)
+        if errors:
+            result.add_error(line, errors)
+            continue
+        chunk.append((line, model(store_id=store_id, recorded_by=recorded_by, **values)))
+        if len(chunk) >= chunk_size:
+            _flush(model, store_id, chunk, result)
+            chunk = []
+
+    _flush(model, store_id, chunk, result)
+    return result
@@ -0,0 +1,242 @@
+"""
+每個請求的 SQL 與時間統計
+
+設定 REQUEST_TIMING=True 時，RequestTimingMiddleware 會記錄每個請求的
+視圖名稱、SQL 查詢數、資料庫總時間、最慢的查詢、模板渲染時間與總時間，
+以 Server-Timing 回應標頭及一行 JSON 日誌（logger 'onecoco.timing'）輸出。
+
+關閉時中介軟體在啟動時即以 MiddlewareNotUsed 移除，也不會安裝資料庫與
+模板的計時，請求處理完全沒有額外成本。
+
+統計存放在 ContextVar 中：非同步頁面經由 sync_to_async 在其他執行緒執行的
+查詢也會計入同一個請求。
+
+串流回應（例如 CSV 匯出）的查詢大多在送出內容時才執行，而標頭在內容之前就已送出，
+因此不加 Server-Timing 標頭；讀取內容時的查詢計入同一個請求，回應關閉後才輸出日誌，
+並加上 streaming 與 complete（用戶端中斷時為 false）欄位。
+"""
+
+import contextvars
+import json
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger('onecoco.timing')
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+# 日誌與標頭中最慢查詢的 SQL 最多保留的字元數
+SLOW_QUERY_SQL_LENGTH = 300
+
+
+class RequestMetrics:
+    """單一請求的統計"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_sql = None
+        self.template_time = 0.0
+        self._lock = threading.Lock()
+
+    def add_query(self, sql, duration):
+        with self._lock:
+            self.queries += 1
+            self.db_time += duration
+            if duration > self.slowest_time:
+                self.slowest_time = duration
+                self.slowest_sql = sql
+
+    def add_template(self, duration):
+        with self._lock:
+            self.template_time += duration
+
+    def as_dict(self, request, response):
+        return {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'view': self.view,
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'slowest_query_ms': round(self.slowest_time * 1000, 2),
+            'slowest_query': (self.slowest_sql or '')[:SLOW_QUERY_SQL_LENGTH] or None,
+            'template_ms': round(self.template_time * 1000, 2),
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 2),
+        }
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - started)
+
+
+def _install_query_timer(connection, **kwargs):
+    # 重新連線時 connection_created 會再次觸發，避免重複加入
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class TimedTemplate(Template):
+    """記錄渲染時間的模板（只計算最外層，{% include %} 已包含在內）"""
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.add_template(time.perf_counter() - started)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """REQUEST_TIMING=True 時使用的模板後端"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class _StreamContent:
+    """串流回應的內容：逐塊讀取時計入請求的統計，回應關閉時呼叫 on_close(是否讀完)"""
+
+    def __init__(self, iterator, metrics, on_close):
+        self._iterator = iterator
+        self._metrics = metrics
+        self._on_close = on_close
+        self.finished = False
+
+    def close(self):
+        # HttpResponse.close() 會呼叫內容的 close()，確保只記錄一次
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            on_close(self.finished)
+
+
+class _TimedStream(_StreamContent):
+    def __init__(self, content, metrics, on_close):
+        super().__init__(iter(content), metrics, on_close)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        token = _current.set(self._metrics)
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            self.finished = True
+            raise
+        finally:
+            _current.reset(token)
+
+
+class _AsyncTimedStream(_StreamContent):
+    def __init__(self, content, metrics, on_close):
+        super().__init__(aiter(content), metrics, on_close)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        token = _current.set(self._metrics)
+        try:
+            return await anext(self._iterator)
+        except StopAsyncIteration:
+            self.finished = True
+            raise
+        finally:
+            _current.reset(token)
+
+
+def _view_name(view_func):
+    view = getattr(view_func, 'view_class', view_func)
+    return f'{view.__module__}.{view.__qualname__}'
+
+
+class RequestTimingMiddleware:
+    """記錄每個請求的 SQL 與時間，輸出 Server-Timing 標頭與 JSON 日誌"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_TIMING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(_install_query_timer, dispatch_uid='request_timing_query_timer')
+        for connection in connections.all():
+            _install_query_timer(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.view = _view_name(view_func)
+
+    def finish(self, request, response, metrics):
+        if response.streaming:
+            def log(finished):
+                data = metrics.as_dict(request, response)
+                data.update(streaming=True, complete=finished)
+                logger.info(json.dumps(data, ensure_ascii=False))
+
+            stream = _AsyncTimedStream if response.is_async else _TimedStream
+            response.streaming_content = stream(response.streaming_content, metrics, log)
+            return response
+
+        data = metrics.as_dict(request, response)
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={data["db_ms"]};desc="{data["queries"]} queries"',
+            f'slowest-query;dur={data["slowest_query_ms"]}',
+            f'tpl;dur={data["template_ms"]}',
+            f'total;dur={data["total_ms"]}',
+        ])
+        logger.info(json.dumps(data, ensure_ascii=False))
+        return response
@@ -0,0 +1,107 @@
+"""
+帳本資料的 keyset（seek）分頁
+
+銷售、成本、支出都依 (date, created_at, id) 由新到舊排序。游標記錄上一頁
+最後一筆的這三個值，下一頁只需 WHERE (date, created_at, id) < 游標 並讀取
+page_size + 1 筆，不論翻到多深都不需要 OFFSET 或 COUNT(*)。
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+KEYSET_ORDERING = ('-date', '-created_at', '-id')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class KeysetPage:
+    """一頁 keyset 分頁結果"""
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _sort_key(obj):
+    return obj.date, obj.created_at, obj.pk
+
+
+def encode_cursor(obj):
+    """將資料列的排序鍵編碼為 URL 安全的游標"""
+    payload = json.dumps([obj.date.isoformat(), obj.created_at.isoformat(), obj.pk])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """解析游標，格式錯誤時回傳 None"""
+    if not token:
+        return None
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        date_value, created_at, pk = json.loads(payload)
+        return datetime.fromisoformat(date_value), datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError, binascii.Error):
+        return None
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE):
+    """解析每頁筆數，限制在 1 到 MAX_PAGE_SIZE 之間"""
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return default
+
+
+def seek_before(queryset, cursor):
+    """篩選排序在游標之後（較舊）的資料"""
+    date, created_at, pk = cursor
+    return queryset.filter(
+        Q(date__lt=date)
+        | Q(date=date, created_at__lt=created_at)
+        | Q(date=date, created_at=created_at, pk__lt=pk)
+    )
+
+
+def on_or_before(queryset, day):
+    """跳到指定日期：只保留當地時間該日（含）以前的資料"""
+    next_day = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return queryset.filter(date__lt=next_day)
+
+
+def keyset_page(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE, archived=None):
+    """
+    取得一頁資料；cursor 為 decode_cursor() 的結果或 None（第一頁）
+
+    archived 為條件相同的 reports.archive.ArchiveQuery 時，一併讀取已歸檔的資料；
+    這一頁的資料都比歸檔月份新時，只多一次歸檔月份的查詢，不需解壓縮。
+    """
+    queryset = queryset.order_by(*KEYSET_ORDERING)
+    if cursor:
+        queryset = seek_before(queryset, cursor)
+    rows = list(queryset[:page_size + 1])
+    if archived is not None:
+        floor = _sort_key(rows[-1]) if len(rows) > page_size else None
+        rows = sorted(
+            rows + archived.keyset_rows(cursor, page_size + 1, floor),
+            key=_sort_key,
+            reverse=True,
+        )[:page_size + 1]
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return KeysetPage(rows, encode_cursor(rows[-1]))
+    return KeysetPage(rows, None)
@@ -6,6 +6,8 @@ import os
 from pathlib import Path
 from datetime import timedelta
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -38,7 +40,11 @@ INSTALLED_APPS = [
     'reports',
 ]
 
+# 每個請求的 SQL 與時間統計（Server-Timing 標頭與 onecoco.timing 日誌），關閉時沒有額外成本
+REQUEST_TIMING = os.environ.get('REQUEST_TIMING', 'False') == 'True'
+
 MIDDLEWARE = [
+    'onecoco.instrumentation.RequestTimingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -53,7 +59,10 @@ ROOT_URLCONF = 'onecoco.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': (
+            'onecoco.instrumentation.TimedDjangoTemplates' if REQUEST_TIMING
+            else 'django.template.backends.django.DjangoTemplates'
+        ),
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -84,6 +93,119 @@ DATABASES = {
     }
 }
 
+# SQLite 正式模式（預設 DEBUG=False 時開啟）：多個 worker 同時寫入時不再出現「database is locked」
+# - WAL：讀取與寫入互不阻擋；synchronous=NORMAL 在 WAL 下不會損毀資料，只有斷電時可能遺失最後幾筆交易
+# - 交易以 BEGIN IMMEDIATE 開始，寫入者在 busy_timeout 內排隊；逾時後交易外的語句再重試 SQLITE_LOCK_RETRIES 次
+SQLITE_PRODUCTION = os.environ.get('SQLITE_PRODUCTION', str(not DEBUG)) == 'True'
+SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', '5000'))  # 毫秒
+
+if SQLITE_PRODUCTION and DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['ENGINE'] = 'onecoco.db.sqlite3'
+    DATABASES['default']['OPTIONS'] = {
+        'init_command': ';'.join([
+            'PRAGMA journal_mode=WAL',
+            'PRAGMA synchronous=NORMAL',
+            f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT}',
+            'PRAGMA mmap_size=268435456',  # 256 MB
+            'PRAGMA cache_size=-32768',  # 32 MB（負數代表 KB）
+            'PRAGMA temp_store=MEMORY',
+        ]),
+        'transaction_mode': 'IMMEDIATE',
+        'lock_retries': int(os.environ.get('SQLITE_LOCK_RETRIES', '5')),
+    }
+
+# 超過幾個月的帳本資料由 archive_ledgers 指令壓縮歸檔（見 reports/archive.py）
+LEDGER_ARCHIVE_MONTHS = int(os.environ.get('LEDGER_ARCHIVE_MONTHS', '24'))
+
+# 唯讀副本（可選）：設定 DB_REPLICA_HOST 後，儀表板、匯出與報表計算的帳本讀取改用副本
+# 其餘 DB_REPLICA_* 未設定時沿用主資料庫的值；店面有異動後 DB_REPLICA_STICKY_SECONDS 秒內仍讀主資料庫
+DB_REPLICA_HOST = os.environ.get('DB_REPLICA_HOST', '')
+
+if DB_REPLICA_HOST and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': DB_REPLICA_HOST,
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        # 測試時副本指向主資料庫
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['onecoco.db.routers.ReplicaRouter']
+
+DB_REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', '5')) if 'replica' in DATABASES else 0
+
+# 持續連線：每個 worker 重複使用資料庫連線，不必每個請求重新建立（PostgreSQL 的連線與驗證）
+# 每個請求開始時先檢查連線是否仍可用，資料庫重新啟動後會自動重新連線
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', '60'))
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+    database['CONN_HEALTH_CHECKS'] = True
+
+# PostgreSQL 連線池（可選）：同一個 worker 的執行緒共用最多 DB_POOL_MAX_SIZE 條連線，
+# 整個服務最多開啟 worker 數 × DB_POOL_MAX_SIZE 條，適合連線數上限較低的雲端資料庫方案
+DB_POOL = os.environ.get('DB_POOL', 'False') == 'True'
+
+if DB_POOL:
+    for database in DATABASES.values():
+        if database['ENGINE'] == 'django.db.backends.postgresql':
+            database['ENGINE'] = 'onecoco.db.postgresql'
+            database['OPTIONS'] = {
+                'pool': {
+                    'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '4')),
+                    'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),  # 等待可用連線的秒數
+                    'max_lifetime': int(os.environ.get('DB_POOL_MAX_LIFETIME', '1800')),
+                    'max_idle': int(os.environ.get('DB_POOL_MAX_IDLE', '300')),
+                },
+            }
+            # 每個請求結束時把連線歸還連線池
+            database['CONN_MAX_AGE'] = 0
+
+# Cache
+# CACHE_BACKEND: locmem（開發預設，單一行程）、file（DEBUG=False 時的預設，同機多個 worker 共用）、redis（多台機器共用）
+# 快取版本號決定儀表板快取、ETag 與副本讀取是否失效，多個 worker 必須共用同一個快取
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem' if DEBUG else 'file')
+
+if CACHE_BACKEND == 'locmem' and int(os.environ.get('WEB_CONCURRENCY', '1')) > 1:
+    raise ImproperlyConfigured('CACHE_BACKEND=locmem 只能用於單一 worker；WEB_CONCURRENCY 大於 1 時請改用 file 或 redis')
+
+if CACHE_BACKEND == 'redis':
+    # 需另外安裝 redis 套件：pip install redis
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+            'KEY_PREFIX': 'onecoco',
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', os.path.join(BASE_DIR, '.cache')),
+            'KEY_PREFIX': 'onecoco',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'onecoco',
+            'KEY_PREFIX': 'onecoco',
+        }
+    }
+
+# 副本的讀取黏著（店面剛有異動時改讀主資料庫）記錄在快取中，各 worker 必須看得到彼此的寫入
+if 'replica' in DATABASES and CACHE_BACKEND == 'locmem':
+    raise ImproperlyConfigured('設定 DB_REPLICA_HOST 時需要共用的快取後端（CACHE_BACKEND=file 或 redis）')
+
+# 儀表板統計的快取秒數；資料異動時會透過版本號立即失效
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', '3600'))
+
+# 以 ASGI 執行時改用非同步的銷售管理與利潤分析頁面，同時執行各項獨立查詢
+ASYNC_DASHBOARD = os.environ.get('ASYNC_DASHBOARD', 'False') == 'True'
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -113,6 +235,27 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
 
+# 正式環境（預設 DEBUG=False 時）collectstatic 會縮減 CSS/JS、加上內容雜湊並預先產生 gzip/brotli
+STATIC_BUNDLES = os.environ.get('STATIC_BUNDLES', str(not DEBUG)) == 'True'
+
+# 正式環境由 WSGI／ASGI application 直接送出 STATIC_ROOT 的檔案（見 onecoco/static_serving.py），不需另外架設網頁伺服器
+STATIC_SERVING = os.environ.get('STATIC_SERVING', str(not DEBUG)) == 'True'
+# 未加上內容雜湊的靜態檔案快取秒數（雜湊檔名一律快取一年）
+STATIC_MAX_AGE = int(os.environ.get('STATIC_MAX_AGE', '60'))
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'onecoco.assets.CompressedManifestStaticFilesStorage'
+            if STATIC_BUNDLES else
+            'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -163,6 +306,14 @@ LOGGING = {
         'handlers': ['console'],
         'level': 'INFO',
     },
+    'loggers': {
+        # REQUEST_TIMING 的每請求 JSON 統計
+        'onecoco.timing': {
+            'handlers': ['console'],
+            'level': os.environ.get('REQUEST_TIMING_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
 }
 
 # Production settings
@@ -0,0 +1,231 @@
+"""
+正式環境的靜態檔案服務
+
+StaticFilesApp 包在 WSGI application 外層（ASGI 使用 ASGIStaticFilesApp），STATIC_URL 下的請求直接由
+collectstatic 的輸出（STATIC_ROOT）回應，不經過 Django 的中介軟體與 URL 解析，
+也不需要另外架設 nginx：
+
+- 啟動時掃描 STATIC_ROOT 建立檔案索引，只會送出索引中的檔案
+- 依 Accept-Encoding 送出預先壓縮的 .br／.gz（見 onecoco.assets），並加上 Vary
+- manifest 中加上內容雜湊的檔名回應 Cache-Control: immutable 並快取一年，
+  其他檔案只快取 STATIC_MAX_AGE 秒
+- 每個壓縮版本各有 ETag，支援 If-None-Match 與 If-Modified-Since 回傳 304
+
+重新執行 collectstatic 後需重新啟動伺服器（部署時本來就會重新啟動）。
+"""
+
+import json
+import logging
+import mimetypes
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from wsgiref.headers import Headers
+
+from asgiref.sync import sync_to_async
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# 依偏好順序排列：(Accept-Encoding 名稱, 副檔名)
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+CHUNK_SIZE = 64 * 1024
+
+
+class StaticFile:
+    """索引中的單一檔案與其壓縮版本"""
+
+    def __init__(self, path, content_type, immutable):
+        self.content_type = content_type
+        self.immutable = immutable
+        self.variants = {None: self._stat(path)}
+        for encoding, suffix in ENCODINGS:
+            if os.path.isfile(path + suffix):
+                self.variants[encoding] = self._stat(path + suffix)
+
+    @staticmethod
+    def _stat(path):
+        stat = os.stat(path)
+        return {
+            'path': path,
+            'size': stat.st_size,
+            'mtime': int(stat.st_mtime),
+            'etag': f'"{int(stat.st_mtime):x}-{stat.st_size:x}"',
+        }
+
+    def choose(self, accept_encoding):
+        """依 Accept-Encoding 選擇要送出的版本"""
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding, _ in ENCODINGS:
+            if encoding in self.variants and encoding in accepted:
+                return encoding, self.variants[encoding]
+        return None, self.variants[None]
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        quality = params.strip().replace(' ', '')
+        if quality in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        if name:
+            accepted.add(name.lower())
+    return accepted
+
+
+def _hashed_names(root):
+    """manifest（staticfiles.json）中加上內容雜湊的檔名"""
+    try:
+        with open(os.path.join(root, 'staticfiles.json'), encoding='utf-8') as f:
+            return set(json.load(f).get('paths', {}).values())
+    except (OSError, ValueError):
+        return set()
+
+
+def build_index(root):
+    """掃描 root，回傳 {相對路徑: StaticFile}"""
+    hashed = _hashed_names(root)
+    compressed_suffixes = tuple(suffix for _, suffix in ENCODINGS)
+    index = {}
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(compressed_suffixes) or filename == 'staticfiles.json':
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            content_type, _ = mimetypes.guess_type(filename)
+            content_type = content_type or 'application/octet-stream'
+            if content_type.startswith('text/') or content_type in ('application/javascript', 'image/svg+xml', 'application/json'):
+                content_type += '; charset=utf-8'
+            index[name] = StaticFile(path, content_type, name in hashed)
+    return index
+
+
+class StaticFilesApp:
+    """在 WSGI application 前直接回應靜態檔案"""
+
+    def __init__(self, application, root=None, prefix=None, max_age=None):
+        from django.conf import settings
+
+        self.application = application
+        self.root = root or settings.STATIC_ROOT
+        self.prefix = '/' + (prefix or settings.STATIC_URL).strip('/') + '/'
+        self.max_age = settings.STATIC_MAX_AGE if max_age is None else max_age
+        self.files = build_index(self.root) if os.path.isdir(self.root) else {}
+        if not self.files:
+            logger.warning('STATIC_ROOT（%s）沒有檔案，請先執行 collectstatic', self.root)
+
+    def find(self, path):
+        """STATIC_URL 下、索引中有的檔案，其他路徑回傳 None"""
+        if not path.startswith(self.prefix):
+            return None
+        return self.files.get(path[len(self.prefix):])
+
+    def respond(self, static_file, method, accept_encoding=None, if_none_match=None, if_modified_since=None):
+        """回傳 (狀態, 標頭列表, 要送出的檔案路徑或 None)"""
+        if method not in ('GET', 'HEAD'):
+            return '405 Method Not Allowed', [('Allow', 'GET, HEAD'), ('Content-Length', '0')], None
+
+        encoding, variant = static_file.choose(accept_encoding)
+        headers = Headers([])
+        headers['ETag'] = variant['etag']
+        headers['Last-Modified'] = formatdate(variant['mtime'], usegmt=True)
+        headers['Cache-Control'] = (
+            IMMUTABLE_CACHE_CONTROL if static_file.immutable else f'public, max-age={self.max_age}'
+        )
+        if len(static_file.variants) > 1:
+            headers['Vary'] = 'Accept-Encoding'
+
+        if self.not_modified(variant, if_none_match, if_modified_since):
+            return '304 Not Modified', headers.items(), None
+
+        headers['Content-Type'] = static_file.content_type
+        headers['Content-Length'] = str(variant['size'])
+        headers['X-Content-Type-Options'] = 'nosniff'
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        return '200 OK', headers.items(), None if method == 'HEAD' else variant['path']
+
+    def __call__(self, environ, start_response):
+        static_file = self.find(environ.get('PATH_INFO', ''))
+        if static_file is None:
+            return self.application(environ, start_response)
+
+        status, headers, path = self.respond(
+            static_file,
+            environ.get('REQUEST_METHOD', 'GET'),
+            environ.get('HTTP_ACCEPT_ENCODING'),
+            environ.get('HTTP_IF_NONE_MATCH'),
+            environ.get('HTTP_IF_MODIFIED_SINCE'),
+        )
+        start_response(status, headers)
+        if path is None:
+            return []
+        f = open(path, 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            return file_wrapper(f, CHUNK_SIZE)
+        return _iter_file(f)
+
+    @staticmethod
+    def not_modified(variant, if_none_match=None, if_modified_since=None):
+        if if_none_match is not None:
+            tags = {tag.strip() for tag in if_none_match.split(',')}
+            tags |= {tag[2:] for tag in tags if tag.startswith('W/')}
+            return variant['etag'] in tags or '*' in tags
+        if if_modified_since:
+            try:
+                return variant['mtime'] <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
+class ASGIStaticFilesApp(StaticFilesApp):
+    """StaticFilesApp 的 ASGI 版本，包在 onecoco/asgi.py 的 application 外層（uvicorn）"""
+
+    async def __call__(self, scope, receive, send):
+        static_file = self.find(scope['path']) if scope['type'] == 'http' else None
+        if static_file is None:
+            return await self.application(scope, receive, send)
+
+        request_headers = {
+            name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']
+        }
+        status, headers, path = self.respond(
+            static_file,
+            scope['method'],
+            request_headers.get('accept-encoding'),
+            request_headers.get('if-none-match'),
+            request_headers.get('if-modified-since'),
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': int(status.split()[0]),
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+        })
+        if path is None:
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        # 在執行緒中讀檔，不阻塞事件迴圈
+        f = await sync_to_async(open)(path, 'rb')
+        try:
+            while True:
+                chunk = await sync_to_async(f.read)(CHUNK_SIZE)
+                more_body = len(chunk) == CHUNK_SIZE
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': more_body})
+                if not more_body:
+                    break
+        finally:
+            f.close()
+
+
+def _iter_file(f):
+    with f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
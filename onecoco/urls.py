@@ -2,7 +2,10 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from . import views
+from . import async_views, views
+
+# 非同步版本見 onecoco/async_views.py
+dashboard_views = async_views if settings.ASYNC_DASHBOARD else views
 
 urlpatterns = [
     path('', views.home, name='home'),
@@ -11,7 +14,7 @@ urlpatterns = [
     path('register/', views.custom_register, name='custom_register'),
     path('logout/', views.custom_logout, name='custom_logout'),
     path('dashboard/', views.dashboard, name='dashboard'),
-    path('dashboard/sales/', views.sales_management, name='sales_management'),
+    path('dashboard/sales/', dashboard_views.sales_management, name='sales_management'),
     path('dashboard/sales/revenue/', views.add_revenue, name='add_revenue'),
     path('dashboard/sales/expense/', views.add_expense, name='add_expense'),
     path('dashboard/sales/sale/<int:sale_id>/delete/', views.delete_sale, name='delete_sale'),
@@ -21,12 +24,22 @@ urlpatterns = [
     path('dashboard/costs/', views.cost_management, name='cost_management'),
     path('dashboard/costs/add/', views.add_cost, name='add_cost'),
     path('dashboard/costs/<int:cost_id>/delete/', views.delete_cost, name='delete_cost'),
-    path('dashboard/profit/', views.profit_analysis, name='profit_analysis'),
+    path('dashboard/profit/', dashboard_views.profit_analysis, name='profit_analysis'),
+    path('dashboard/import/', views.import_ledger, name='import_ledger'),
+    path('dashboard/export/<str:ledger>/', views.export_ledger, name='export_ledger'),
     path('dashboard/users/', views.user_management, name='user_management'),
     path('dashboard/users/<int:user_id>/', views.user_detail, name='user_detail'),
     path('dashboard/users/<int:user_id>/edit/', views.user_edit, name='user_edit'),
     path('dashboard/users/<int:user_id>/delete/', views.user_delete, name='user_delete'),
+    path('dashboard/db-pool/', views.db_pool_status, name='db_pool_status'),
     path('admin/', admin.site.urls),  # 保留 Django Admin 作為備用
+
+    # REST API（JWT 認證）
+    path('api/accounts/', include('accounts.urls')),
+    path('api/sales/', include('sales.urls')),
+    path('api/costs/', include('costs.urls')),
+    path('api/expenses/', include('expenses.urls')),
+    path('api/reports/', include('reports.urls')),
 ]
 
 # 靜態檔案和媒體檔案 URL
@@ -8,6 +8,8 @@ from accounts.models import User
 from sales.models import Sale
 from costs.models import Cost
 from reports.models import Report
+from onecoco.conditional import conditional_page
+from onecoco.db.routers import use_replica
 
 def home(request):
     """首頁視圖"""
@@ -100,11 +102,14 @@ def custom_logout(request):
 @login_required
 def dashboard(request):
     """使用者管理儀表板"""
+    from onecoco import cache
+    from reports import archive
+    
     context = {
         'user': request.user,
-        'total_users': User.objects.count(),
-        'total_sales': Sale.objects.count() if hasattr(Sale, 'objects') else 0,
-        'total_costs': Cost.objects.count() if hasattr(Cost, 'objects') else 0,
+        'total_users': cache.cached(cache.USERS_SCOPE, 'count', User.objects.count),
+        'total_sales': cache.cached(cache.store_scope(None), 'sales-count', lambda: archive.count(Sale)),
+        'total_costs': cache.cached(cache.store_scope(None), 'costs-count', lambda: archive.count(Cost)),
         'recent_users': User.objects.order_by('-date_joined')[:5],
     }
     return render(request, 'dashboard/index_unified.html', context)
@@ -171,12 +176,26 @@ def user_delete(request, user_id):
     
     return redirect('user_management')
 
-@login_required
-def sales_management(request):
-    """銷售管理頁面"""
-    from sales.models import Sale
-    from django.db.models import Sum
-    from datetime import date, datetime, timedelta
+def get_store_scope(request):
+    """
+    取得目前頁面要顯示的店面ID
+    
+    超級使用者可用 ?store= 切換店面，留空代表所有店面；其他使用者固定為自己的店面。
+    """
+    if request.user.is_superuser:
+        return request.GET.get('store', '').strip()
+    return request.user.store_id
+
+def sales_management_scope(request):
+    """銷售管理頁面資料所屬的快取範圍（用於 ETag）"""
+    from onecoco import cache
+    
+    return cache.store_scope(get_store_scope(request))
+
+def sales_management_params(request):
+    """解析銷售管理頁面的篩選參數"""
+    from onecoco import pagination
+    from datetime import date, datetime
     from django.utils import timezone
     import calendar
     
@@ -195,47 +214,127 @@ def sales_management(request):
     first_day = date(selected_year, selected_month, 1)
     last_day = date(selected_year, selected_month, calendar.monthrange(selected_year, selected_month)[1])
     
-    # 轉換為 datetime 物件以避免 SQLite 的 user-defined function 問題
-    start_datetime = timezone.make_aware(datetime.combine(first_day, datetime.min.time()))
-    end_datetime = timezone.make_aware(datetime.combine(last_day, datetime.max.time()))
+    return {
+        'selected_year': selected_year,
+        'selected_month': selected_month,
+        'first_day': first_day,
+        'last_day': last_day,
+        # 轉換為 datetime 物件以避免 SQLite 的 user-defined function 問題
+        'start_datetime': timezone.make_aware(datetime.combine(first_day, datetime.min.time())),
+        'end_datetime': timezone.make_aware(datetime.combine(last_day, datetime.max.time())),
+        'today': timezone.localdate(),
+        'store_id': get_store_scope(request),
+        'page_size': pagination.parse_page_size(request.GET.get('page_size')),
+        'partial': request.GET.get('partial'),
+    }
+
+def sales_management_loaders(request, params):
+    """
+    銷售管理頁面需要的各項查詢，彼此獨立
     
-    # 獲取今日銷售統計數據
-    today = timezone.now().date()
-    tomorrow = today + timedelta(days=1)
-    today_start = timezone.make_aware(datetime.combine(today, datetime.min.time()))
-    today_end = timezone.make_aware(datetime.combine(tomorrow, datetime.min.time()))
+    回傳 {名稱: 無參數函式}；同步頁面依序執行，非同步頁面會同時執行。
+    「載入更多」只需要對應表格的那一頁。
+    """
+    from sales.models import Sale
+    from expenses.models import Expense
+    from reports import archive, rollup
+    from onecoco import cache, pagination
+    
+    from urllib.parse import urlencode
+    
+    store_id = params['store_id']
+    first_day, last_day, today = params['first_day'], params['last_day'], params['today']
+    
+    def ledger_page(model, cursor):
+        # 依 (store_id, date) 索引篩選，兩個表格各自分頁；已歸檔的月份讀取歸檔資料
+        filters = {'date__gte': params['start_datetime'], 'date__lte': params['end_datetime']}
+        if store_id:
+            filters['store_id'] = store_id
+        return pagination.keyset_page(
+            model.objects.filter(**filters).select_related('recorded_by'),
+            cursor=pagination.decode_cursor(cursor),
+            page_size=params['page_size'],
+            archived=archive.ArchiveQuery(model, **filters).select_related('recorded_by'),
+        )
     
-    # 使用 datetime 範圍查詢
-    try:
-        today_sales = Sale.objects.filter(
-            date__gte=today_start,
-            date__lt=today_end
+    def ledger_rows(name, model, template_name, context_name):
+        cursor = request.GET.get(f'{name}_cursor', '')
+        query = urlencode({'cursor': cursor, 'page_size': params['page_size']})
+        return cached_ledger_rows(
+            store_id,
+            f'rows:{name}:{first_day}:{last_day}:{query}',
+            template_name,
+            context_name,
+            lambda: ledger_page(model, cursor),
         )
-    except Exception as e:
-        today_sales = Sale.objects.none()
     
-    # 獲取篩選月份的營業額和支出記錄
+    loaders = {
+        'sales_rows': lambda: ledger_rows('sales', Sale, 'dashboard/partials/sale_rows.html', 'filtered_sales'),
+        'expenses_rows': lambda: ledger_rows('expenses', Expense, 'dashboard/partials/expense_rows.html', 'filtered_expenses'),
+    }
+    if params['partial'] == 'sales':
+        return {'sales_rows': loaders['sales_rows']}
+    if params['partial'] == 'expenses':
+        return {'expenses_rows': loaders['expenses_rows']}
+    
+    # 從每日彙總讀取篩選月份與今日的總計（依店面版本快取）
+    loaders['monthly_totals'] = lambda: cache.cached(
+        cache.store_scope(store_id),
+        f'totals:{first_day}:{last_day}',
+        lambda: rollup.totals(first_day, last_day, store_id),
+    )
+    loaders['today_totals'] = lambda: cache.cached(
+        cache.store_scope(store_id),
+        f'totals:{today}:{today}',
+        lambda: rollup.totals(today, today, store_id),
+    )
+    loaders['stores'] = lambda: (
+        list(User.objects.order_by('store_id').values_list('store_id', flat=True).distinct())
+        if request.user.is_superuser else []
+    )
+    return loaders
+
+def cached_ledger_rows(store_id, name, template_name, context_name, load_page):
+    """
+    帳本表格的資料列 HTML 與下一頁游標，依店面資料版本快取
+    
+    name 需包含期間、篩選條件與游標；任何寫入都會改變店面的版本號，
+    沒有異動的月份直接取出快取，不需查詢資料庫，也不必逐列套用篩選器渲染。
+    資料列模板不使用 request 或使用者資料，同店面的使用者可共用快取。
+    """
+    from django.template.loader import render_to_string
+    from django.utils.safestring import mark_safe
+    from onecoco import cache
+    
+    def render_rows():
+        page = load_page()
+        return {
+            'html': render_to_string(template_name, {context_name: page}).strip(),
+            'next_cursor': page.next_cursor,
+        }
+    
+    rows = cache.cached(cache.store_scope(store_id), name, render_rows)
+    return {'html': mark_safe(rows['html']), 'next_cursor': rows['next_cursor']}
+
+def load_or_default(name, loader):
+    """執行查詢，失敗時回傳空的結果，頁面仍可正常顯示"""
     try:
-        from expenses.models import Expense
-        filtered_sales = Sale.objects.filter(
-            date__gte=start_datetime,
-            date__lte=end_datetime
-        ).select_related('recorded_by').order_by('-date')
-        
-        filtered_expenses = Expense.objects.filter(
-            date__gte=start_datetime,
-            date__lte=end_datetime
-        ).select_related('recorded_by').order_by('-date')
-        
-        # 計算篩選月份的總計
-        sales_total = filtered_sales.aggregate(total=Sum('amount'))['total'] or 0
-        expenses_total = filtered_expenses.aggregate(total=Sum('amount'))['total'] or 0
-        
+        return loader()
     except Exception:
-        filtered_sales = Sale.objects.none()
-        filtered_expenses = []
-        sales_total = 0
-        expenses_total = 0
+        if name.endswith('_rows'):
+            return {'html': '', 'next_cursor': None}
+        if name.endswith('_totals'):
+            return {'sales_total': 0, 'expense_total': 0}
+        return []
+
+def sales_management_response(request, params, data):
+    """以查詢結果產生銷售管理頁面（或「載入更多」的 JSON）"""
+    from django.http import JsonResponse
+    from django.utils import timezone
+    
+    # 「載入更多」只回傳指定表格的新資料列
+    if params['partial'] in ('sales', 'expenses'):
+        return JsonResponse(data[f"{params['partial']}_rows"])
     
     # 生成年份和月份選項
     current_year = timezone.now().year
@@ -248,32 +347,109 @@ def sales_management(request):
     
     context = {
         'user': request.user,
-        'filtered_sales': filtered_sales,
-        'filtered_expenses': filtered_expenses,
-        'today_sales': today_sales,
-        'today_total': today_sales.aggregate(total=Sum('amount'))['total'] or 0,
-        'sales_total': sales_total,
-        'expenses_total': expenses_total,
-        'selected_year': selected_year,
-        'selected_month': selected_month,
+        'sales_rows': data['sales_rows']['html'],
+        'expenses_rows': data['expenses_rows']['html'],
+        'sales_next_cursor': data['sales_rows']['next_cursor'],
+        'expenses_next_cursor': data['expenses_rows']['next_cursor'],
+        'today_total': data['today_totals']['sales_total'],
+        'sales_total': data['monthly_totals']['sales_total'],
+        'expenses_total': data['monthly_totals']['expense_total'],
+        'selected_year': params['selected_year'],
+        'selected_month': params['selected_month'],
         'years': years,
         'months': months,
-        'current_month_name': dict(months)[selected_month],
+        'current_month_name': dict(months)[params['selected_month']],
+        'store_id': params['store_id'],
+        'stores': data['stores'],
     }
     
     return render(request, 'dashboard/sales_management_unified.html', context)
 
+@login_required
+@conditional_page(sales_management_scope)
+@use_replica(sales_management_scope)
+def sales_management(request):
+    """銷售管理頁面"""
+    params = sales_management_params(request)
+    data = {
+        name: load_or_default(name, loader)
+        for name, loader in sales_management_loaders(request, params).items()
+    }
+    return sales_management_response(request, params, data)
+
 @login_required
 def cost_management(request):
     """成本管理頁面"""
-    from costs.models import Cost
-    
-    # 獲取所有成本記錄，按日期倒序排列
-    costs = Cost.objects.select_related('recorded_by').order_by('-date', '-created_at')
+    from costs.models import Cost, Supplier
+    from reports import archive
+    from onecoco import pagination
+    from django.http import JsonResponse
+    from datetime import date
+    from urllib.parse import urlencode
+    
+    store_id = get_store_scope(request)
+    selected_category = request.GET.get('category', '').strip()
+    selected_supplier = request.GET.get('supplier', '').strip()
+    selected_date = request.GET.get('date', '')
+    
+    # 篩選條件都在資料庫端完成，搭配 (store_id, date) 索引；已歸檔的月份套用相同條件
+    filters = {}
+    if store_id:
+        filters['store_id'] = store_id
+    if selected_category:
+        filters['category'] = selected_category
+    if selected_supplier:
+        filters['supplier'] = selected_supplier
+    costs = Cost.objects.filter(**filters).select_related('recorded_by')
+    archived_costs = archive.ArchiveQuery(Cost, **filters).select_related('recorded_by')
+    
+    # 跳到指定日期
+    try:
+        jump_date = date.fromisoformat(selected_date) if selected_date else None
+    except ValueError:
+        jump_date = None
+    if jump_date:
+        costs = pagination.on_or_before(costs, jump_date)
+        archived_costs = pagination.on_or_before(archived_costs, jump_date)
+    
+    # keyset 分頁：依 (date, created_at, id) 由新到舊；資料列依店面版本快取
+    cursor = request.GET.get('cursor', '')
+    page_size = pagination.parse_page_size(request.GET.get('page_size'))
+    query = urlencode({
+        'category': selected_category,
+        'supplier': selected_supplier,
+        'date': jump_date or '',
+        'cursor': cursor,
+        'page_size': page_size,
+    })
+    rows = cached_ledger_rows(
+        store_id,
+        f'rows:costs:{query}',
+        'dashboard/partials/cost_rows.html',
+        'costs',
+        lambda: pagination.keyset_page(
+            costs, cursor=pagination.decode_cursor(cursor), page_size=page_size, archived=archived_costs,
+        ),
+    )
+    
+    # 「載入更多」只回傳新的資料列
+    if request.GET.get('partial'):
+        return JsonResponse(rows)
     
     context = {
         'user': request.user,
-        'costs': costs,  # 更新變數名稱以匹配模板
+        'cost_rows': rows['html'],
+        'next_cursor': rows['next_cursor'],
+        'store_id': store_id,
+        'selected_category': selected_category,
+        'selected_supplier': selected_supplier,
+        'selected_date': jump_date.isoformat() if jump_date else '',
+        'category_choices': Cost.CATEGORY_CHOICES,
+        'suppliers': Supplier.objects.filter(is_active=True).values_list('name', flat=True),
+        'stores': (
+            User.objects.order_by('store_id').values_list('store_id', flat=True).distinct()
+            if request.user.is_superuser else []
+        ),
     }
     return render(request, 'dashboard/cost_management_unified.html', context)
 
@@ -331,18 +507,13 @@ def delete_expense(request, expense_id):
     
     return redirect('sales_management')
 
-@login_required
-def profit_analysis(request):
-    """利潤分析頁面"""
-    from sales.models import Sale
-    from costs.models import Cost
-    from expenses.models import Expense
-    from django.db.models import Sum
-    from datetime import datetime, timedelta
+def profit_analysis_params():
+    """利潤分析的期間：本月與近 12 個月（含本月）"""
+    from datetime import timedelta
     from django.utils import timezone
     
     # 獲取本月數據
-    today = timezone.now().date()
+    today = timezone.localdate()
     first_day = today.replace(day=1)
     # 計算下個月的第一天，然後減去一天得到本月最後一天
     if first_day.month == 12:
@@ -351,28 +522,62 @@ def profit_analysis(request):
         next_month = first_day.replace(month=first_day.month + 1)
     last_day = next_month - timedelta(days=1)
     
-    # 轉換為 datetime 物件以避免 SQLite 的 user-defined function 問題
-    start_datetime = timezone.make_aware(datetime.combine(first_day, datetime.min.time()))
-    end_datetime = timezone.make_aware(datetime.combine(last_day, datetime.max.time()))
+    # 近 12 個月（含本月）的第一天
+    trend_months = [first_day]
+    for _ in range(11):
+        trend_months.insert(0, (trend_months[0] - timedelta(days=1)).replace(day=1))
     
-    # 使用 datetime 範圍查詢
-    monthly_sales = Sale.objects.filter(
-        date__gte=start_datetime,
-        date__lte=end_datetime
-    ).aggregate(total=Sum('amount'))['total'] or 0
-    
-    try:
-        monthly_expenses = Expense.objects.filter(
-            date__gte=start_datetime,
-            date__lte=end_datetime
-        ).aggregate(total=Sum('amount'))['total'] or 0
-    except Exception:
-        monthly_expenses = 0
+    return {'today': today, 'first_day': first_day, 'last_day': last_day, 'trend_months': trend_months}
+
+def profit_analysis_scope(request):
+    """利潤分析頁面彙總所有店面，資料範圍為所有店面"""
+    from onecoco import cache
     
-    monthly_costs = Cost.objects.filter(
-        date__gte=start_datetime,
-        date__lte=end_datetime
-    ).aggregate(total=Sum('amount'))['total'] or 0
+    return cache.store_scope(None)
+
+def profit_analysis_loaders(params):
+    """利潤分析頁面需要的查詢；回傳 {名稱: 無參數函式}"""
+    from reports import rollup
+    from onecoco import cache
+    
+    trend_months, last_day = params['trend_months'], params['last_day']
+    # 一次分組查詢取得 12 個月內每月、每類別的銷售、成本、支出（依店面版本快取）
+    return {
+        'monthly_rows': lambda: cache.cached(
+            cache.store_scope(None),
+            f'monthly-categories:{trend_months[0]}:{last_day}',
+            lambda: rollup.monthly_category_totals(trend_months[0], last_day),
+        ),
+    }
+
+def profit_analysis_response(request, params, data):
+    """以查詢結果產生利潤分析頁面"""
+    today, first_day, trend_months = params['today'], params['first_day'], params['trend_months']
+    monthly_rows = data['monthly_rows']
+    
+    trend = {
+        month: {'month': month, 'sales': 0, 'costs': 0, 'expenses': 0}
+        for month in trend_months
+    }
+    category_breakdown = []
+    for row in monthly_rows:
+        month_totals = trend[row['month']]
+        month_totals['sales'] += row['sales_total'] or 0
+        month_totals['costs'] += row['cost_total'] or 0
+        month_totals['expenses'] += row['expense_total'] or 0
+        if row['month'] == first_day:
+            category_breakdown.append({
+                'category': row['category'] or '未分類',
+                'sales': row['sales_total'] or 0,
+                'costs': row['cost_total'] or 0,
+                'expenses': row['expense_total'] or 0,
+            })
+    for month_totals in trend.values():
+        month_totals['profit'] = month_totals['sales'] - month_totals['costs'] - month_totals['expenses']
+    
+    monthly_sales = trend[first_day]['sales']
+    monthly_expenses = trend[first_day]['expenses']
+    monthly_costs = trend[first_day]['costs']
     
     # 總支出 = 日常支出 + 固定成本
     total_expenses = monthly_expenses + monthly_costs
@@ -386,9 +591,20 @@ def profit_analysis(request):
         'total_expenses': total_expenses,
         'monthly_profit': monthly_profit,
         'current_month': today.strftime('%Y年%m月'),
+        'monthly_trend': list(trend.values()),
+        'category_breakdown': category_breakdown,
     }
     return render(request, 'dashboard/profit_analysis_unified.html', context)
 
+@login_required
+@conditional_page(profit_analysis_scope)
+@use_replica(profit_analysis_scope)
+def profit_analysis(request):
+    """利潤分析頁面"""
+    params = profit_analysis_params()
+    data = {name: loader() for name, loader in profit_analysis_loaders(params).items()}
+    return profit_analysis_response(request, params, data)
+
 @login_required
 def add_cost(request):
     """新增成本項目"""
@@ -444,6 +660,7 @@ def add_cost(request):
                 'description': description,
                 'category': category,
                 'notes': notes,
+                'store_id': request.user.store_id,
                 'recorded_by': request.user
             }
             
@@ -488,6 +705,7 @@ def add_revenue(request):
                 description="營業收入",
                 category=category,
                 notes=notes,
+                store_id=request.user.store_id,
                 recorded_by=request.user
             )
             
@@ -530,6 +748,7 @@ def add_expense(request):
                 item_name=expense_item,
                 category=expense_category,
                 notes=expense_notes,
+                store_id=request.user.store_id,
                 recorded_by=request.user
             )
             
@@ -610,3 +829,73 @@ def edit_expense(request, expense_id):
     except Exception as e:
         messages.error(request, f'更新失敗：{str(e)}')
         return redirect('sales_management')
+
+@login_required
+def import_ledger(request):
+    """上傳 CSV 批次匯入銷售、成本或支出，回傳逐列錯誤報告"""
+    from onecoco import importer
+    from django.http import JsonResponse
+    import io
+
+    if request.method != 'POST':
+        return JsonResponse({'error': '請以 POST 上傳 CSV 檔案'}, status=405)
+
+    ledger = request.POST.get('ledger', '')
+    if ledger not in importer.LEDGERS:
+        return JsonResponse({'error': f"ledger 必須為 {', '.join(sorted(importer.LEDGERS))}"}, status=400)
+
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'error': '請選擇要匯入的 CSV 檔案'}, status=400)
+
+    # 只有超級使用者可以匯入到其他店面
+    store_id = request.user.store_id
+    if request.user.is_superuser:
+        store_id = request.POST.get('store', '').strip() or store_id
+
+    chunk_size = importer.parse_chunk_size(request.POST.get('chunk_size'))
+
+    # 上傳檔案超過記憶體上限時已暫存於磁碟，這裡逐列讀取，不會整份載入記憶體
+    stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+    try:
+        result = importer.import_csv(
+            stream, ledger, request.user, store_id=store_id, chunk_size=chunk_size,
+        )
+    except UnicodeDecodeError:
+        return JsonResponse({'error': '檔案必須為 UTF-8 編碼的 CSV'}, status=400)
+    finally:
+        stream.detach()
+
+    return JsonResponse(result.as_dict(), status=200 if result.created or not result.failed else 400)
+
+@login_required
+def export_ledger(request, ledger):
+    """以 CSV 串流匯出銷售、成本或支出；可用 ?start=&end= 指定日期區間（YYYY-MM-DD）"""
+    from onecoco import cache, exporter
+    from onecoco.db.routers import replica_reads
+    from django.http import Http404, JsonResponse
+    from datetime import date
+
+    if ledger not in exporter.LEDGERS:
+        raise Http404('未知的帳本')
+
+    try:
+        start_date = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+        end_date = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+    except ValueError:
+        return JsonResponse({'error': '日期格式必須為 YYYY-MM-DD'}, status=400)
+
+    store_id = get_store_scope(request)
+    with replica_reads(cache.store_scope(store_id)):
+        return exporter.export_ledger(ledger, store_id, start_date, end_date)
+
+@login_required
+def db_pool_status(request):
+    """目前 worker 的資料庫連線池統計（僅限超級使用者）"""
+    from onecoco.db import pool
+    from django.http import JsonResponse
+    import os
+
+    if not request.user.is_superuser:
+        return JsonResponse({'error': '只有超級使用者可以查看'}, status=403)
+    return JsonResponse({'pid': os.getpid(), 'pools': pool.stats()})
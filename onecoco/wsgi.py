@@ -4,9 +4,15 @@ WSGI config for onecoco project.
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'onecoco.settings')
 
 application = get_wsgi_application()
 
+# 正式環境直接送出 collectstatic 的輸出（預先壓縮、雜湊檔名長期快取）
+if settings.STATIC_SERVING:
+    from onecoco.static_serving import StaticFilesApp
+
+    application = StaticFilesApp(application)
@@ -5,4 +5,10 @@ class ReportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reports'
     verbose_name = '報表分析'
+    
+    def ready(self):
+        from django.db.models.signals import post_migrate
 
+        from . import partitioning, signals
+        signals.connect()
+        post_migrate.connect(partitioning.ensure_after_migrate, sender=self, dispatch_uid='reports_ensure_partitions')
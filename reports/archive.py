@@ -0,0 +1,334 @@
+"""
+已結算月份的帳本歸檔
+
+超過保留期限（settings.LEDGER_ARCHIVE_MONTHS 個月）的銷售、成本、支出資料，
+依店面與月份壓縮成 ArchivedLedgerMonth 的一列（zlib 壓縮的 JSON），並從帳本資料表刪除，
+讓帳本資料表與索引只保留近期資料。
+
+- 直接刪除不經過 signal，每日店面彙總保留已歸檔月份的統計，報表與利潤分析不受影響
+- ArchiveQuery 以與 QuerySet.filter() 相同的條件讀取歸檔資料；分頁（onecoco.pagination）、
+  CSV 匯出與 API 會把結果與帳本資料表合併，查詢範圍涵蓋已歸檔月份時照常顯示
+- 歸檔資料只能讀取，需要修改時先以 restore_month() 搬回帳本資料表
+"""
+
+import json
+import operator
+import uuid
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Min, Sum, prefetch_related_objects
+from django.utils import timezone
+
+from onecoco import cache
+from .models import ArchivedLedgerMonth
+from .partitioning import add_months, month_bounds, month_start
+
+COMPRESSION_LEVEL = 6
+
+# 刪除帳本資料時每批的 id 數量（SQLite 的參數數量有上限）
+DELETE_BATCH_SIZE = 500
+
+KEYSET_FIELDS = ('date', 'created_at', 'pk')
+
+LOOKUPS = {
+    'exact': operator.eq,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+    'in': lambda value, values: value in values,
+}
+
+
+def columns(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _json_default(value):
+    # 不用 DjangoJSONEncoder：它會把時間截斷到毫秒，搬回帳本資料表後游標就對不上
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f'無法序列化 {type(value).__name__}')
+
+
+def encode(names, rows):
+    """將資料列（欄位值的字典）壓縮，回傳 (壓縮資料, 壓縮前大小)"""
+    payload = json.dumps(
+        {'columns': names, 'rows': [[row[name] for name in names] for row in rows]},
+        default=_json_default,
+        ensure_ascii=False,
+        separators=(',', ':'),
+    ).encode()
+    return zlib.compress(payload, COMPRESSION_LEVEL), len(payload)
+
+
+def decode(model, data):
+    """解壓縮為欄位值的字典列表；歸檔後才新增的欄位使用預設值，已移除的欄位略過"""
+    payload = json.loads(zlib.decompress(data))
+    fields = model._meta.concrete_fields
+    rows = []
+    for values in payload['rows']:
+        stored = dict(zip(payload['columns'], values))
+        rows.append({
+            field.attname: field.to_python(stored[field.attname]) if field.attname in stored else field.get_default()
+            for field in fields
+        })
+    return rows
+
+
+def retention_cutoff(months=None, today=None):
+    """保留期限的第一個月份：早於這個月份的資料會被歸檔"""
+    months = settings.LEDGER_ARCHIVE_MONTHS if months is None else months
+    return add_months(month_start(today or timezone.localdate()), -months)
+
+
+def _delete_rows(model, using, pks):
+    """以 SQL 直接刪除，不觸發 post_delete，每日彙總保留這些資料的統計"""
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.pk.column)
+    with connection.cursor() as cursor:
+        for index in range(0, len(pks), DELETE_BATCH_SIZE):
+            batch = pks[index:index + DELETE_BATCH_SIZE]
+            cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({", ".join(["%s"] * len(batch))})', batch)
+
+
+def archive_month(model, store_id, month):
+    """
+    將單一店面單一月份的資料移到歸檔表，回傳歸檔的筆數
+
+    該月份已經歸檔過時（例如之後才補登的資料）會合併到原本的歸檔。
+    """
+    start, end = month_bounds(month)
+    names = columns(model)
+    pk_name = model._meta.pk.attname
+    using = router.db_for_write(model)
+
+    with transaction.atomic(using=using):
+        rows = [
+            dict(zip(names, values))
+            for values in model._base_manager.using(using)
+            .filter(store_id=store_id, date__gte=start, date__lt=end)
+            .select_for_update()
+            .order_by('date', 'pk')
+            .values_list(*names)
+        ]
+        if not rows:
+            return 0
+        archived = (
+            ArchivedLedgerMonth.objects.using(using).select_for_update()
+            .filter(ledger=model._meta.label, store_id=store_id, month=month).first()
+        )
+        if archived is None:
+            archived = ArchivedLedgerMonth(ledger=model._meta.label, store_id=store_id, month=month)
+            merged = rows
+        else:
+            merged = sorted(
+                decode(model, archived.data) + rows,
+                key=lambda row: (row['date'], row[pk_name]),
+            )
+        archived.data, archived.raw_size = encode(names, merged)
+        archived.row_count = len(merged)
+        archived.save(using=using)
+        _delete_rows(model, using, [row[pk_name] for row in rows])
+        cache.invalidate_stores([store_id])
+    return len(rows)
+
+
+def pending_months(model, cutoff, store_id=None):
+    """帳本資料表中早於 cutoff 月份、尚未歸檔的 (店面, 月份)，由舊到新"""
+    queryset = model._base_manager.filter(date__lt=month_bounds(cutoff)[0])
+    if store_id:
+        queryset = queryset.filter(store_id=store_id)
+    oldest = queryset.aggregate(oldest=Min('date'))['oldest']
+    if oldest is None:
+        return
+    month = month_start(oldest)
+    while month < cutoff:
+        start, end = month_bounds(month)
+        stores = queryset.filter(date__gte=start, date__lt=end).order_by().values_list('store_id', flat=True).distinct()
+        for row_store_id in sorted(stores):
+            yield row_store_id, month
+        month = add_months(month, 1)
+
+
+def archive_closed_months(models, months=None, store_id=None, today=None):
+    """歸檔所有超過保留期限的資料，逐月產生 (模型, 店面, 月份, 筆數)"""
+    cutoff = retention_cutoff(months, today)
+    for model in models:
+        for row_store_id, month in pending_months(model, cutoff, store_id):
+            yield model, row_store_id, month, archive_month(model, row_store_id, month)
+
+
+def restore_month(model, store_id, month):
+    """將歸檔資料搬回帳本資料表（保留原本的 id），回傳搬回的筆數"""
+    using = router.db_for_write(model)
+    with transaction.atomic(using=using):
+        archived = (
+            ArchivedLedgerMonth.objects.using(using).select_for_update()
+            .filter(ledger=model._meta.label, store_id=store_id, month=month).first()
+        )
+        if archived is None:
+            return 0
+        rows = decode(model, archived.data)
+        # bulk_create 不觸發 signal，每日彙總本來就包含這些資料
+        model._base_manager.using(using).bulk_create([model(**row) for row in rows], batch_size=DELETE_BATCH_SIZE)
+        archived.delete()
+        cache.invalidate_stores([store_id])
+    return len(rows)
+
+
+def count(model):
+    """帳本資料表與歸檔的總筆數"""
+    archived = ArchivedLedgerMonth.objects.filter(ledger=model._meta.label).aggregate(total=Sum('row_count'))['total']
+    return model.objects.count() + (archived or 0)
+
+
+def _keyset_key(obj):
+    return tuple(getattr(obj, name) for name in KEYSET_FIELDS)
+
+
+def _resolve(obj, name):
+    for part in name.split('__'):
+        if obj is None:
+            return None
+        obj = getattr(obj, part)
+    return obj
+
+
+class ArchiveQuery:
+    """
+    以 QuerySet.filter() 的條件讀取歸檔資料
+
+    支援欄位的 exact、gt、gte、lt、lte、in 條件，filter() 與 select_related()
+    可以鏈接，因此 exporter.filter_ledger() 等只呼叫 filter() 的函式也能直接套用。
+    店面與日期條件會先篩選要解壓縮的 ArchivedLedgerMonth，只讀取相關月份。
+    """
+
+    def __init__(self, model, **lookups):
+        self.model = model
+        self.conditions = []
+        self.related = []
+        self.db = None
+        self._add(lookups)
+
+    def _clone(self):
+        clone = ArchiveQuery(self.model)
+        clone.conditions = list(self.conditions)
+        clone.related = list(self.related)
+        clone.db = self.db
+        return clone
+
+    def _add(self, lookups):
+        for key, value in lookups.items():
+            name, _, lookup = key.partition('__')
+            if lookup and lookup not in LOOKUPS:
+                raise ValueError(f'歸檔資料不支援 {key} 條件')
+            attname = self.model._meta.pk.attname if name == 'pk' else self.model._meta.get_field(name).attname
+            self.conditions.append((attname, LOOKUPS[lookup or 'exact'], value))
+
+    def filter(self, **lookups):
+        clone = self._clone()
+        clone._add(lookups)
+        return clone
+
+    def using(self, alias):
+        """固定讀取的資料庫（預設依資料庫路由）"""
+        clone = self._clone()
+        clone.db = alias
+        return clone
+
+    def select_related(self, *fields):
+        """讀取時以 prefetch_related_objects() 一次載入關聯的物件"""
+        clone = self._clone()
+        clone.related.extend(fields)
+        return clone
+
+    def matches(self, row):
+        for attname, compare, value in self.conditions:
+            if row[attname] is None or value is None:
+                # 與 SQL 相同：只有 exact=None（IS NULL）會符合空值
+                if not (compare is operator.eq and row[attname] is value):
+                    return False
+            elif not compare(row[attname], value):
+                return False
+        return True
+
+    def periods(self):
+        """可能包含符合資料的 ArchivedLedgerMonth"""
+        queryset = ArchivedLedgerMonth.objects.using(self.db).filter(ledger=self.model._meta.label)
+        for attname, compare, value in self.conditions:
+            if attname == 'store_id':
+                if compare is operator.eq:
+                    queryset = queryset.filter(store_id=value)
+                elif compare is LOOKUPS['in']:
+                    queryset = queryset.filter(store_id__in=value)
+            elif attname == 'date' and value is not None:
+                if compare in (operator.gt, operator.ge, operator.eq):
+                    queryset = queryset.filter(month__gte=month_start(value))
+                if compare in (operator.lt, operator.le, operator.eq):
+                    queryset = queryset.filter(month__lte=month_start(value))
+        return queryset
+
+    def _months(self, descending=False, **lookups):
+        """依月份產生符合條件的資料列（欄位值的字典），每個月份一次解壓縮該月所有店面的歸檔"""
+        periods = self.periods().filter(**lookups)
+        months = periods.order_by('-month' if descending else 'month').values_list('month', flat=True).distinct()
+        for month in list(months):
+            rows = [
+                row
+                for archived in periods.filter(month=month).only('data')
+                for row in decode(self.model, archived.data)
+                if self.matches(row)
+            ]
+            yield rows, periods.db
+
+    def _instances(self, rows, db):
+        names = columns(self.model)
+        instances = []
+        for row in rows:
+            instance = self.model.from_db(db, names, [row[name] for name in names])
+            # 頁面依此隱藏編輯與刪除按鈕
+            instance.archived = True
+            instances.append(instance)
+        if self.related:
+            prefetch_related_objects(instances, *self.related)
+        return instances
+
+    def keyset_rows(self, cursor=None, limit=None, floor=None):
+        """
+        依 (date, created_at, id) 由新到舊排列，排序在 cursor 之後的前 limit 筆（模型實例）
+
+        floor 為已經取得的帳本資料中排序最後一筆的鍵，更舊的月份不需要讀取。
+        """
+        lookups = {}
+        if cursor:
+            lookups['month__lte'] = month_start(cursor[0])
+        if floor:
+            lookups['month__gte'] = month_start(floor[0])
+        result = []
+        for rows, db in self._months(descending=True, **lookups):
+            for instance in sorted(self._instances(rows, db), key=_keyset_key, reverse=True):
+                key = _keyset_key(instance)
+                if (cursor and key >= tuple(cursor)) or (floor and key <= floor):
+                    continue
+                result.append(instance)
+            if limit is not None and len(result) >= limit:
+                break
+        return result[:limit]
+
+    def iter_values(self, *names):
+        """依 (date, id) 由舊到新逐筆產生指定欄位的 tuple；欄位可以是 recorded_by__username 等關聯"""
+        pk_name = self.model._meta.pk.attname
+        related = {name.split('__')[0] for name in names if '__' in name}
+        query = self.select_related(*related - set(self.related))
+        for rows, db in query._months():
+            rows.sort(key=lambda row: (row['date'], row[pk_name]))
+            for instance in query._instances(rows, db):
+                yield tuple(_resolve(instance, name) for name in names)
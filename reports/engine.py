@@ -0,0 +1,208 @@
+"""
+報表產生引擎
+
+依店面與期間（日、週、月、季、年或自定義）計算 Report 的銷售、成本與淨利。
+三個帳本的總額都取自每日店面彙總，一批互不重疊的期間只需一次分組查詢。
+"""
+
+import calendar
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+
+from accounts.models import User
+from onecoco import cache
+from onecoco.db.routers import replica_reads
+from .models import DailyStoreSummary, Report
+
+REPORT_TYPE_NAMES = dict(Report.REPORT_TYPE_CHOICES)
+
+
+class ReportPeriodError(ValueError):
+    """期間設定錯誤"""
+
+
+def period_bounds(report_type, day):
+    """取得包含指定日期的日、週、月、季、年期間（含起訖日）"""
+    if report_type == 'daily':
+        return day, day
+    if report_type == 'weekly':
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    if report_type == 'monthly':
+        return day.replace(day=1), day.replace(day=calendar.monthrange(day.year, day.month)[1])
+    if report_type == 'quarterly':
+        first_month = (day.month - 1) // 3 * 3 + 1
+        last_month = first_month + 2
+        return (
+            date(day.year, first_month, 1),
+            date(day.year, last_month, calendar.monthrange(day.year, last_month)[1]),
+        )
+    if report_type == 'yearly':
+        return date(day.year, 1, 1), date(day.year, 12, 31)
+    raise ReportPeriodError(f'無法自動計算 {report_type} 報表的期間')
+
+
+def last_closed_period(report_type, today=None):
+    """取得最近一個已結束的期間，例如月報即為上個月"""
+    today = today or timezone.localdate()
+    start, _ = period_bounds(report_type, today)
+    return period_bounds(report_type, start - timedelta(days=1))
+
+
+def _batches(periods):
+    """將期間分成多批，每批內的期間互不重疊"""
+    batches = []
+    for period in sorted(set(periods)):
+        for batch in batches:
+            if batch[-1][1] < period[0]:
+                batch.append(period)
+                break
+        else:
+            batches.append([period])
+    return batches
+
+
+def compute_totals(periods, store_ids=None):
+    """
+    計算多個期間、多個店面的銷售、成本、支出總額
+
+    periods 為 (start_date, end_date) 的列表；回傳
+    {(store_id, start_date, end_date): {'sales': ..., 'costs': ..., 'expenses': ...}}。
+    """
+    results = {}
+    for batch in _batches(periods):
+        date_filter = Q()
+        whens = []
+        for index, (start, end) in enumerate(batch):
+            date_filter |= Q(date__gte=start, date__lte=end)
+            whens.append(When(date__gte=start, date__lte=end, then=Value(index)))
+
+        qs = DailyStoreSummary.objects.filter(date_filter)
+        if store_ids is not None:
+            qs = qs.filter(store_id__in=store_ids)
+        rows = (
+            qs.annotate(period=Case(*whens, output_field=IntegerField()))
+            .order_by()
+            .values('store_id', 'period')
+            .annotate(
+                sales=Sum('sales_total'),
+                costs=Sum('cost_total'),
+                expenses=Sum('expense_total'),
+            )
+        )
+        for row in rows:
+            start, end = batch[row['period']]
+            results[(row['store_id'], start, end)] = {
+                'sales': row['sales'] or Decimal('0'),
+                'costs': row['costs'] or Decimal('0'),
+                'expenses': row['expenses'] or Decimal('0'),
+            }
+    return results
+
+
+def _fill_report(report, totals):
+    report.total_sales = totals['sales']
+    # 總成本 = 固定成本 + 日常支出，與利潤分析頁面一致
+    report.total_costs = totals['costs'] + totals['expenses']
+    report.net_profit = report.total_sales - report.total_costs
+    report.calculate_profit_margin()
+
+
+def _report_name(store_id, report_type, start_date, end_date):
+    return f"{store_id} {REPORT_TYPE_NAMES[report_type]} {start_date} ~ {end_date}"
+
+
+def generate_reports(report_type, periods, created_by, store_ids=None):
+    """
+    為多個店面、多個期間產生（或更新）報表
+
+    同一店面、類型與起訖日的報表已存在時會重新計算並覆寫，不會重複建立。
+    store_ids 為 None 時涵蓋所有有使用者或有帳務資料的店面。
+    """
+    if report_type not in REPORT_TYPE_NAMES:
+        raise ReportPeriodError(f'未知的報表類型：{report_type}')
+    periods = sorted(set(periods))
+    for start, end in periods:
+        if start > end:
+            raise ReportPeriodError(f'開始日期 {start} 晚於結束日期 {end}')
+
+    if store_ids is None:
+        scopes = [cache.store_scope(None)]
+    else:
+        scopes = [cache.store_scope(store_id) for store_id in store_ids]
+    with replica_reads(*scopes):
+        totals = compute_totals(periods, store_ids)
+    if store_ids is None:
+        store_ids = set(User.objects.values_list('store_id', flat=True).distinct())
+        store_ids.update(store_id for store_id, _, _ in totals)
+    store_ids = sorted(store_ids)
+
+    existing = {
+        (report.store_id, report.start_date, report.end_date): report
+        for report in Report.objects.filter(
+            report_type=report_type,
+            store_id__in=store_ids,
+            start_date__in=[start for start, _ in periods],
+            end_date__in=[end for _, end in periods],
+        )
+    }
+
+    empty = {'sales': Decimal('0'), 'costs': Decimal('0'), 'expenses': Decimal('0')}
+    to_create, to_update = [], []
+    for store_id in store_ids:
+        for start, end in periods:
+            key = (store_id, start, end)
+            report = existing.get(key)
+            if report is None:
+                report = Report(
+                    name=_report_name(store_id, report_type, start, end),
+                    report_type=report_type,
+                    start_date=start,
+                    end_date=end,
+                    store_id=store_id,
+                    created_by=created_by,
+                )
+                to_create.append(report)
+            else:
+                to_update.append(report)
+            _fill_report(report, totals.get(key, empty))
+
+    now = timezone.now()
+    for report in to_update:
+        report.updated_at = now
+
+    with transaction.atomic():
+        Report.objects.bulk_create(to_create, batch_size=500)
+        Report.objects.bulk_update(
+            to_update,
+            ['total_sales', 'total_costs', 'net_profit', 'profit_margin', 'updated_at'],
+            batch_size=500,
+        )
+        # bulk_create/bulk_update 不會觸發 signal
+        transaction.on_commit(lambda: cache.bump_version(cache.REPORTS_SCOPE))
+    return to_create + to_update
+
+
+def generate_report(store_id, report_type, created_by, day=None,
+                    start_date=None, end_date=None):
+    """
+    為單一店面產生報表
+
+    自定義報表需指定 start_date 與 end_date；其餘類型依 day（預設今天）推算期間。
+    """
+    if report_type == 'custom' or (start_date and end_date):
+        if not (start_date and end_date):
+            raise ReportPeriodError('自定義報表必須指定開始與結束日期')
+        period = (start_date, end_date)
+    else:
+        period = period_bounds(report_type, day or timezone.localdate())
+    return generate_reports(report_type, [period], created_by, store_ids=[store_id])[0]
+
+
+def generate_closed_period_reports(report_type, created_by, today=None):
+    """批次產生所有店面最近一個已結束期間的報表"""
+    return generate_reports(report_type, [last_closed_period(report_type, today)], created_by)
@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Sum
+
+from reports import archive, partitioning
+from reports.models import ArchivedLedgerMonth
+
+from .partition_ledgers import parse_month
+
+
+class Command(BaseCommand):
+    help = (
+        '將超過保留期限的銷售、成本、支出資料依店面與月份壓縮歸檔：'
+        'archive 歸檔，restore 將指定月份搬回帳本資料表，status 列出歸檔統計'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', nargs='?', choices=['archive', 'restore', 'status'], default='archive')
+        parser.add_argument('month', nargs='?', help='restore 的月份 (YYYY-MM)')
+        parser.add_argument('--months', type=int, default=settings.LEDGER_ARCHIVE_MONTHS,
+                            help=f'保留最近幾個月的資料（預設 LEDGER_ARCHIVE_MONTHS={settings.LEDGER_ARCHIVE_MONTHS}）')
+        parser.add_argument('--store', help='只處理指定店面ID')
+        parser.add_argument('--table', action='append', choices=[label.split('.')[0] for label in partitioning.LEDGER_MODELS],
+                            help='只處理指定的帳本（可重複指定，預設全部）')
+        parser.add_argument('--dry-run', action='store_true', help='只列出會歸檔的店面與月份')
+
+    def handle(self, *args, **options):
+        models = [
+            model for model in partitioning.ledger_models()
+            if not options['table'] or model._meta.app_label in options['table']
+        ]
+        if options['action'] == 'status':
+            self.status(models)
+        elif options['action'] == 'restore':
+            self.restore(models, options)
+        else:
+            self.archive(models, options)
+
+    def archive(self, models, options):
+        if options['months'] < 1:
+            raise CommandError('--months 必須大於 0，本月的資料不能歸檔')
+        cutoff = archive.retention_cutoff(options['months'])
+        self.stdout.write(f'歸檔 {cutoff:%Y-%m} 以前的資料')
+
+        total = 0
+        if options['dry_run']:
+            for model in models:
+                for store_id, month in archive.pending_months(model, cutoff, options['store']):
+                    self.stdout.write(f'{model._meta.label} {store_id} {month:%Y-%m}')
+            return
+        for model, store_id, month, count in archive.archive_closed_months(
+            models, options['months'], options['store'],
+        ):
+            total += count
+            self.stdout.write(f'{model._meta.label} {store_id} {month:%Y-%m}：{count} 筆')
+        self.stdout.write(self.style.SUCCESS(f'已歸檔 {total} 筆'))
+
+    def restore(self, models, options):
+        if not options['month']:
+            raise CommandError('restore 需要指定月份，例如 archive_ledgers restore 2023-01')
+        month = parse_month(options['month'])
+        periods = ArchivedLedgerMonth.objects.filter(
+            ledger__in=[model._meta.label for model in models], month=month,
+        )
+        if options['store']:
+            periods = periods.filter(store_id=options['store'])
+
+        total = 0
+        for label, store_id in periods.values_list('ledger', 'store_id'):
+            model = next(model for model in models if model._meta.label == label)
+            count = archive.restore_month(model, store_id, month)
+            total += count
+            self.stdout.write(f'{label} {store_id} {month:%Y-%m}：{count} 筆')
+        self.stdout.write(self.style.SUCCESS(f'已搬回 {total} 筆'))
+
+    def status(self, models):
+        for model in models:
+            stats = ArchivedLedgerMonth.objects.filter(ledger=model._meta.label).aggregate(
+                periods=Count('id'), rows=Sum('row_count'), raw_size=Sum('raw_size'),
+            )
+            if not stats['periods']:
+                self.stdout.write(f'{model._meta.label}：沒有歸檔資料（帳本資料表 {model.objects.count()} 筆）')
+                continue
+            periods = ArchivedLedgerMonth.objects.filter(ledger=model._meta.label)
+            compressed = sum(len(data) for data in periods.values_list('data', flat=True).iterator())
+            months = periods.order_by('month').values_list('month', flat=True)
+            self.stdout.write(
+                f"{model._meta.label}：{stats['periods']} 個店面月份（{months.first():%Y-%m} ~ {months.last():%Y-%m}），"
+                f"{stats['rows']} 筆，壓縮 {stats['raw_size'] / 1024:.0f} KB → {compressed / 1024:.0f} KB；"
+                f'帳本資料表 {model.objects.count()} 筆'
+            )
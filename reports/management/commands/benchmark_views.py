@@ -0,0 +1,144 @@
+import json
+import math
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from accounts.models import User
+from costs.models import Cost
+from expenses.models import Expense
+from sales.models import Sale
+
+from .seed_benchmark import clear_benchmark_data
+
+VIEWS = ['dashboard', 'sales_management', 'cost_management', 'profit_analysis', 'user_management']
+
+
+def percentile(values, fraction):
+    """最近序位法的百分位數"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def parse_scales(value):
+    """解析 "1x1,5x2" 形式的「店面數x年數」列表"""
+    scales = []
+    for part in value.split(','):
+        try:
+            stores, years = part.lower().split('x')
+            scales.append((int(stores), float(years)))
+        except ValueError:
+            raise CommandError(f'無效的規模：{part}（格式為 店面數x年數，例如 5x2）')
+    return scales
+
+
+class Command(BaseCommand):
+    help = (
+        '以不同資料規模測量主要頁面的延遲與查詢數，輸出 JSON。'
+        '會建立與刪除測試資料，請在測試用資料庫執行'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='1x1,5x1,10x2', help='資料規模，格式為 店面數x年數，以逗號分隔')
+        parser.add_argument('--views', default=','.join(VIEWS), help='要測量的頁面（URL 名稱），以逗號分隔')
+        parser.add_argument('--repeat', type=int, default=20, help='每個頁面的測量次數（預設 20）')
+        parser.add_argument('--warmup', type=int, default=2, help='測量前的暖身次數（預設 2）')
+        parser.add_argument('--as', dest='as_role', choices=['admin', 'store'], default='admin',
+                            help='以超級使用者（所有店面）或單一店面的加盟商身分測量')
+        parser.add_argument('--cold', action='store_true', help='每次請求前清空快取，測量未命中快取的情況')
+        parser.add_argument('--tickets-per-day', type=int, default=40, help='每店每日平均銷售筆數')
+        parser.add_argument('--prefix', default='bench', help='測試資料前綴（預設 bench）')
+        parser.add_argument('--output', help='將結果寫入 JSON 檔案（預設輸出到畫面）')
+        parser.add_argument('--keep', action='store_true', help='結束後保留最後一個規模的測試資料')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat 必須大於 0')
+        views = [name.strip() for name in options['views'].split(',') if name.strip()]
+        prefix = options['prefix']
+        results = []
+        try:
+            for stores, years in parse_scales(options['scales']):
+                self.stderr.write(f'建立測試資料：{stores} 家店 × {years} 年')
+                call_command(
+                    'seed_benchmark', stores=stores, years=years, prefix=prefix, clear=True,
+                    tickets_per_day=options['tickets_per_day'], stdout=self.stderr,
+                )
+                results.append({
+                    'stores': stores,
+                    'years': years,
+                    'rows': self.row_counts(prefix),
+                    'views': self.measure(views, options),
+                })
+        finally:
+            if not options['keep']:
+                clear_benchmark_data(prefix)
+
+        report = json.dumps({
+            'as': options['as_role'],
+            'cold_cache': options['cold'],
+            'repeat': options['repeat'],
+            'scales': results,
+        }, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(report + '\n')
+            self.stderr.write(self.style.SUCCESS(f"結果已寫入 {options['output']}"))
+        else:
+            self.stdout.write(report)
+
+    def row_counts(self, prefix):
+        scoped = {'store_id__startswith': f'{prefix}-'}
+        return {
+            'sales': Sale.objects.filter(**scoped).count(),
+            'costs': Cost.objects.filter(**scoped).count(),
+            'expenses': Expense.objects.filter(**scoped).count(),
+            'users': User.objects.count(),
+        }
+
+    def client_for(self, options):
+        prefix = options['prefix']
+        username = f'{prefix}-admin' if options['as_role'] == 'admin' else f'{prefix}-001-owner'
+        client = Client()
+        client.force_login(User.objects.get(username=username))
+        return client
+
+    @override_settings(ALLOWED_HOSTS=['*'])
+    def measure(self, views, options):
+        client = self.client_for(options)
+        measured = {}
+        for name in views:
+            url = reverse(name)
+            for _ in range(options['warmup']):
+                client.get(url)
+
+            timings, queries, statuses = [], [], set()
+            for _ in range(options['repeat']):
+                if options['cold']:
+                    cache.clear()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries.append(len(captured))
+                statuses.add(response.status_code)
+
+            measured[name] = {
+                'p50_ms': round(percentile(timings, 0.5), 2),
+                'p95_ms': round(percentile(timings, 0.95), 2),
+                'mean_ms': round(statistics.mean(timings), 2),
+                'queries': {'min': min(queries), 'max': max(queries)},
+                'status': sorted(statuses),
+            }
+            self.stderr.write(
+                f"  {name}: p50 {measured[name]['p50_ms']} ms，p95 {measured[name]['p95_ms']} ms，"
+                f'查詢 {max(queries)} 次'
+            )
+        return measured
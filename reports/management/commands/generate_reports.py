@@ -0,0 +1,63 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from reports import engine
+from reports.models import Report
+
+
+class Command(BaseCommand):
+    help = '產生報表；未指定期間時批次產生所有店面最近一個已結束期間的報表'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'report_type',
+            choices=[choice for choice, _ in Report.REPORT_TYPE_CHOICES],
+        )
+        parser.add_argument('--store', action='append', dest='stores', help='店面ID，可重複指定；預設為所有店面')
+        parser.add_argument('--date', help='期間內任一日期 (YYYY-MM-DD)')
+        parser.add_argument('--start', help='自定義報表開始日期 (YYYY-MM-DD)')
+        parser.add_argument('--end', help='自定義報表結束日期 (YYYY-MM-DD)')
+        parser.add_argument('--user', help='建立人員使用者名稱；預設為第一個超級使用者')
+
+    def handle(self, *args, **options):
+        report_type = options['report_type']
+        created_by = self.get_user(options['user'])
+
+        try:
+            if options['start'] or options['end'] or report_type == 'custom':
+                if not (options['start'] and options['end']):
+                    raise CommandError('自定義期間必須同時指定 --start 與 --end')
+                period = (date.fromisoformat(options['start']), date.fromisoformat(options['end']))
+            elif options['date']:
+                period = engine.period_bounds(report_type, date.fromisoformat(options['date']))
+            else:
+                period = engine.last_closed_period(report_type)
+        except ValueError as e:
+            raise CommandError(f'日期格式錯誤：{e}')
+
+        try:
+            reports = engine.generate_reports(
+                report_type, [period], created_by, store_ids=options['stores']
+            )
+        except engine.ReportPeriodError as e:
+            raise CommandError(str(e))
+
+        for report in reports:
+            self.stdout.write(
+                f'{report.name}: 銷售 {report.formatted_total_sales}、'
+                f'成本 {report.formatted_total_costs}、淨利 {report.formatted_net_profit}'
+            )
+        self.stdout.write(self.style.SUCCESS(f'已產生 {len(reports)} 份報表'))
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'找不到使用者：{username}')
+        user = User.objects.filter(is_superuser=True).order_by('id').first()
+        if user is None:
+            raise CommandError('沒有可用的超級使用者，請以 --user 指定建立人員')
+        return user
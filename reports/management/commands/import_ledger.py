@@ -0,0 +1,63 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from onecoco import importer
+
+
+class Command(BaseCommand):
+    help = '由 CSV 檔批次匯入銷售、成本或支出資料（第一列為欄位名稱）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ledger', choices=sorted(importer.LEDGERS), help='匯入的帳本')
+        parser.add_argument('path', help='CSV 檔案路徑（UTF-8，可含 BOM）')
+        parser.add_argument('--user', help='記錄人員帳號（預設為第一位超級使用者）')
+        parser.add_argument('--store', help='店面ID（預設為記錄人員的店面）')
+        parser.add_argument(
+            '--chunk-size', type=importer.parse_chunk_size, default=importer.DEFAULT_CHUNK_SIZE,
+            help=f'每批寫入筆數（預設 {importer.DEFAULT_CHUNK_SIZE}，最多 {importer.MAX_CHUNK_SIZE}）',
+        )
+        parser.add_argument('--report', help='將逐列錯誤報告寫入此 CSV 檔')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+        else:
+            user = User.objects.filter(is_superuser=True).order_by('pk').first()
+        if user is None:
+            raise CommandError('找不到記錄人員，請以 --user 指定')
+
+        report_file = open(options['report'], 'w', newline='', encoding='utf-8-sig') if options['report'] else None
+        try:
+            writer = None
+            if report_file:
+                writer = csv.writer(report_file)
+                writer.writerow(['line', 'errors'])
+
+            def on_error(line, errors):
+                if writer:
+                    writer.writerow([line, json.dumps(errors, ensure_ascii=False)])
+                else:
+                    self.stderr.write(f'第 {line} 列：{json.dumps(errors, ensure_ascii=False)}')
+
+            try:
+                with open(options['path'], newline='', encoding='utf-8-sig') as stream:
+                    result = importer.import_csv(
+                        stream,
+                        options['ledger'],
+                        user,
+                        store_id=options['store'],
+                        chunk_size=options['chunk_size'],
+                        on_error=on_error,
+                    )
+            except (OSError, UnicodeDecodeError) as e:
+                raise CommandError(f'無法讀取 {options["path"]}：{e}')
+        finally:
+            if report_file:
+                report_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'已匯入 {result.created} 筆，{result.failed} 筆失敗'
+        ))
@@ -0,0 +1,294 @@
+import http.cookiejar
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter, defaultdict
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from accounts.models import User
+
+from .benchmark_views import percentile
+from .seed_benchmark import BENCH_PASSWORD
+
+DEFAULT_MIX = 'login=1,write=3,browse=6'
+LOCKED_MESSAGE = 'database is locked'
+ERROR_MESSAGE = re.compile(r'class="message[^"]*\berror\b')
+
+
+def parse_mix(value):
+    """解析 "login=1,write=3,browse=6" 形式的操作比例"""
+    mix = {}
+    for part in value.split(','):
+        try:
+            name, weight = part.split('=')
+            mix[name.strip()] = float(weight)
+        except ValueError:
+            raise CommandError(f'無效的操作比例：{part}')
+    unknown = set(mix) - {'login', 'write', 'browse'}
+    if unknown or not any(mix.values()):
+        raise CommandError('操作比例只能包含 login、write、browse，且至少一項大於 0')
+    return mix
+
+
+def classify(status, body, error=None):
+    """將一次請求的結果分類：ok、locked、app_error、http_<狀態碼> 或 connection"""
+    if error is not None and status is None:
+        return 'connection'
+    if LOCKED_MESSAGE in body:
+        # 新增頁面會攔截例外並以訊息顯示，需檢查重新導向後的頁面內容
+        return 'locked'
+    if status >= 400:
+        return f'http_{status}'
+    if ERROR_MESSAGE.search(body):
+        return 'app_error'
+    return 'ok'
+
+
+class VirtualUser:
+    """一個模擬店員：自己的 cookie，依比例重複登入、連續記帳與瀏覽月份"""
+
+    def __init__(self, base_url, username, password, options, rng):
+        self.base_url = base_url
+        self.username = username
+        self.password = password
+        self.options = options
+        self.rng = rng
+        self.urls = {
+            name: urllib.parse.urljoin(base_url, reverse(name))
+            for name in ('custom_login', 'add_revenue', 'add_expense', 'sales_management')
+        }
+        self.new_session()
+
+    def new_session(self):
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def request(self, url, data=None):
+        """送出請求（自動跟隨重新導向），回傳 (狀態碼, 內容, 最後的網址, 錯誤)"""
+        if data is not None:
+            data = urllib.parse.urlencode({**data, 'csrfmiddlewaretoken': self.csrf_token()}).encode()
+        request = urllib.request.Request(url, data=data, headers={'Referer': url})
+        try:
+            with self.opener.open(request, timeout=self.options['timeout']) as response:
+                return response.status, response.read().decode('utf-8', 'replace'), response.url, None
+        except urllib.error.HTTPError as e:
+            return e.code, e.read().decode('utf-8', 'replace'), url, e
+        except OSError as e:
+            return None, '', url, e
+
+    def login(self):
+        self.new_session()
+        status, body, _, error = self.request(self.urls['custom_login'])
+        if status != 200:
+            return classify(status, body, error)
+        status, body, final_url, error = self.request(
+            self.urls['custom_login'], {'username': self.username, 'password': self.password},
+        )
+        if status == 200 and urllib.parse.urlparse(final_url).path == reverse('custom_login'):
+            # 登入成功會導向儀表板，仍停在登入頁代表帳號或密碼錯誤
+            return 'login_failed'
+        return classify(status, body, error)
+
+    def add_revenue(self):
+        return self.request(self.urls['add_revenue'], {
+            'amount': self.rng.randrange(80, 400),
+            'category': self.rng.choice(['堂食', '外帶', '外送']),
+            'notes': 'load test',
+        })
+
+    def add_expense(self):
+        return self.request(self.urls['add_expense'], {
+            'expense_item': '壓力測試',
+            'expense_amount': self.rng.randrange(50, 500),
+            'expense_category': '日常支出',
+            'expense_notes': 'load test',
+        })
+
+    def browse(self):
+        today = date.today()
+        back = self.rng.randrange(self.options['months'])
+        year, month = divmod(today.year * 12 + today.month - 1 - back, 12)
+        query = urllib.parse.urlencode({'year': year, 'month': month + 1})
+        return self.request(f"{self.urls['sales_management']}?{query}")
+
+
+class Command(BaseCommand):
+    help = (
+        '以多個模擬店員對 gunicorn 執行的網站送出登入、連續記帳與瀏覽月份的混合流量，'
+        '回報吞吐量、延遲百分位數與錯誤率（含 SQLite 的 database is locked）。'
+        '會新增資料，請先以 seed_benchmark 建立測試帳號並在測試用資料庫執行'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='已啟動的伺服器網址；未指定時自動啟動本機 gunicorn')
+        parser.add_argument('--port', type=int, default=8765, help='自動啟動 gunicorn 時的連接埠（預設 8765）')
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn worker 數（預設 2）')
+        parser.add_argument('--threads', type=int, default=1, help='每個 gunicorn worker 的執行緒數（預設 1）')
+        parser.add_argument('--concurrency', type=int, default=10, help='同時的模擬店員數（預設 10）')
+        parser.add_argument('--duration', type=float, default=30, help='測試秒數（預設 30）')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=f'操作比例（預設 {DEFAULT_MIX}）')
+        parser.add_argument('--burst', type=int, default=5, help='每次連續記帳的筆數（預設 5）')
+        parser.add_argument('--months', type=int, default=12, help='瀏覽最近幾個月（預設 12）')
+        parser.add_argument('--timeout', type=float, default=30, help='單一請求逾時秒數（預設 30）')
+        parser.add_argument('--prefix', default='bench', help='seed_benchmark 的帳號前綴（預設 bench）')
+        parser.add_argument('--seed', type=int, default=42, help='亂數種子')
+        parser.add_argument('--output', help='將結果寫入 JSON 檔案（預設輸出到畫面）')
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        if options['concurrency'] < 1 or options['duration'] <= 0:
+            raise CommandError('--concurrency 與 --duration 必須大於 0')
+        usernames = list(
+            User.objects.filter(username__startswith=f"{options['prefix']}-", is_superuser=False)
+            .order_by('username').values_list('username', flat=True)
+        )
+        if not usernames:
+            raise CommandError('找不到測試帳號，請先執行 python manage.py seed_benchmark')
+
+        server = log = None
+        base_url = options['url']
+        if not base_url:
+            log = tempfile.NamedTemporaryFile('w+', prefix='load_test_', suffix='.log', delete=False)
+            server = self.start_server(options, log)
+            base_url = f"http://127.0.0.1:{options['port']}/"
+        try:
+            report = self.run(base_url, usernames, mix, options)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+
+        report['server'] = {'url': base_url}
+        if log is not None:
+            log.seek(0)
+            server_log = log.read()
+            log.close()
+            report['server'].update({
+                'workers': options['workers'],
+                'threads': options['threads'],
+                'log': log.name,
+                'locked_in_log': server_log.count(LOCKED_MESSAGE),
+            })
+
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f"結果已寫入 {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def start_server(self, options, log):
+        command = [
+            sys.executable, '-m', 'gunicorn', 'onecoco.wsgi:application',
+            '--bind', f"127.0.0.1:{options['port']}",
+            '--workers', str(options['workers']),
+            '--threads', str(options['threads']),
+        ]
+        try:
+            server = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, env=os.environ.copy())
+        except OSError as e:
+            raise CommandError(f'無法啟動 gunicorn：{e}')
+
+        url = f"http://127.0.0.1:{options['port']}{reverse('custom_login')}"
+        deadline = time.monotonic() + 20
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'gunicorn 已結束（請確認已安裝 requirements.txt），請查看 {log.name}')
+            try:
+                urllib.request.urlopen(url, timeout=1).close()
+                self.stderr.write(f'gunicorn 已啟動：{" ".join(command[2:])}')
+                return server
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError(f'gunicorn 未在 20 秒內啟動，請查看 {log.name}')
+
+    def run(self, base_url, usernames, mix, options):
+        timings = defaultdict(list)
+        outcomes = defaultdict(Counter)
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+
+        def timed(name, call):
+            started = time.perf_counter()
+            result = call()
+            elapsed = (time.perf_counter() - started) * 1000
+            outcome = result if isinstance(result, str) else classify(result[0], result[1], result[3])
+            with lock:
+                timings[name].append(elapsed)
+                outcomes[name][outcome] += 1
+            return outcome
+
+        def worker(index):
+            rng = random.Random(options['seed'] + index)
+            user = VirtualUser(base_url, usernames[index % len(usernames)], BENCH_PASSWORD, options, rng)
+            timed('login', user.login)
+            actions, weights = zip(*mix.items())
+            while time.monotonic() < deadline:
+                action = rng.choices(actions, weights)[0]
+                if action == 'login':
+                    timed('login', user.login)
+                elif action == 'browse':
+                    timed('sales_management', user.browse)
+                else:
+                    for number in range(options['burst']):
+                        if number % 2:
+                            timed('add_expense', user.add_expense)
+                        else:
+                            timed('add_revenue', user.add_revenue)
+
+        self.stderr.write(
+            f"以 {options['concurrency']} 個模擬店員對 {base_url} 測試 {options['duration']} 秒…"
+        )
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        operations = {}
+        totals = Counter()
+        for name, values in sorted(timings.items()):
+            counts = outcomes[name]
+            totals.update(counts)
+            operations[name] = {
+                'count': len(values),
+                'p50_ms': round(percentile(values, 0.5), 2),
+                'p95_ms': round(percentile(values, 0.95), 2),
+                'p99_ms': round(percentile(values, 0.99), 2),
+                'max_ms': round(max(values), 2),
+                'error_rate': round(1 - counts['ok'] / len(values), 4),
+                'outcomes': dict(counts),
+            }
+        total = sum(totals.values())
+        return {
+            'concurrency': options['concurrency'],
+            'duration_s': round(elapsed, 2),
+            'total_operations': total,
+            'throughput_per_s': round(total / elapsed, 2),
+            'error_rate': round(1 - totals['ok'] / total, 4) if total else 0,
+            'locked': totals['locked'],
+            'outcomes': dict(totals),
+            'operations': operations,
+        }
@@ -0,0 +1,92 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from onecoco import cache
+from reports import partitioning
+
+
+def parse_month(value):
+    try:
+        return datetime.strptime(value, '%Y-%m').date()
+    except ValueError:
+        raise CommandError(f'無效的月份：{value}（格式為 YYYY-MM）')
+
+
+class Command(BaseCommand):
+    help = (
+        '管理銷售、成本、支出資料表的每月分割表（僅 PostgreSQL）：'
+        'status 列出分割表，ensure 建立未來月份，convert 轉換尚未分割的資料表，detach 卸離舊月份'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', nargs='?', choices=['status', 'ensure', 'convert', 'detach'], default='status')
+        parser.add_argument('month', nargs='?', help='detach 的月份 (YYYY-MM)')
+        parser.add_argument('--months-ahead', type=int, default=partitioning.DEFAULT_MONTHS_AHEAD,
+                            help=f'預先建立未來幾個月的分割表（預設 {partitioning.DEFAULT_MONTHS_AHEAD}）')
+        parser.add_argument('--table', action='append', choices=[label.split('.')[0] for label in partitioning.LEDGER_MODELS],
+                            help='只處理指定的帳本（可重複指定，預設全部）')
+        parser.add_argument('--drop', action='store_true', help='detach 後直接刪除分割表（無法復原）')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='資料庫別名（預設 default）')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if not partitioning.is_supported(connection):
+            raise CommandError('只有 PostgreSQL 支援分割表')
+        if options['months_ahead'] < 0:
+            raise CommandError('--months-ahead 不能小於 0')
+        models = [
+            model for model in partitioning.ledger_models()
+            if not options['table'] or model._meta.app_label in options['table']
+        ]
+
+        try:
+            if options['action'] == 'status':
+                self.status(connection, models)
+            elif options['action'] == 'ensure':
+                for model in models:
+                    created = partitioning.ensure_partitions(connection, model, options['months_ahead'])
+                    self.stdout.write(f'{model._meta.db_table}：新建 {len(created)} 個分割表')
+            elif options['action'] == 'convert':
+                for model in models:
+                    count = partitioning.convert_table(connection, model, options['months_ahead'])
+                    self.stdout.write(f'{model._meta.db_table}：建立 {count} 個分割表')
+            else:
+                self.detach(connection, models, options)
+        except partitioning.PartitioningError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS('完成'))
+
+    def status(self, connection, models):
+        for model in models:
+            table = model._meta.db_table
+            if not partitioning.is_partitioned(connection, table):
+                self.stdout.write(f'{table}：尚未分割')
+                continue
+            partitions = partitioning.list_partitions(connection, model)
+            self.stdout.write(f'{table}：{len(partitions)} 個分割表')
+            for partition in partitions:
+                month = f"{partition['month']:%Y-%m}" if partition['month'] else 'DEFAULT'
+                self.stdout.write(f"  {month:<8} {partition['name']:<32} 約 {partition['rows']} 筆")
+
+    def detach(self, connection, models, options):
+        if not options['month']:
+            raise CommandError('detach 需要指定月份，例如 partition_ledgers detach 2024-01')
+        month = parse_month(options['month'])
+        if month >= partitioning.month_start(timezone.localdate()):
+            raise CommandError('只能卸離本月以前的月份')
+
+        start, end = partitioning.month_bounds(month)
+        store_ids = set()
+        for model in models:
+            store_ids.update(
+                model.objects.using(connection.alias)
+                .filter(date__gte=start, date__lt=end)
+                .values_list('store_id', flat=True).distinct()
+            )
+            name = partitioning.detach_partition(connection, model, month, drop=options['drop'])
+            self.stdout.write(f"{'已刪除' if options['drop'] else '已卸離'} {name}")
+        # 卸離的資料不再出現在銷售管理等明細頁面
+        cache.invalidate_stores(store_ids)
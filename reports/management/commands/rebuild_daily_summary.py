@@ -0,0 +1,32 @@
+from datetime import date
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from reports import rollup
+from reports.signals import LEDGER_MODELS
+
+
+class Command(BaseCommand):
+    help = '由銷售、成本、支出原始資料（包含已歸檔的月份）重建每日店面彙總'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--store', help='只重建指定店面ID')
+        parser.add_argument('--start', help='開始日期 (YYYY-MM-DD)')
+        parser.add_argument('--end', help='結束日期 (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        try:
+            start_date = date.fromisoformat(options['start']) if options['start'] else None
+            end_date = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError:
+            raise CommandError('日期格式必須為 YYYY-MM-DD')
+
+        count = rollup.rebuild(
+            [apps.get_model(label) for label in LEDGER_MODELS],
+            start_date=start_date,
+            end_date=end_date,
+            store_id=options['store'],
+            archived=True,
+        )
+        self.stdout.write(self.style.SUCCESS(f'已重建 {count} 筆每日彙總'))
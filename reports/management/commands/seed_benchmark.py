@@ -0,0 +1,217 @@
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import User
+from costs.models import Cost
+from expenses.models import Expense
+from onecoco import cache
+from reports import rollup
+from reports.models import ArchivedLedgerMonth, DailyStoreSummary
+from reports.signals import LEDGER_MODELS
+from sales.models import Sale
+
+BENCH_PASSWORD = 'bench12345'
+CHUNK_SIZE = 5000
+
+# 銷售類別比例與平均客單價
+SALE_MIX = [('堂食', 0.55, 180), ('外帶', 0.30, 150), ('外送', 0.15, 220)]
+
+# 每月固定成本：(類別, 說明, 日, 金額範圍)
+MONTHLY_COSTS = [
+    ('租金', '店面租金', 1, (45000, 80000)),
+    ('水電', '水電瓦斯', 5, (8000, 15000)),
+    ('人工', '員工薪資', 10, (90000, 160000)),
+]
+SUPPLIERS = ['大成食品', '永豐蔬果', '聯華食品', '全聯批發']
+EXPENSE_ITEMS = ['清潔用品', '外送平台手續費', '免洗餐具', '維修', '文具', '雜支']
+
+
+def store_ids(prefix, stores):
+    return [f'{prefix}-{index:03d}' for index in range(1, stores + 1)]
+
+
+def clear_benchmark_data(prefix):
+    """刪除測試店面的帳本資料（包含已歸檔的月份）與彙總（使用者保留供下次使用）"""
+    pattern = f'{prefix}-%'
+    stores = set(
+        DailyStoreSummary.objects.filter(store_id__startswith=f'{prefix}-')
+        .values_list('store_id', flat=True).distinct()
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        # 直接刪除：QuerySet.delete() 會對每一列觸發彙總 signal
+        for model in (Sale, Cost, Expense, ArchivedLedgerMonth, DailyStoreSummary):
+            cursor.execute(
+                f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)} WHERE store_id LIKE %s',
+                [pattern],
+            )
+        cache.invalidate_stores(stores)
+
+
+def ensure_users(prefix, stores, staff_per_store):
+    """建立（或沿用）每店的加盟商與員工，以及一位可看所有店面的超級使用者"""
+    password = make_password(BENCH_PASSWORD)
+    wanted = [User(
+        username=f'{prefix}-admin', store_id=f'{prefix}-001', role='founder',
+        is_staff=True, is_superuser=True, password=password,
+    )]
+    for store_id in store_ids(prefix, stores):
+        wanted.append(User(username=f'{store_id}-owner', store_id=store_id, role='franchisee', password=password))
+        for index in range(1, staff_per_store + 1):
+            wanted.append(User(username=f'{store_id}-staff{index}', store_id=store_id, role='staff', password=password))
+
+    existing = set(User.objects.filter(username__startswith=f'{prefix}-').values_list('username', flat=True))
+    User.objects.bulk_create([user for user in wanted if user.username not in existing])
+    cache.bump_version(cache.USERS_SCOPE)
+
+    users = {}
+    for user in User.objects.filter(username__startswith=f'{prefix}-').exclude(is_superuser=True):
+        users.setdefault(user.store_id, []).append(user)
+    return users
+
+
+class Command(BaseCommand):
+    help = '產生多店面、多年份的模擬加盟店資料（含午餐、晚餐尖峰與類別比例），供效能測試使用'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stores', type=int, default=3, help='店面數（預設 3）')
+        parser.add_argument('--years', type=float, default=1, help='年數（預設 1）')
+        parser.add_argument('--tickets-per-day', type=int, default=40, help='每店每日平均銷售筆數（預設 40）')
+        parser.add_argument('--staff-per-store', type=int, default=2, help='每店員工數（預設 2）')
+        parser.add_argument('--prefix', default='bench', help='測試店面與帳號的前綴（預設 bench）')
+        parser.add_argument('--seed', type=int, default=42, help='亂數種子')
+        parser.add_argument('--clear', action='store_true', help='先刪除同前綴的既有測試資料')
+
+    def handle(self, *args, **options):
+        if options['stores'] < 1 or options['years'] <= 0:
+            raise CommandError('--stores 與 --years 必須大於 0')
+        prefix = options['prefix']
+        if options['clear']:
+            clear_benchmark_data(prefix)
+
+        self.rng = random.Random(options['seed'])
+        users = ensure_users(prefix, options['stores'], options['staff_per_store'])
+        end_day = timezone.localdate()
+        start_day = end_day - timedelta(days=int(options['years'] * 365) - 1)
+
+        counts = {Sale: 0, Cost: 0, Expense: 0}
+        pending = {Sale: [], Cost: [], Expense: []}
+        for store_id in store_ids(prefix, options['stores']):
+            day = start_day
+            while day <= end_day:
+                for obj in self.day_rows(store_id, day, users[store_id], options['tickets_per_day']):
+                    rows = pending[type(obj)]
+                    rows.append(obj)
+                    if len(rows) >= CHUNK_SIZE:
+                        counts[type(obj)] += self.flush(type(obj), rows)
+                day += timedelta(days=1)
+        for model, rows in pending.items():
+            counts[model] += self.flush(model, rows)
+
+        # 大量寫入後一次重建彙總，比逐批 record_rows 快
+        ledger_models = [apps.get_model(label) for label in LEDGER_MODELS]
+        for store_id in store_ids(prefix, options['stores']):
+            rollup.rebuild(ledger_models, start_date=start_day, end_date=end_day, store_id=store_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"已建立 {options['stores']} 家店 {start_day} ~ {end_day} 的資料："
+            f'銷售 {counts[Sale]} 筆、成本 {counts[Cost]} 筆、支出 {counts[Expense]} 筆'
+            f'（帳號密碼 {BENCH_PASSWORD}）'
+        ))
+
+    def flush(self, model, rows):
+        with transaction.atomic():
+            model.objects.bulk_create(rows, batch_size=1000)
+        count = len(rows)
+        rows.clear()
+        return count
+
+    def at(self, day, hours):
+        """將當天的小時數（可含小數）轉為當地時間"""
+        hours = min(max(hours, 10), 21.99)
+        moment = datetime.combine(day, time.min) + timedelta(seconds=hours * 3600)
+        return timezone.make_aware(moment.replace(microsecond=self.rng.randrange(1_000_000)))
+
+    def day_rows(self, store_id, day, staff, tickets_per_day):
+        rng = self.rng
+        weekend = day.weekday() >= 5
+        tickets = max(0, int(rng.gauss(tickets_per_day * (1.3 if weekend else 1), tickets_per_day * 0.15)))
+
+        # 銷售：45% 午餐尖峰、40% 晚餐尖峰、其餘分散在營業時間
+        used = set()
+        for _ in range(tickets):
+            peak = rng.random()
+            if peak < 0.45:
+                hours = rng.gauss(12.25, 0.6)
+            elif peak < 0.85:
+                hours = rng.gauss(18.75, 0.8)
+            else:
+                hours = rng.uniform(10, 21.5)
+            moment = self.at(day, hours)
+            while moment in used:
+                moment += timedelta(microseconds=1)
+            used.add(moment)
+            category, mean = self.pick_category()
+            yield Sale(
+                date=moment,
+                amount=Decimal(max(50, int(rng.gauss(mean, mean * 0.35)))),
+                category=category,
+                description='營業收入',
+                store_id=store_id,
+                recorded_by=rng.choice(staff),
+            )
+
+        # 成本：每天進貨食材，每週營運費用，每月固定成本
+        yield Cost(
+            date=self.at(day, rng.uniform(10, 11)),
+            amount=Decimal(rng.randrange(1500, 4000)),
+            description='每日食材進貨',
+            category='食材',
+            supplier=rng.choice(SUPPLIERS),
+            store_id=store_id,
+            recorded_by=rng.choice(staff),
+        )
+        if day.weekday() == 0:
+            yield Cost(
+                date=self.at(day, 15),
+                amount=Decimal(rng.randrange(800, 3000)),
+                description='營運耗材',
+                category='營運費用',
+                store_id=store_id,
+                recorded_by=rng.choice(staff),
+            )
+        for category, description, day_of_month, (low, high) in MONTHLY_COSTS:
+            if day.day == day_of_month:
+                yield Cost(
+                    date=self.at(day, 16),
+                    amount=Decimal(rng.randrange(low, high)),
+                    description=description,
+                    category=category,
+                    store_id=store_id,
+                    recorded_by=staff[0],
+                )
+
+        # 支出：每天 0 到 3 筆零星支出
+        for _ in range(rng.randrange(4)):
+            yield Expense(
+                date=self.at(day, rng.uniform(10, 21)),
+                amount=Decimal(rng.randrange(50, 800)),
+                item_name=rng.choice(EXPENSE_ITEMS),
+                category='日常支出',
+                store_id=store_id,
+                recorded_by=rng.choice(staff),
+            )
+
+    def pick_category(self):
+        value = self.rng.random()
+        for category, share, mean in SALE_MIX:
+            if value < share:
+                return category, mean
+            value -= share
+        return SALE_MIX[-1][0], SALE_MIX[-1][2]
@@ -0,0 +1,79 @@
+from datetime import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# 帳本模型與彙總欄位前綴（與建立時的 reports.rollup.LEDGER_PREFIXES 相同）
+LEDGER_PREFIXES = [
+    ('sales', 'Sale', 'sales'),
+    ('costs', 'Cost', 'cost'),
+    ('expenses', 'Expense', 'expense'),
+]
+
+
+def business_date(value):
+    """當地時區的營業日"""
+    if isinstance(value, datetime):
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return timezone.localdate(value)
+    return value
+
+
+def build_summaries(apps, schema_editor):
+    """
+    由既有帳本資料建立每日彙總
+
+    固定寫在遷移中，只使用歷史模型，之後 reports.rollup 的修改不會影響這個遷移；
+    之後需要重建時請使用 python manage.py rebuild_daily_summary。
+    """
+    summary_model = apps.get_model('reports', 'DailyStoreSummary')
+    summaries = {}
+    for app_label, model_name, prefix in LEDGER_PREFIXES:
+        model = apps.get_model(app_label, model_name)
+        rows = model._default_manager.order_by().values_list('store_id', 'date', 'category', 'amount')
+        for store_id, date, category, amount in rows.iterator(chunk_size=2000):
+            key = (store_id, business_date(date), category or '')
+            if key not in summaries:
+                summaries[key] = summary_model(store_id=key[0], date=key[1], category=key[2])
+            summary = summaries[key]
+            setattr(summary, f'{prefix}_total', getattr(summary, f'{prefix}_total') + amount)
+            setattr(summary, f'{prefix}_count', getattr(summary, f'{prefix}_count') + 1)
+    summary_model._default_manager.bulk_create(summaries.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+        ('sales', '0002_convert_date_to_datetime'),
+        ('costs', '0003_add_selling_price'),
+        ('expenses', '0003_expense_store_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStoreSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('store_id', models.CharField(max_length=50, verbose_name='店面ID')),
+                ('date', models.DateField(help_text='以 TIME_ZONE 當地時間計算的營業日', verbose_name='營業日期')),
+                ('category', models.CharField(blank=True, max_length=20, verbose_name='類別')),
+                ('sales_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='銷售總額')),
+                ('sales_count', models.IntegerField(default=0, verbose_name='銷售筆數')),
+                ('cost_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='成本總額')),
+                ('cost_count', models.IntegerField(default=0, verbose_name='成本筆數')),
+                ('expense_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='支出總額')),
+                ('expense_count', models.IntegerField(default=0, verbose_name='支出筆數')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新時間')),
+            ],
+            options={
+                'verbose_name': '每日店面彙總',
+                'verbose_name_plural': '每日店面彙總',
+                'ordering': ['-date', 'store_id', 'category'],
+                'indexes': [models.Index(fields=['date', 'store_id'], name='reports_dai_date_b78c19_idx')],
+                'constraints': [models.UniqueConstraint(fields=('store_id', 'date', 'category'), name='reports_daily_summary_key')],
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
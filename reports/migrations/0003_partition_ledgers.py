@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    保留編號讓之後的遷移維持相同的相依順序，不做任何事
+
+    帳本資料表的每月分割會複製整張資料表並修改主鍵與唯一限制，不在 migrate 中自動執行，
+    需要時由維運人員以 python manage.py partition_ledgers convert 手動轉換（見 reports/partitioning.py）。
+    """
+
+    dependencies = [
+        ('reports', '0002_dailystoresummary'),
+        ('sales', '0004_normalize_date_only_values'),
+        ('costs', '0004_normalize_date_only_values'),
+        ('expenses', '0003_expense_store_id'),
+    ]
+
+    operations = []
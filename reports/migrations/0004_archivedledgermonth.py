@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_partition_ledgers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedLedgerMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ledger', models.CharField(help_text='帳本模型，例如 sales.Sale', max_length=20, verbose_name='帳本')),
+                ('store_id', models.CharField(max_length=50, verbose_name='店面ID')),
+                ('month', models.DateField(help_text='該月第一天（TIME_ZONE 當地時間）', verbose_name='月份')),
+                ('row_count', models.IntegerField(default=0, verbose_name='筆數')),
+                ('raw_size', models.IntegerField(default=0, help_text='位元組', verbose_name='壓縮前大小')),
+                ('data', models.BinaryField(help_text='zlib 壓縮的 JSON：{"columns": [...], "rows": [[...], ...]}', verbose_name='壓縮資料')),
+                ('archived_at', models.DateTimeField(auto_now=True, verbose_name='歸檔時間')),
+            ],
+            options={
+                'verbose_name': '歸檔帳本月份',
+                'verbose_name_plural': '歸檔帳本月份',
+                'ordering': ['-month', 'ledger', 'store_id'],
+                'indexes': [models.Index(fields=['ledger', 'month'], name='reports_arc_ledger_de3171_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='archivedledgermonth',
+            constraint=models.UniqueConstraint(fields=('ledger', 'store_id', 'month'), name='reports_archived_ledger_month_key'),
+        ),
+    ]
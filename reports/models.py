@@ -1,6 +1,11 @@
+from decimal import Decimal
+
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+# profit_margin 欄位為 max_digits=5, decimal_places=2
+PROFIT_MARGIN_LIMIT = Decimal('999.99')
+
 
 class Report(models.Model):
     """報表模型"""
@@ -125,9 +130,10 @@ class Report(models.Model):
         return f"{self.profit_margin:.2f}%"
     
     def calculate_profit_margin(self):
-        """計算利潤率"""
+        """計算利潤率（限制在欄位可儲存的範圍內）"""
         if self.total_sales > 0:
-            self.profit_margin = (self.net_profit / self.total_sales) * 100
+            margin = (Decimal(self.net_profit) / Decimal(self.total_sales) * 100).quantize(Decimal('0.01'))
+            self.profit_margin = max(min(margin, PROFIT_MARGIN_LIMIT), -PROFIT_MARGIN_LIMIT)
         else:
             self.profit_margin = 0
     
@@ -196,3 +202,139 @@ class ReportTemplate(models.Model):
             ).update(is_default=False)
         super().save(*args, **kwargs)
 
+
+
+class DailyStoreSummary(models.Model):
+    """每日店面財務彙總（由銷售、成本、支出異動時增量維護）"""
+    
+    store_id = models.CharField(
+        max_length=50,
+        verbose_name='店面ID'
+    )
+    
+    date = models.DateField(
+        verbose_name='營業日期',
+        help_text='以 TIME_ZONE 當地時間計算的營業日'
+    )
+    
+    category = models.CharField(
+        max_length=20,
+        blank=True,
+        verbose_name='類別'
+    )
+    
+    sales_total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name='銷售總額'
+    )
+    
+    sales_count = models.IntegerField(
+        default=0,
+        verbose_name='銷售筆數'
+    )
+    
+    cost_total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name='成本總額'
+    )
+    
+    cost_count = models.IntegerField(
+        default=0,
+        verbose_name='成本筆數'
+    )
+    
+    expense_total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name='支出總額'
+    )
+    
+    expense_count = models.IntegerField(
+        default=0,
+        verbose_name='支出筆數'
+    )
+    
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='更新時間'
+    )
+    
+    class Meta:
+        verbose_name = '每日店面彙總'
+        verbose_name_plural = '每日店面彙總'
+        ordering = ['-date', 'store_id', 'category']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['store_id', 'date', 'category'],
+                name='reports_daily_summary_key',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'store_id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} - {self.store_id} - {self.category}"
+
+
+class ArchivedLedgerMonth(models.Model):
+    """已歸檔的帳本資料：單一店面單一月份的銷售、成本或支出，壓縮後存成一列（見 reports/archive.py）"""
+    
+    ledger = models.CharField(
+        max_length=20,
+        verbose_name='帳本',
+        help_text='帳本模型，例如 sales.Sale'
+    )
+    
+    store_id = models.CharField(
+        max_length=50,
+        verbose_name='店面ID'
+    )
+    
+    month = models.DateField(
+        verbose_name='月份',
+        help_text='該月第一天（TIME_ZONE 當地時間）'
+    )
+    
+    row_count = models.IntegerField(
+        default=0,
+        verbose_name='筆數'
+    )
+    
+    raw_size = models.IntegerField(
+        default=0,
+        verbose_name='壓縮前大小',
+        help_text='位元組'
+    )
+    
+    data = models.BinaryField(
+        verbose_name='壓縮資料',
+        help_text='zlib 壓縮的 JSON：{"columns": [...], "rows": [[...], ...]}'
+    )
+    
+    archived_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='歸檔時間'
+    )
+    
+    class Meta:
+        verbose_name = '歸檔帳本月份'
+        verbose_name_plural = '歸檔帳本月份'
+        ordering = ['-month', 'ledger', 'store_id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ledger', 'store_id', 'month'],
+                name='reports_archived_ledger_month_key',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['ledger', 'month']),
+        ]
+    
+    def __str__(self):
+        return f"{self.ledger} - {self.store_id} - {self.month:%Y-%m}"
@@ -0,0 +1,355 @@
+"""
+PostgreSQL 上銷售、成本、支出資料表的每月分割（declarative range partitioning）
+
+頁面與報表的查詢都以 date 區間篩選，分割後只會掃描相關月份的分割表
+（例如銷售管理的單月查詢只讀一個分割表），舊月份也可以直接卸離（DETACH），
+不必逐列刪除。
+
+- 分割界線是 settings.TIME_ZONE 的每月一日零時，與頁面的月份範圍一致
+- 另有一個 DEFAULT 分割表接住沒有對應月份的資料，新增資料永遠不會因為缺少分割表而失敗；
+  之後建立該月份的分割表時會把資料從 DEFAULT 搬過去
+- 主鍵改為 (id, date)：分割表的唯一限制必須包含分割欄位。Django 仍以 id 查詢，不受影響
+- 不含 date 的唯一限制（例如銷售的 (store_id, idempotency_key)）改為在每個分割表各自建立，
+  同一個月內仍由資料庫保證唯一，跨月份的重複則由程式先查詢既有資料避免
+
+轉換（convert_table）需要停機，只由 partition_ledgers convert 指令手動執行，migrate 不會自動轉換；
+轉換後的主鍵與唯一限制不在 Django 的遷移紀錄中。
+SQLite 不支援分割，所有函式在非 PostgreSQL 的連線上都不會做任何事。
+"""
+
+import hashlib
+from datetime import datetime
+
+from django.apps import apps as django_apps
+from django.db import transaction
+from django.utils import timezone
+
+from .signals import LEDGER_MODELS
+
+PARTITION_FIELD = 'date'
+
+# 預先建立未來幾個月的分割表
+DEFAULT_MONTHS_AHEAD = 3
+
+# 轉換既有資料表時，最多為過去幾個月建立分割表，更早的資料放在 DEFAULT 分割表
+MAX_BACKFILL_MONTHS = 120
+
+
+class PartitioningError(Exception):
+    """無法分割或操作分割表"""
+
+
+def is_supported(connection):
+    return connection.vendor == 'postgresql'
+
+
+def month_start(value):
+    """日期或日期時間所在月份的第一天（date）"""
+    if isinstance(value, datetime):
+        value = timezone.localtime(value) if timezone.is_aware(value) else value
+        value = value.date()
+    return value.replace(day=1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def month_bounds(month):
+    """月份分割表的範圍 [起, 迄)，為當地時區的每月一日零時"""
+    start = timezone.make_aware(datetime(month.year, month.month, 1))
+    end = timezone.make_aware(datetime.combine(add_months(month, 1), datetime.min.time()))
+    return start, end
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y_%m}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def _quote(connection, name):
+    return connection.ops.quote_name(name)
+
+
+def _partition_column(model):
+    return model._meta.get_field(PARTITION_FIELD).column
+
+
+def local_unique_columns(model):
+    """不含分割欄位、只能在各分割表各自建立的唯一限制欄位"""
+    field_sets = [tuple(fields) for fields in model._meta.unique_together]
+    field_sets += [tuple(constraint.fields) for constraint in model._meta.total_unique_constraints]
+    return [
+        [model._meta.get_field(name).column for name in fields]
+        for fields in field_sets
+        if PARTITION_FIELD not in fields
+    ]
+
+
+def _local_unique_index_name(partition, columns):
+    digest = hashlib.md5(','.join(columns).encode()).hexdigest()[:8]
+    return f'{partition[:50]}_{digest}_uniq'
+
+
+def is_partitioned(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table])
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def list_partitions(connection, model):
+    """
+    回傳資料表的分割表 [{'name', 'month', 'rows'}]，依月份排序；
+    DEFAULT 分割表的 month 為 None，rows 為估計值（ANALYZE 後的統計）
+    """
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname, child.reltuples::bigint
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+            """,
+            [table],
+        )
+        rows = cursor.fetchall()
+    partitions = []
+    prefix = f'{table}_p'
+    for name, estimate in rows:
+        month = None
+        if name.startswith(prefix):
+            try:
+                month = datetime.strptime(name[len(prefix):], '%Y_%m').date()
+            except ValueError:
+                pass
+        partitions.append({'name': name, 'month': month, 'rows': max(estimate, 0)})
+    partitions.sort(key=lambda partition: (partition['month'] is None, partition['month']))
+    return partitions
+
+
+def _create_local_unique_indexes(connection, model, partition):
+    with connection.cursor() as cursor:
+        for columns in local_unique_columns(model):
+            cursor.execute(
+                f'CREATE UNIQUE INDEX IF NOT EXISTS {_quote(connection, _local_unique_index_name(partition, columns))} '
+                f'ON {_quote(connection, partition)} ({", ".join(_quote(connection, c) for c in columns)})'
+            )
+
+
+def create_partition(connection, model, month):
+    """
+    建立月份分割表；DEFAULT 分割表中已有該月份的資料時先搬到新的分割表再掛上
+
+    回傳是否有建立新的分割表。
+    """
+    table = model._meta.db_table
+    name = partition_name(table, month)
+    default = default_partition_name(table)
+    column = _partition_column(model)
+    start, end = month_bounds(month)
+    q = lambda identifier: _quote(connection, identifier)
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [name])
+        if cursor.fetchone()[0] is not None:
+            return False
+        cursor.execute(
+            f'SELECT 1 FROM ONLY {q(default)} WHERE {q(column)} >= %s AND {q(column)} < %s LIMIT 1',
+            [start, end],
+        )
+        if cursor.fetchone() is None:
+            cursor.execute(
+                f'CREATE TABLE {q(name)} PARTITION OF {q(table)} FOR VALUES FROM (%s) TO (%s)',
+                [start, end],
+            )
+        else:
+            cursor.execute(f'CREATE TABLE {q(name)} (LIKE {q(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM ONLY {q(default)} WHERE {q(column)} >= %s AND {q(column)} < %s RETURNING *) '
+                f'INSERT INTO {q(name)} SELECT * FROM moved',
+                [start, end],
+            )
+            cursor.execute(
+                f'ALTER TABLE {q(table)} ATTACH PARTITION {q(name)} FOR VALUES FROM (%s) TO (%s)',
+                [start, end],
+            )
+    _create_local_unique_indexes(connection, model, name)
+    return True
+
+
+def ensure_partitions(connection, model, months_ahead=DEFAULT_MONTHS_AHEAD, today=None):
+    """建立本月到未來 months_ahead 個月之間缺少的分割表，回傳新建立的分割表名稱"""
+    if not is_supported(connection) or not is_partitioned(connection, model._meta.db_table):
+        return []
+    current = month_start(today or timezone.localdate())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if create_partition(connection, model, month):
+            created.append(partition_name(model._meta.db_table, month))
+    return created
+
+
+def convert_table(connection, model, months_ahead=DEFAULT_MONTHS_AHEAD, today=None):
+    """
+    將既有的一般資料表轉換為每月分割表（資料全部複製一次，大型資料表需預留停機時間）
+
+    回傳建立的分割表數量；已經分割過的資料表回傳 0。
+    """
+    table = model._meta.db_table
+    if not is_supported(connection) or is_partitioned(connection, table):
+        return 0
+    legacy = f'{table}_unpartitioned'
+    column = _partition_column(model)
+    pk_column = model._meta.pk.column
+    q = lambda identifier: _quote(connection, identifier)
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conname, conrelid::regclass::text FROM pg_constraint "
+            "WHERE confrelid = to_regclass(%s) AND contype = 'f'",
+            [table],
+        )
+        referencing = cursor.fetchall()
+        if referencing:
+            raise PartitioningError(
+                f'{table} 被其他資料表的外鍵參照，無法分割：'
+                + ', '.join(f'{source}.{name}' for name, source in referencing)
+            )
+
+        # 轉換前記下主鍵以外的限制與索引，新的資料表建好後再依序重建
+        # 最後一欄為是否包含分割欄位
+        cursor.execute(
+            """
+            SELECT c.conname, c.contype, pg_get_constraintdef(c.oid), EXISTS (
+                SELECT 1 FROM pg_attribute a
+                WHERE a.attrelid = c.conrelid AND a.attnum = ANY(c.conkey) AND a.attname = %s
+            )
+            FROM pg_constraint c
+            WHERE c.conrelid = to_regclass(%s) AND c.contype IN ('u', 'f')
+            """,
+            [column, table],
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT pg_get_indexdef(x.indexrelid), x.indisunique, EXISTS (
+                SELECT 1 FROM pg_attribute a
+                WHERE a.attrelid = x.indrelid AND a.attnum = ANY(x.indkey) AND a.attname = %s
+            )
+            FROM pg_index x
+            WHERE x.indrelid = to_regclass(%s)
+            AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid AND c.conrelid = x.indrelid)
+            """,
+            [column, table],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT attidentity FROM pg_attribute WHERE attrelid = to_regclass(%s) AND attname = %s",
+            [table, pk_column],
+        )
+        is_identity = bool(cursor.fetchone()[0])
+        cursor.execute(
+            f'SELECT MIN({q(column)}), MAX({q(pk_column)}) FROM {q(table)}'
+        )
+        oldest, max_id = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE {q(table)} RENAME TO {q(legacy)}')
+        cursor.execute(
+            f'CREATE TABLE {q(table)} (LIKE {q(legacy)} INCLUDING ALL EXCLUDING INDEXES) '
+            f'PARTITION BY RANGE ({q(column)})'
+        )
+        if not is_identity:
+            # serial 欄位的序列屬於舊資料表，刪除舊資料表前改由新資料表擁有
+            # （identity 欄位由 LIKE ... INCLUDING IDENTITY 建立新的序列）
+            cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [legacy, pk_column])
+            legacy_sequence = cursor.fetchone()[0]
+            if legacy_sequence:
+                cursor.execute(f'ALTER SEQUENCE {legacy_sequence} OWNED BY {q(table)}.{q(pk_column)}')
+        cursor.execute(f'CREATE TABLE {q(default_partition_name(table))} PARTITION OF {q(table)} DEFAULT')
+
+        current = month_start(today or timezone.localdate())
+        first = month_start(oldest) if oldest else current
+        first = max(first, add_months(current, -MAX_BACKFILL_MONTHS))
+        month, count = first, 0
+        while month <= add_months(current, months_ahead):
+            start, end = month_bounds(month)
+            cursor.execute(
+                f'CREATE TABLE {q(partition_name(table, month))} PARTITION OF {q(table)} '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [start, end],
+            )
+            month, count = add_months(month, 1), count + 1
+
+        cursor.execute(f'INSERT INTO {q(table)} SELECT * FROM {q(legacy)}')
+        cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [table, pk_column])
+        sequence = cursor.fetchone()[0]
+        if sequence and max_id is not None:
+            cursor.execute('SELECT setval(%s, %s)', [sequence, max_id])
+        cursor.execute(f'DROP TABLE {q(legacy)}')
+
+        # 在分割後的資料表重建主鍵、限制與索引（會同時建立在每個分割表上）
+        cursor.execute(
+            f'ALTER TABLE {q(table)} ADD CONSTRAINT {q(table + "_pkey")} '
+            f'PRIMARY KEY ({q(pk_column)}, {q(column)})'
+        )
+        # 不含分割欄位的唯一限制與唯一索引無法建立在分割後的資料表上，改由 local_unique_columns 在各分割表建立
+        for name, kind, definition, has_partition_column in constraints:
+            if kind == 'f' or has_partition_column:
+                cursor.execute(f'ALTER TABLE {q(table)} ADD CONSTRAINT {q(name)} {definition}')
+        for definition, unique, has_partition_column in indexes:
+            if not unique or has_partition_column:
+                cursor.execute(definition)
+
+    for partition in list_partitions(connection, model):
+        _create_local_unique_indexes(connection, model, partition['name'])
+    with connection.cursor() as cursor:
+        cursor.execute(f'ANALYZE {q(table)}')
+    return count
+
+
+def detach_partition(connection, model, month, drop=False):
+    """
+    卸離（可選刪除）月份分割表，回傳分割表名稱
+
+    卸離只修改資料表定義，不論資料多少都很快；卸離後的資料表保留原名，
+    可備份後刪除，或再以 ALTER TABLE ... ATTACH PARTITION 掛回。
+    每日店面彙總不受影響，報表與利潤分析仍包含該月份的統計。
+    """
+    table = model._meta.db_table
+    name = partition_name(table, month)
+    if not is_supported(connection):
+        raise PartitioningError('只有 PostgreSQL 支援分割表')
+    if name not in {partition['name'] for partition in list_partitions(connection, model)}:
+        raise PartitioningError(f'{table} 沒有 {month:%Y-%m} 的分割表')
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {_quote(connection, table)} DETACH PARTITION {_quote(connection, name)}')
+        if drop:
+            cursor.execute(f'DROP TABLE {_quote(connection, name)}')
+    return name
+
+
+def ledger_models():
+    return [django_apps.get_model(label) for label in LEDGER_MODELS]
+
+
+def ensure_after_migrate(using, apps=None, **kwargs):
+    """post_migrate：每次部署執行 migrate 時順便補建未來月份的分割表"""
+    from django.db import connections
+
+    connection = connections[using]
+    if not is_supported(connection):
+        return
+    for label in LEDGER_MODELS:
+        try:
+            model = (apps or django_apps).get_model(label)
+        except LookupError:
+            # 遷移回更早的版本時資料表可能不存在
+            continue
+        ensure_partitions(connection, model)
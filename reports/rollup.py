@@ -0,0 +1,212 @@
+"""
+每日店面彙總（DailyStoreSummary）的增量維護與查詢
+
+銷售、成本、支出每次新增、修改、刪除時，只把差額套用到對應的
+(店面, 營業日, 類別) 彙總列上，頁面統計改讀彙總表，不再掃描整月原始資料。
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from itertools import chain
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from onecoco import cache
+from .models import DailyStoreSummary
+
+# 帳本模型與彙總欄位前綴的對應
+LEDGER_PREFIXES = {
+    'sales.Sale': 'sales',
+    'costs.Cost': 'cost',
+    'expenses.Expense': 'expense',
+}
+
+SUMMARY_FIELDS = [
+    f'{prefix}_{suffix}'
+    for prefix in LEDGER_PREFIXES.values()
+    for suffix in ('total', 'count')
+]
+
+
+def ledger_prefix(model):
+    """取得帳本模型對應的彙總欄位前綴"""
+    return LEDGER_PREFIXES.get(model._meta.label)
+
+
+def business_date(value):
+    """將日期時間換算為當地時區的營業日"""
+    if isinstance(value, datetime):
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return timezone.localdate(value)
+    return value
+
+
+def _row_values(row):
+    """從模型實例或 values() 字典取出彙總所需欄位"""
+    if isinstance(row, dict):
+        return row['store_id'], row['date'], row.get('category'), row['amount']
+    return row.store_id, row.date, row.category, row.amount
+
+
+def apply_changes(model, changes):
+    """
+    套用一批異動到彙總表
+
+    changes 為 (row, sign) 的可迭代物件，sign 為 1（新增）或 -1（移除）。
+    同一彙總列的差額會先合併，每個彙總列只發出一次 UPDATE。
+    """
+    prefix = ledger_prefix(model)
+    if prefix is None:
+        return
+
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for row, sign in changes:
+        store_id, date, category, amount = _row_values(row)
+        key = (store_id, business_date(date), category or '')
+        deltas[key][0] += Decimal(str(amount or 0)) * sign
+        deltas[key][1] += sign
+
+    with transaction.atomic():
+        for key, (amount, count) in deltas.items():
+            if amount or count:
+                _apply_delta(prefix, key, amount, count)
+        cache.invalidate_stores({store_id for store_id, _, _ in deltas})
+
+
+def record(instance, sign=1):
+    """將單筆帳本資料計入（或移出）彙總"""
+    apply_changes(type(instance), [(instance, sign)])
+
+
+def record_rows(model, rows, sign=1):
+    """將多筆帳本資料計入（或移出）彙總，供 bulk_create 等不觸發 signal 的路徑使用"""
+    apply_changes(model, ((row, sign) for row in rows))
+
+
+def _apply_delta(prefix, key, amount, count):
+    store_id, date, category = key
+    total_field = f'{prefix}_total'
+    count_field = f'{prefix}_count'
+    summary = DailyStoreSummary.objects.filter(
+        store_id=store_id, date=date, category=category
+    )
+    changes = {
+        total_field: F(total_field) + amount,
+        count_field: F(count_field) + count,
+        'updated_at': timezone.now(),
+    }
+    if summary.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            DailyStoreSummary.objects.create(
+                store_id=store_id,
+                date=date,
+                category=category,
+                **{total_field: amount, count_field: count},
+            )
+    except IntegrityError:
+        # 其他請求剛好先建立了同一列
+        summary.update(**changes)
+
+
+def summary_queryset(start_date, end_date, store_id=None):
+    """取得日期區間（含起訖日）內的彙總列"""
+    qs = DailyStoreSummary.objects.filter(date__gte=start_date, date__lte=end_date)
+    if store_id:
+        qs = qs.filter(store_id=store_id)
+    return qs
+
+
+def totals(start_date, end_date, store_id=None):
+    """以單一聚合查詢取得區間內銷售、成本、支出的總額與筆數"""
+    result = summary_queryset(start_date, end_date, store_id).aggregate(
+        **{field: Sum(field) for field in SUMMARY_FIELDS}
+    )
+    return {
+        field: value or (Decimal('0') if field.endswith('_total') else 0)
+        for field, value in result.items()
+    }
+
+
+def monthly_category_totals(start_date, end_date, store_id=None):
+    """
+    以單一分組查詢取得區間內每月、每類別的銷售、成本、支出總額
+
+    彙總表的日期已是 TIME_ZONE 當地的營業日，直接以 TruncMonth 分月即可。
+    """
+    return list(
+        summary_queryset(start_date, end_date, store_id)
+        .annotate(month=TruncMonth('date'))
+        .order_by()
+        .values('month', 'category')
+        .annotate(**{field: Sum(field) for field in SUMMARY_FIELDS})
+        .order_by('month', 'category')
+    )
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def rebuild(ledger_models, summary_model=DailyStoreSummary,
+            start_date=None, end_date=None, store_id=None, archived=False):
+    """
+    由原始帳本重建彙總表
+
+    以 iterator() 逐批讀取原始資料並在 Python 端依營業日分組：舊資料中有
+    只含日期的 datetime 值，SQLite 的時區轉換函式無法處理，無法用 TruncDate。
+    summary_model 與 ledger_models 可傳入遷移中的歷史模型。
+    archived=True 時一併讀取已歸檔的資料（reports.archive），遷移中不可使用。
+    """
+    summaries = {}
+
+    for model in ledger_models:
+        prefix = LEDGER_PREFIXES[model._meta.label]
+        filters = {}
+        if store_id:
+            filters['store_id'] = store_id
+        if start_date:
+            filters['date__gte'] = _day_start(start_date)
+        if end_date:
+            filters['date__lt'] = _day_start(end_date + timedelta(days=1))
+
+        columns = ('store_id', 'date', 'category', 'amount')
+        rows = model._default_manager.order_by().filter(**filters).values_list(*columns).iterator(chunk_size=2000)
+        if archived:
+            from .archive import ArchiveQuery
+            rows = chain(rows, ArchiveQuery(model, **filters).iter_values(*columns))
+        for row_store_id, date, category, amount in rows:
+            key = (row_store_id, business_date(date), category or '')
+            if key not in summaries:
+                summaries[key] = summary_model(
+                    store_id=key[0], date=key[1], category=key[2]
+                )
+            summary = summaries[key]
+            setattr(summary, f'{prefix}_total',
+                    getattr(summary, f'{prefix}_total') + amount)
+            setattr(summary, f'{prefix}_count',
+                    getattr(summary, f'{prefix}_count') + 1)
+
+    with transaction.atomic():
+        stale = summary_model._default_manager.all()
+        if store_id:
+            stale = stale.filter(store_id=store_id)
+        if start_date:
+            stale = stale.filter(date__gte=start_date)
+        if end_date:
+            stale = stale.filter(date__lte=end_date)
+        affected_stores = {store_id} if store_id else (
+            set(stale.values_list('store_id', flat=True).distinct())
+            | {key[0] for key in summaries}
+        )
+        stale.delete()
+        summary_model._default_manager.bulk_create(summaries.values(), batch_size=500)
+        cache.invalidate_stores(affected_stores)
+
+    return len(summaries)
@@ -0,0 +1,35 @@
+from rest_framework import serializers
+
+from onecoco.api import SparseFieldsMixin
+from .models import Report
+
+
+class ReportSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """報表序列化器；金額欄位由報表產生引擎計算，不接受輸入"""
+
+    report_type_display = serializers.CharField(source='get_report_type_display', read_only=True)
+
+    class Meta:
+        model = Report
+        fields = [
+            'id', 'name', 'report_type', 'report_type_display', 'start_date', 'end_date',
+            'store_id', 'total_sales', 'total_costs', 'net_profit', 'profit_margin',
+            'notes', 'created_by', 'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'name', 'total_sales', 'total_costs', 'net_profit', 'profit_margin',
+            'created_by', 'created_at', 'updated_at'
+        ]
+        extra_kwargs = {
+            'store_id': {'required': False},
+            'end_date': {'required': False},
+        }
+
+    def validate(self, attrs):
+        """自定義報表需指定結束日期；其他類型依開始日期推算期間"""
+        end_date = attrs.get('end_date')
+        if attrs.get('report_type') == 'custom' and not end_date:
+            raise serializers.ValidationError({'end_date': '自定義報表必須指定結束日期'})
+        if end_date and end_date < attrs['start_date']:
+            raise serializers.ValidationError({'end_date': '結束日期不可早於開始日期'})
+        return attrs
@@ -0,0 +1,59 @@
+"""
+帳本異動時同步更新每日店面彙總
+
+Sale、Cost、Expense 在頁面、Django Admin 或程式中經由 save()/delete()
+異動時都會經過這裡；bulk_create 與 QuerySet.update() 不會觸發 signal，
+需自行呼叫 reports.rollup.record_rows()。
+"""
+
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from onecoco import cache
+from . import rollup
+
+LEDGER_MODELS = ['sales.Sale', 'costs.Cost', 'expenses.Expense']
+
+
+def capture_previous(sender, instance, raw=False, **kwargs):
+    """修改前記下舊值，以便儲存後扣除"""
+    if raw or instance.pk is None:
+        return
+    instance._summary_previous = (
+        sender._default_manager
+        .filter(pk=instance.pk)
+        .values('store_id', 'date', 'category', 'amount')
+        .first()
+    )
+
+
+def update_on_save(sender, instance, raw=False, **kwargs):
+    """新增或修改後更新彙總"""
+    if raw:
+        return
+    changes = [(instance, 1)]
+    previous = instance.__dict__.pop('_summary_previous', None)
+    if previous:
+        changes.append((previous, -1))
+    rollup.apply_changes(sender, changes)
+
+
+def update_on_delete(sender, instance, **kwargs):
+    """刪除後從彙總扣除"""
+    rollup.record(instance, sign=-1)
+
+
+def invalidate_reports(sender, **kwargs):
+    """報表異動後讓 API 的 ETag 失效"""
+    cache.bump_version(cache.REPORTS_SCOPE)
+
+
+def connect():
+    report = apps.get_model('reports.Report')
+    post_save.connect(invalidate_reports, sender=report, dispatch_uid='reports_cache_post_save')
+    post_delete.connect(invalidate_reports, sender=report, dispatch_uid='reports_cache_post_delete')
+    for label in LEDGER_MODELS:
+        model = apps.get_model(label)
+        pre_save.connect(capture_previous, sender=model, dispatch_uid=f'summary_pre_save_{label}')
+        post_save.connect(update_on_save, sender=model, dispatch_uid=f'summary_post_save_{label}')
+        post_delete.connect(update_on_delete, sender=model, dispatch_uid=f'summary_post_delete_{label}')
@@ -0,0 +1,105 @@
+from datetime import date, datetime
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from sales.models import Sale
+
+from . import partitioning
+
+TODAY = date(2024, 6, 15)
+
+
+@skipUnless(connection.vendor == 'postgresql', '分割表只有 PostgreSQL 支援')
+class PartitioningTests(TestCase):
+    """reports.partitioning 在 PostgreSQL 上的轉換、補建、卸離（每個測試結束後交易回復，資料表恢復原狀）"""
+
+    def setUp(self):
+        # 外鍵預設延遲檢查，同一個交易中有待檢查的資料列時無法 ALTER TABLE
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        self.user = get_user_model().objects.create_user(username='partition', password='x', store_id='s1')
+        for month in (3, 4, 5, 6):
+            for day in (1, 10, 28):
+                self.sale(datetime(2024, month, day, 12))
+        self.max_id = Sale.objects.order_by('-pk').values_list('pk', flat=True).first()
+
+    def sale(self, moment, **kwargs):
+        return Sale.objects.create(
+            date=timezone.make_aware(moment), amount=Decimal('100'), store_id='s1', recorded_by=self.user, **kwargs,
+        )
+
+    def rows_in(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM ONLY {connection.ops.quote_name(table)}')
+            return cursor.fetchone()[0]
+
+    def table_exists(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT to_regclass(%s)', [table])
+            return cursor.fetchone()[0] is not None
+
+    def test_convert_populated_table(self):
+        count = partitioning.convert_table(connection, Sale, months_ahead=1, today=TODAY)
+
+        table = Sale._meta.db_table
+        self.assertEqual(count, 5)  # 2024-03 ~ 2024-07
+        self.assertTrue(partitioning.is_partitioned(connection, table))
+        names = [partition['name'] for partition in partitioning.list_partitions(connection, Sale)]
+        self.assertEqual(names, [
+            'sales_sale_p2024_03', 'sales_sale_p2024_04', 'sales_sale_p2024_05',
+            'sales_sale_p2024_06', 'sales_sale_p2024_07', 'sales_sale_default',
+        ])
+        self.assertEqual(Sale.objects.count(), 12)
+        for month in (3, 4, 5, 6):
+            self.assertEqual(self.rows_in(partitioning.partition_name(table, date(2024, month, 1))), 3)
+        self.assertEqual(self.rows_in(partitioning.default_partition_name(table)), 0)
+        # 已經分割過時不做任何事
+        self.assertEqual(partitioning.convert_table(connection, Sale, today=TODAY), 0)
+
+    def test_insert_after_convert_continues_sequence(self):
+        partitioning.convert_table(connection, Sale, months_ahead=1, today=TODAY)
+
+        sale = self.sale(datetime(2024, 6, 20, 12))
+        self.assertGreater(sale.pk, self.max_id)
+        self.assertEqual(self.rows_in('sales_sale_p2024_06'), 4)
+        self.assertEqual(Sale.objects.get(pk=sale.pk).amount, Decimal('100'))
+
+    def test_ensure_moves_rows_out_of_default(self):
+        partitioning.convert_table(connection, Sale, months_ahead=0, today=TODAY)
+        future = self.sale(datetime(2024, 8, 5, 12))
+        self.assertEqual(self.rows_in('sales_sale_default'), 1)
+
+        created = partitioning.ensure_partitions(connection, Sale, months_ahead=2, today=TODAY)
+
+        self.assertEqual(created, ['sales_sale_p2024_07', 'sales_sale_p2024_08'])
+        self.assertEqual(self.rows_in('sales_sale_default'), 0)
+        self.assertEqual(self.rows_in('sales_sale_p2024_08'), 1)
+        self.assertTrue(Sale.objects.filter(pk=future.pk).exists())
+        # 搬移後的分割表也建立了各自的唯一索引
+        future.idempotency_key = 'dup'
+        future.save()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.sale(datetime(2024, 8, 6, 12), idempotency_key='dup')
+        self.assertEqual(partitioning.ensure_partitions(connection, Sale, months_ahead=2, today=TODAY), [])
+
+    def test_detach_partition(self):
+        partitioning.convert_table(connection, Sale, months_ahead=0, today=TODAY)
+
+        name = partitioning.detach_partition(connection, Sale, date(2024, 3, 1))
+        self.assertEqual(name, 'sales_sale_p2024_03')
+        self.assertEqual(Sale.objects.count(), 9)
+        self.assertTrue(self.table_exists(name))
+        self.assertEqual(self.rows_in(name), 3)
+
+        partitioning.detach_partition(connection, Sale, date(2024, 4, 1), drop=True)
+        self.assertEqual(Sale.objects.count(), 6)
+        self.assertFalse(self.table_exists('sales_sale_p2024_04'))
+
+        with self.assertRaises(partitioning.PartitioningError):
+            partitioning.detach_partition(connection, Sale, date(2024, 4, 1))
+        self.assertGreater(self.sale(datetime(2024, 5, 20, 12)).pk, self.max_id)
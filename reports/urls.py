@@ -4,9 +4,7 @@ from . import views
 app_name = 'reports'
 
 urlpatterns = [
-    # 暫時為空，稍後會加入報表相關的 URL
+    # 報表 API
+    path('', views.ReportListCreateView.as_view(), name='report_list_create'),
+    path('<int:pk>/', views.ReportDetailView.as_view(), name='report_detail'),
 ]
-
-
-
-
@@ -1,9 +1,48 @@
-from django.shortcuts import render
 from rest_framework import generics
+
+from onecoco import cache
+from onecoco.api import ReportCursorPagination, StoreScopedMixin, VersionETagMixin
+from .engine import generate_report
 from .models import Report
+from .serializers import ReportSerializer
+
+
+class ReportAPIMixin(StoreScopedMixin, VersionETagMixin):
+    """報表 API 的共用行為：店面範圍、?report_type= 篩選與 ETag"""
+
+    serializer_class = ReportSerializer
+    pagination_class = ReportCursorPagination
+
+    def get_queryset(self):
+        queryset = self.scope_queryset(Report.objects.all())
+        report_type = self.request.query_params.get('report_type')
+        if report_type:
+            queryset = queryset.filter(report_type=report_type)
+        return queryset
+
+    def get_etag_scopes(self):
+        return [cache.REPORTS_SCOPE]
 
-# 暫時為空，稍後會加入報表相關的視圖
 
+class ReportListCreateView(ReportAPIMixin, generics.ListCreateAPIView):
+    """報表列表和產生；同店面、類型與期間的報表已存在時會重新計算"""
 
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        end_date = data.get('end_date')
+        report = generate_report(
+            self.get_create_store_id(serializer),
+            data['report_type'],
+            self.request.user,
+            day=data['start_date'],
+            start_date=data['start_date'] if end_date else None,
+            end_date=end_date,
+        )
+        if data.get('notes'):
+            report.notes = data['notes']
+            report.save(update_fields=['notes', 'updated_at'])
+        serializer.instance = report
 
 
+class ReportDetailView(ReportAPIMixin, generics.RetrieveAPIView):
+    """報表詳細資料"""
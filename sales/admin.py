@@ -20,12 +20,13 @@ class SaleAdmin(admin.ModelAdmin):
     ]
     
     search_fields = [
-        'description', 'notes', 'recorded_by__username',
+        'description', 'notes', 'idempotency_key', 'recorded_by__username',
         'recorded_by__first_name', 'recorded_by__last_name'
     ]
     
     list_per_page = 50
     date_hierarchy = 'date'
+    actions = ['export_as_csv']
     
     fieldsets = (
         ('基本資訊', {
@@ -59,6 +60,12 @@ class SaleAdmin(admin.ModelAdmin):
             obj.store_id = request.user.store_id
         super().save_model(request, obj, form, change)
     
+    @admin.action(description='匯出選取的銷售額為 CSV')
+    def export_as_csv(self, request, queryset):
+        """以串流方式匯出選取的資料"""
+        from onecoco import exporter
+        return exporter.export_response(queryset, 'sales', 'sales.csv')
+    
     def formatted_amount_display(self, obj):
         """格式化金額顯示"""
         return format_html(
@@ -0,0 +1,159 @@
+"""
+POS 銷售批次上傳
+
+每批資料只需一次冪等鍵查詢、一次時間查詢與一次 bulk_create：
+
+- 冪等鍵（store_id, idempotency_key）已存在的項目視為重送，回傳原本的記錄
+- Sale 有 (date, store_id) 唯一限制，同店同一時間的交易依 on_conflict 處理：
+  shift（預設）將時間往後順延到下一個空的微秒，reject 則回報衝突
+- 寫入後同步更新每日彙總（bulk_create 不會觸發 signal）
+"""
+
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from reports import rollup
+from .models import Sale
+
+MAX_BATCH_SIZE = 1000
+CONFLICT_POLICIES = ('shift', 'reject')
+
+# 與其他請求同時寫入而衝突時，重新檢查後再試的次數
+MAX_ATTEMPTS = 3
+
+
+class SaleIngestItemSerializer(serializers.Serializer):
+    """POS 上傳的單筆交易"""
+
+    idempotency_key = serializers.CharField(max_length=64)
+    date = serializers.DateTimeField()
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    category = serializers.CharField(max_length=20, required=False, allow_blank=True)
+    description = serializers.CharField(max_length=200, required=False, allow_blank=True)
+    notes = serializers.CharField(max_length=500, required=False, allow_blank=True)
+    store_id = serializers.CharField(max_length=50, required=False)
+
+
+def _result(index, item, status, **extra):
+    return {'index': index, 'idempotency_key': item.get('idempotency_key'), 'status': status, **extra}
+
+
+def _existing_keys(store_items):
+    """一次查出各店面已存在的冪等鍵"""
+    existing = {}
+    for store_id, items in store_items.items():
+        keys = [item['idempotency_key'] for _, item in items]
+        rows = Sale.objects.filter(store_id=store_id, idempotency_key__in=keys)
+        for pk, key, date in rows.values_list('pk', 'idempotency_key', 'date'):
+            existing[(store_id, key)] = (pk, date)
+    return existing
+
+
+def _taken_dates(store_id, items):
+    """店面在本批時間範圍（含順延空間）內已使用的時間"""
+    dates = [item['date'] for _, item in items]
+    return set(
+        Sale.objects.filter(
+            store_id=store_id,
+            date__gte=min(dates),
+            date__lte=max(dates) + timedelta(seconds=1),
+        ).values_list('date', flat=True)
+    )
+
+
+def _plan(store_items, recorded_by, on_conflict, results):
+    """決定每個項目的處理方式；回傳待寫入的 [(index, Sale, 是否順延時間)]"""
+    existing = _existing_keys(store_items)
+    pending = []
+    for store_id, items in store_items.items():
+        taken = _taken_dates(store_id, items)
+        seen_keys = {}
+        for index, item in items:
+            key = item['idempotency_key']
+            if (store_id, key) in existing:
+                pk, date = existing[(store_id, key)]
+                results[index] = _result(index, item, 'duplicate', id=pk, date=date)
+                continue
+            if key in seen_keys:
+                results[index] = _result(index, item, 'duplicate', duplicate_of=seen_keys[key])
+                continue
+
+            date = item['date']
+            if date in taken:
+                if on_conflict == 'reject':
+                    results[index] = _result(
+                        index, item, 'conflict', errors={'date': '同店面同一時間已有銷售記錄'}
+                    )
+                    continue
+                while date in taken:
+                    date += timedelta(microseconds=1)
+            taken.add(date)
+            seen_keys[key] = index
+
+            sale = Sale(
+                date=date,
+                amount=item['amount'],
+                category=item.get('category') or Sale._meta.get_field('category').default,
+                description=item.get('description', ''),
+                notes=item.get('notes', ''),
+                store_id=store_id,
+                recorded_by=recorded_by,
+                idempotency_key=key,
+            )
+            pending.append((index, sale, date != item['date']))
+    return pending
+
+
+def ingest_sales(items, recorded_by, store_id=None, on_conflict='shift'):
+    """
+    寫入一批 POS 交易，回傳與輸入順序相同的逐筆結果
+
+    store_id 為 None 時各項目可自帶 store_id（預設為記錄人員的店面）；
+    指定 store_id 時所有項目一律寫入該店面。
+    """
+    results = [None] * len(items)
+    validator = SaleIngestItemSerializer()
+    store_items = {}
+    for index, raw in enumerate(items):
+        if not isinstance(raw, dict):
+            results[index] = _result(index, {}, 'invalid', errors={'non_field_errors': ['每個項目必須是物件']})
+            continue
+        try:
+            item = validator.run_validation(raw)
+        except serializers.ValidationError as e:
+            results[index] = _result(index, raw, 'invalid', errors=e.detail)
+            continue
+        item_store = store_id or item.get('store_id') or recorded_by.store_id
+        store_items.setdefault(item_store, []).append((index, item))
+
+    for attempt in range(MAX_ATTEMPTS):
+        planned = list(results)
+        pending = _plan(store_items, recorded_by, on_conflict, planned)
+        if not pending:
+            results = planned
+            break
+        try:
+            with transaction.atomic():
+                sales = [sale for _, sale, _ in pending]
+                Sale.objects.bulk_create(sales)
+                rollup.record_rows(Sale, sales)
+        except IntegrityError:
+            # 其他請求同時寫入了相同的冪等鍵或時間，重新檢查後再試
+            if attempt == MAX_ATTEMPTS - 1:
+                for index, sale, _ in pending:
+                    planned[index] = _result(
+                        index, {'idempotency_key': sale.idempotency_key}, 'conflict',
+                        errors={'non_field_errors': ['與其他上傳同時寫入，請稍後重送']},
+                    )
+                results = planned
+            continue
+        for index, sale, shifted in pending:
+            planned[index] = _result(
+                index, {'idempotency_key': sale.idempotency_key}, 'created',
+                id=sale.pk, date=sale.date, shifted=shifted,
+            )
+        results = planned
+        break
+    return results
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0002_convert_date_to_datetime'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sale',
+            name='idempotency_key',
+            field=models.CharField(blank=True, help_text='POS 批次上傳時的交易識別碼，重送時用來避免重複建立', max_length=64, null=True, verbose_name='冪等鍵'),
+        ),
+        migrations.AddConstraint(
+            model_name='sale',
+            constraint=models.UniqueConstraint(fields=('store_id', 'idempotency_key'), name='sales_sale_idempotency_key'),
+        ),
+    ]
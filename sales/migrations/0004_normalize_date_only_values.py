@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from onecoco.data_migrations import date_only_rows, migrate_in_chunks
+
+
+def normalize_date_only_values(apps, schema_editor):
+    """將 SQLite 中只有日期的舊資料改寫為完整的日期時間（讀取時的值不變）"""
+    Sale = apps.get_model('sales', 'Sale')
+    rows = date_only_rows(Sale.objects.using(schema_editor.connection.alias))
+    migrate_in_chunks(rows, lambda obj: True, ['date'], only=['date'])
+
+
+class Migration(migrations.Migration):
+
+    # 每批各自提交，大型資料表中途中斷時已完成的批次不會回滾
+    atomic = False
+
+    dependencies = [
+        ('sales', '0003_sale_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_date_only_values, migrations.RunPython.noop, atomic=False),
+    ]
@@ -61,6 +61,14 @@ class Sale(models.Model):
         help_text='額外說明或備註'
     )
     
+    idempotency_key = models.CharField(
+        max_length=64,
+        null=True,
+        blank=True,
+        verbose_name='冪等鍵',
+        help_text='POS 批次上傳時的交易識別碼，重送時用來避免重複建立'
+    )
+    
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='建立時間'
@@ -76,6 +84,13 @@ class Sale(models.Model):
         verbose_name_plural = '銷售額'
         ordering = ['-date', '-created_at']
         unique_together = ['date', 'store_id']  # 同店同日期只能有一筆記錄
+        constraints = [
+            # 空值不受限制，只有 POS 上傳的資料會帶冪等鍵
+            models.UniqueConstraint(
+                fields=['store_id', 'idempotency_key'],
+                name='sales_sale_idempotency_key',
+            ),
+        ]
         indexes = [
             models.Index(fields=['date', 'store_id']),
             models.Index(fields=['store_id', 'date']),
@@ -0,0 +1,15 @@
+from onecoco.api import LedgerSerializer
+from .models import Sale
+
+
+class SaleSerializer(LedgerSerializer):
+    """銷售額序列化器"""
+
+    class Meta(LedgerSerializer.Meta):
+        model = Sale
+        fields = [
+            'id', 'date', 'amount', 'category', 'description', 'notes',
+            'store_id', 'recorded_by', 'recorded_by_name', 'created_at', 'updated_at'
+        ]
+        # (date, store_id) 的唯一限制在寫入時檢查，store_id 可省略
+        validators = []
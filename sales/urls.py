@@ -4,9 +4,8 @@ from . import views
 app_name = 'sales'
 
 urlpatterns = [
-    # 暫時為空，稍後會加入銷售額相關的 URL
+    # 銷售額 API
+    path('', views.SaleListCreateView.as_view(), name='sale_list_create'),
+    path('<int:pk>/', views.SaleDetailView.as_view(), name='sale_detail'),
+    path('ingest/', views.SaleIngestView.as_view(), name='sale_ingest'),
 ]
-
-
-
-
@@ -1,9 +1,62 @@
-from django.shortcuts import render
-from rest_framework import generics
+from collections import Counter
+
+from rest_framework import generics, status
+from rest_framework.parsers import JSONParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from onecoco.api import JSONLinesParser, JSONLParser, LedgerAPIMixin, StoreScopedMixin
+from .ingest import CONFLICT_POLICIES, MAX_BATCH_SIZE, ingest_sales
 from .models import Sale
+from .serializers import SaleSerializer
+
+
+class SaleListCreateView(LedgerAPIMixin, generics.ListCreateAPIView):
+    """銷售額列表和建立"""
+
+    model = Sale
+    serializer_class = SaleSerializer
+
+
+class SaleDetailView(LedgerAPIMixin, generics.RetrieveAPIView):
+    """銷售額詳細資料"""
+
+    model = Sale
+    serializer_class = SaleSerializer
+
 
-# 暫時為空，稍後會加入銷售額相關的視圖
+class SaleIngestView(StoreScopedMixin, APIView):
+    """
+    POS 批次上傳銷售
 
+    內容可為 JSON 陣列、{"items": [...]} 或 JSON Lines；每個項目需帶 idempotency_key。
+    ?on_conflict=shift|reject 決定同店同一時間的交易如何處理。
+    """
 
+    parser_classes = [JSONParser, JSONLinesParser, JSONLParser]
 
+    def post(self, request):
+        items = request.data
+        if isinstance(items, dict):
+            items = items.get('items')
+        if not isinstance(items, list):
+            return Response({'error': '內容必須是交易陣列'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_BATCH_SIZE:
+            return Response(
+                {'error': f'每批最多 {MAX_BATCH_SIZE} 筆'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        on_conflict = request.query_params.get('on_conflict', 'shift')
+        if on_conflict not in CONFLICT_POLICIES:
+            return Response(
+                {'error': f"on_conflict 必須為 {'、'.join(CONFLICT_POLICIES)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
+        # 一般使用者固定寫入自己的店面；超級使用者可用 ?store= 或在項目中指定
+        store_id = self.get_store_id() or None
+        results = ingest_sales(items, request.user, store_id=store_id, on_conflict=on_conflict)
+        return Response({
+            'summary': Counter(result['status'] for result in results),
+            'results': results,
+        })
@@ -0,0 +1,93 @@
+// 成本管理頁面特定JavaScript
+
+// 搜尋已載入的成本項目
+function filterCosts() {
+    const searchInput = document.getElementById('costSearch');
+    const costItems = document.querySelectorAll('.cost-item');
+    const filter = searchInput.value.toLowerCase();
+
+    costItems.forEach(item => {
+        const title = item.querySelector('.cost-name').textContent.toLowerCase();
+        const category = item.querySelector('.cost-category').textContent.toLowerCase();
+
+        if (title.includes(filter) || category.includes(filter)) {
+            item.style.display = '';
+        } else {
+            item.style.display = 'none';
+        }
+    });
+}
+
+// 載入更多（沿用目前的篩選條件，以游標取得下一頁）
+document.getElementById('loadMoreBtn').addEventListener('click', function() {
+    const button = this;
+    const params = new URLSearchParams(window.location.search);
+    params.set('cursor', button.dataset.nextCursor);
+    params.set('partial', '1');
+    button.disabled = true;
+
+    fetch(`${window.location.pathname}?${params.toString()}`, {
+        headers: {'X-Requested-With': 'XMLHttpRequest'}
+    })
+        .then(response => response.json())
+        .then(data => {
+            const list = document.getElementById('costsList');
+            const template = document.createElement('template');
+            template.innerHTML = data.html;
+            template.content.querySelectorAll('.cost-item').forEach(item => {
+                if (!list.querySelector(`[data-cost-id="${item.dataset.costId}"]`)) {
+                    list.appendChild(item);
+                }
+            });
+            button.dataset.nextCursor = data.next_cursor || '';
+            if (!data.next_cursor) {
+                document.getElementById('loadMore').style.display = 'none';
+            }
+            filterCosts();
+        })
+        .catch(() => Utils.showMessage('載入失敗，請稍後再試', 'error'))
+        .finally(() => { button.disabled = false; });
+});
+
+// 編輯成本
+function editCost(costId) {
+    Utils.showMessage('編輯功能開發中...', 'info');
+}
+
+// 刪除成本
+function deleteCost(costId) {
+    Utils.confirm('確定要刪除這筆成本記錄嗎？', function() {
+        window.location.href = `/dashboard/costs/${costId}/delete/`;
+    });
+}
+
+// 表單驗證
+document.getElementById('addCostForm').addEventListener('submit', function(e) {
+    e.preventDefault();
+    const itemName = document.getElementById('item_name').value.trim();
+    const unit = document.getElementById('unit').value.trim();
+    const amount = document.getElementById('amount').value;
+    const sellingPrice = document.getElementById('selling_price').value;
+
+    if (!itemName) {
+        Utils.showMessage('請輸入項目名稱', 'error');
+        return;
+    }
+
+    if (!amount || parseFloat(amount) <= 0) {
+        Utils.showMessage('請輸入有效的成本', 'error');
+        return;
+    }
+
+    if (sellingPrice && parseFloat(sellingPrice) <= 0) {
+        Utils.showMessage('請輸入有效的售價', 'error');
+        return;
+    }
+
+    this.submit();
+});
+
+// 搜尋功能
+document.getElementById('costSearch').addEventListener('input', function() {
+    filterCosts();
+});
@@ -0,0 +1,24 @@
+// 儀表板頁面特定JavaScript
+document.addEventListener('DOMContentLoaded', function() {
+    // 為功能卡片添加動畫效果
+    const featureCards = document.querySelectorAll('.feature-card');
+
+    featureCards.forEach((card, index) => {
+        card.style.opacity = '0';
+        card.style.transform = 'translateY(30px)';
+
+        setTimeout(() => {
+            card.style.transition = 'all 0.6s ease';
+            card.style.opacity = '1';
+            card.style.transform = 'translateY(0)';
+        }, index * 150);
+    });
+
+    // 添加點擊統計功能（可選）
+    featureCards.forEach(card => {
+        card.addEventListener('click', function() {
+            const featureName = this.querySelector('h3').textContent;
+            console.log(`用戶點擊了: ${featureName}`);
+        });
+    });
+});
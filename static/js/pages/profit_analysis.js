@@ -0,0 +1,55 @@
+// 利潤分析頁面特定JavaScript
+
+document.addEventListener('DOMContentLoaded', function() {
+    // 為統計卡片添加動畫效果
+    const statCards = document.querySelectorAll('.stat-card');
+
+    statCards.forEach((card, index) => {
+        card.style.opacity = '0';
+        card.style.transform = 'translateY(30px)';
+
+        setTimeout(() => {
+            card.style.transition = 'all 0.6s ease';
+            card.style.opacity = '1';
+            card.style.transform = 'translateY(0)';
+        }, index * 200);
+    });
+
+    // 為洞察項目添加動畫效果
+    const insightItems = document.querySelectorAll('.insight-item');
+
+    insightItems.forEach((item, index) => {
+        item.style.opacity = '0';
+        item.style.transform = 'translateX(-30px)';
+
+        setTimeout(() => {
+            item.style.transition = 'all 0.6s ease';
+            item.style.opacity = '1';
+            item.style.transform = 'translateX(0)';
+        }, 800 + (index * 200));
+    });
+
+    // 添加點擊統計功能
+    statCards.forEach(card => {
+        card.addEventListener('click', function() {
+            const cardType = this.classList[1]; // sales, costs, profit
+            const value = this.querySelector('.value').textContent;
+            console.log(`用戶查看了 ${cardType} 統計: ${value}`);
+        });
+    });
+
+    // 模擬圖表載入動畫
+    const chartPlaceholder = document.querySelector('.chart-placeholder');
+    if (chartPlaceholder) {
+        setTimeout(() => {
+            chartPlaceholder.style.opacity = '0.7';
+            chartPlaceholder.style.transform = 'scale(0.98)';
+
+            setTimeout(() => {
+                chartPlaceholder.style.transition = 'all 0.3s ease';
+                chartPlaceholder.style.opacity = '1';
+                chartPlaceholder.style.transform = 'scale(1)';
+            }, 100);
+        }, 1000);
+    }
+});
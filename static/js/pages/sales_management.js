@@ -0,0 +1,147 @@
+// 載入更多（沿用目前的月份與店面篩選，以游標取得下一頁）
+function loadMore(table, tableId, button) {
+    const params = new URLSearchParams(window.location.search);
+    params.set(`${table}_cursor`, button.dataset.nextCursor);
+    params.set('partial', table);
+    button.disabled = true;
+
+    fetch(`${window.location.pathname}?${params.toString()}`, {
+        headers: {'X-Requested-With': 'XMLHttpRequest'}
+    })
+        .then(response => response.json())
+        .then(data => {
+            document.querySelector(`#${tableId} tbody`).insertAdjacentHTML('beforeend', data.html);
+            button.dataset.nextCursor = data.next_cursor || '';
+            if (!data.next_cursor) {
+                button.parentElement.style.display = 'none';
+            }
+        })
+        .catch(() => Utils.showMessage('載入失敗，請稍後再試', 'error'))
+        .finally(() => { button.disabled = false; });
+}
+
+// 刪除銷售記錄
+function deleteSale(saleId) {
+    Utils.confirm('確定要刪除這筆營業額記錄嗎？', function() {
+        window.location.href = `/dashboard/sales/sale/${saleId}/delete/`;
+    });
+}
+
+// 刪除支出記錄
+function deleteExpense(expenseId) {
+    Utils.confirm('確定要刪除這筆支出記錄嗎？', function() {
+        window.location.href = `/dashboard/sales/expense/${expenseId}/delete/`;
+    });
+}
+
+// 編輯收入記錄
+function editSale(id, amount, category, date, time, notes) {
+    document.getElementById('edit_sale_id').value = id;
+    document.getElementById('edit_sale_amount').value = amount;
+    document.getElementById('edit_sale_category').value = category;
+    document.getElementById('edit_sale_date').value = date;
+    document.getElementById('edit_sale_time').value = time;
+    document.getElementById('edit_sale_notes').value = notes;
+
+    // 設置表單提交地址
+    document.getElementById('editSaleForm').action = `/dashboard/sales/sale/${id}/edit/`;
+
+    ModalUtils.showModal('editSaleModal');
+}
+
+// 編輯支出記錄
+function editExpense(id, amount, itemName, category, date, time, notes) {
+    document.getElementById('edit_expense_id').value = id;
+    document.getElementById('edit_expense_amount').value = amount;
+    document.getElementById('edit_expense_item').value = itemName;
+    document.getElementById('edit_expense_category').value = category;
+    document.getElementById('edit_expense_date').value = date;
+    document.getElementById('edit_expense_time').value = time;
+    document.getElementById('edit_expense_notes').value = notes;
+
+    // 設置表單提交地址
+    document.getElementById('editExpenseForm').action = `/dashboard/sales/expense/${id}/edit/`;
+
+    ModalUtils.showModal('editExpenseModal');
+}
+
+// 表單驗證
+document.getElementById('revenueForm').addEventListener('submit', function(e) {
+    e.preventDefault();
+    const amount = document.getElementById('amount').value;
+    if (!amount || parseFloat(amount) <= 0) {
+        Utils.showMessage('請輸入有效的成本', 'error');
+        return;
+    }
+    this.submit();
+});
+
+document.getElementById('expenseForm').addEventListener('submit', function(e) {
+    e.preventDefault();
+    const itemName = document.getElementById('expense_item').value.trim();
+    const amount = document.getElementById('expense_amount').value;
+    if (!itemName) {
+        Utils.showMessage('請輸入項目名稱', 'error');
+        return;
+    }
+    if (!amount || parseFloat(amount) <= 0) {
+        Utils.showMessage('請輸入有效的成本', 'error');
+        return;
+    }
+    this.submit();
+});
+
+// 編輯表單驗證
+document.getElementById('editSaleForm').addEventListener('submit', function(e) {
+    e.preventDefault();
+    const amount = document.getElementById('edit_sale_amount').value;
+    const date = document.getElementById('edit_sale_date').value;
+    const time = document.getElementById('edit_sale_time').value;
+
+    if (!amount || parseFloat(amount) <= 0) {
+        Utils.showMessage('請輸入有效的成本', 'error');
+        return;
+    }
+
+    if (!date) {
+        Utils.showMessage('請選擇日期', 'error');
+        return;
+    }
+
+    if (!time) {
+        Utils.showMessage('請選擇時間', 'error');
+        return;
+    }
+
+    this.submit();
+});
+
+document.getElementById('editExpenseForm').addEventListener('submit', function(e) {
+    e.preventDefault();
+    const itemName = document.getElementById('edit_expense_item').value.trim();
+    const amount = document.getElementById('edit_expense_amount').value;
+    const date = document.getElementById('edit_expense_date').value;
+    const time = document.getElementById('edit_expense_time').value;
+
+    if (!itemName) {
+        Utils.showMessage('請輸入項目名稱', 'error');
+        return;
+    }
+
+    if (!amount || parseFloat(amount) <= 0) {
+        Utils.showMessage('請輸入有效的成本', 'error');
+        return;
+    }
+
+    if (!date) {
+        Utils.showMessage('請選擇日期', 'error');
+        return;
+    }
+
+    if (!time) {
+        Utils.showMessage('請選擇時間', 'error');
+        return;
+    }
+
+    this.submit();
+});
@@ -0,0 +1,73 @@
+// 用戶管理頁面特定JavaScript
+
+// 篩選用戶
+function filterUsers() {
+    const searchInput = document.getElementById('userSearch');
+    const userItems = document.querySelectorAll('.user-item');
+    const filter = searchInput.value.toLowerCase();
+
+    userItems.forEach(item => {
+        const name = item.querySelector('h4').textContent.toLowerCase();
+        const email = item.querySelector('p').textContent.toLowerCase();
+        const username = item.querySelector('.user-detail-value').textContent.toLowerCase();
+
+        if (name.includes(filter) || email.includes(filter) || username.includes(filter)) {
+            item.style.display = 'block';
+        } else {
+            item.style.display = 'none';
+        }
+    });
+}
+
+// 刪除用戶
+function deleteUser(userId) {
+    Utils.confirm('確定要刪除這個用戶嗎？此操作無法復原。', function() {
+        window.location.href = `/dashboard/users/${userId}/delete/`;
+    });
+}
+
+// 表單驗證
+document.getElementById('addUserForm').addEventListener('submit', function(e) {
+    e.preventDefault();
+    const username = document.getElementById('username').value.trim();
+    const email = document.getElementById('email').value.trim();
+    const password = document.getElementById('password').value;
+
+    if (!username) {
+        Utils.showMessage('請輸入用戶名', 'error');
+        return;
+    }
+
+    if (!email) {
+        Utils.showMessage('請輸入電子郵件', 'error');
+        return;
+    }
+
+    if (!password || password.length < 6) {
+        Utils.showMessage('密碼至少需要6個字符', 'error');
+        return;
+    }
+
+    this.submit();
+});
+
+// 搜尋功能
+document.getElementById('userSearch').addEventListener('input', function() {
+    filterUsers();
+});
+
+// 用戶項目動畫
+document.addEventListener('DOMContentLoaded', function() {
+    const userItems = document.querySelectorAll('.user-item');
+
+    userItems.forEach((item, index) => {
+        item.style.opacity = '0';
+        item.style.transform = 'translateY(20px)';
+
+        setTimeout(() => {
+            item.style.transition = 'all 0.5s ease';
+            item.style.opacity = '1';
+            item.style.transform = 'translateY(0)';
+        }, index * 100);
+    });
+});